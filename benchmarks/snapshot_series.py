@@ -0,0 +1,81 @@
+""" Compare ``snapshot_series`` with a loop of ``snapshot`` calls.
+
+The script renders the same frames (particle containers with moving
+particles) both ways and reports the total time and the frames per
+second of each, as well as the speedup of ``snapshot_series``.
+
+Usage::
+
+    python benchmarks/snapshot_series.py [number of frames] [particles]
+
+"""
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+import numpy
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds import Particles, Particle
+
+from simphony_paraview.snapshot import snapshot, snapshot_series
+
+
+def create_frames(number_of_frames, number_of_particles):
+    """ Create particle containers with moving particles. """
+    random = numpy.random.RandomState(0)
+    coordinates = random.uniform(0.0, 10.0, (number_of_particles, 3))
+    velocities = random.uniform(-0.1, 0.1, (number_of_particles, 3))
+    frames = []
+    for frame in range(number_of_frames):
+        particles = Particles('benchmark')
+        particles.add(
+            Particle(
+                coordinates=point + velocity * frame,
+                data=DataContainer(TEMPERATURE=float(index + frame)))
+            for index, (point, velocity) in enumerate(
+                zip(coordinates, velocities)))
+        frames.append(particles)
+    return frames
+
+
+def measure_loop(frames, pattern, select):
+    start = time.time()
+    for index, frame in enumerate(frames):
+        snapshot(frame, pattern.format(index), select=select)
+    return time.time() - start
+
+
+def measure_series(frames, pattern, select):
+    start = time.time()
+    snapshot_series(frames, pattern, select=select)
+    return time.time() - start
+
+
+def main(number_of_frames=50, number_of_particles=1000):
+    frames = create_frames(number_of_frames, number_of_particles)
+    select = (CUBA.TEMPERATURE, 'particles')
+    print '{} frames of {} particles'.format(
+        number_of_frames, number_of_particles)
+    print '{:<20} {:>10} {:>10}'.format('method', 'time (s)', 'frames/s')
+    temp_dir = tempfile.mkdtemp(prefix='simphony-')
+    try:
+        times = []
+        for label, measure in (
+                ('snapshot loop', measure_loop),
+                ('snapshot_series', measure_series)):
+            pattern = os.path.join(
+                temp_dir, label.replace(' ', '_') + '_{:04d}.png')
+            elapsed = measure(frames, pattern, select)
+            times.append(elapsed)
+            print '{:<20} {:>10.3f} {:>10.1f}'.format(
+                label, elapsed, number_of_frames / elapsed)
+        print 'speedup: {:.1f}x'.format(times[0] / times[1])
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,96 @@
+""" Compare the legacy and xml vtk file formats of ``write_to_file``.
+
+For each format the script reports the write time (including the
+conversion to a vtk dataset), the time to load the file in paraview
+and the file size.
+
+Usage::
+
+    python benchmarks/write_formats.py [number of hexahedra per side]
+
+"""
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+import numpy
+from paraview.simple import Connect, Disconnect, Delete, OpenDataFile
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds import Mesh, Point, Cell
+
+from simphony_paraview.core.api import write_to_file
+
+
+def create_hexahedral_mesh(side):
+    """ Create a mesh of side x side x side hexahedra with point data. """
+    mesh = Mesh('benchmark')
+    size = side + 1
+    x, y, z = numpy.mgrid[0:size, 0:size, 0:size]
+    coordinates = numpy.column_stack(
+        (x.ravel(), y.ravel(), z.ravel())).astype(float)
+    uids = mesh.add(
+        Point(
+            coordinates=point,
+            data=DataContainer(
+                TEMPERATURE=float(index), VELOCITY=point * 0.1))
+        for index, point in enumerate(coordinates))
+
+    def index(i, j, k):
+        return (i * size + j) * size + k
+
+    offsets = [
+        (0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),
+        (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)]
+    mesh.add(
+        Cell(
+            points=[
+                uids[index(i + di, j + dj, k + dk)]
+                for di, dj, dk in offsets],
+            data=DataContainer(PRESSURE=float(i + j + k)))
+        for i in range(side) for j in range(side) for k in range(side))
+    return mesh
+
+
+def measure(cuds, filename, **options):
+    start = time.time()
+    write_to_file(cuds, filename, **options)
+    write_time = time.time() - start
+
+    Connect()
+    try:
+        start = time.time()
+        reader = OpenDataFile(filename)
+        reader.UpdatePipeline()
+        read_time = time.time() - start
+        Delete(reader)
+    finally:
+        Disconnect()
+    return write_time, read_time, os.path.getsize(filename)
+
+
+def main(side=30):
+    mesh = create_hexahedral_mesh(side)
+    print 'Mesh with {} points and {} cells'.format(
+        mesh.count_of(CUBA.POINT), mesh.count_of(CUBA.CELL))
+    print '{:<20} {:>10} {:>10} {:>12}'.format(
+        'format', 'write (s)', 'read (s)', 'size (KB)')
+    temp_dir = tempfile.mkdtemp(prefix='simphony-')
+    try:
+        for label, name, options in (
+                ('legacy ascii', 'mesh.vtk', {}),
+                ('xml binary', 'mesh.vtu', {'compressor': None}),
+                ('xml zlib', 'mesh.vtu', {'compressor': 'zlib'}),
+                ('xml lz4', 'mesh.vtu', {'compressor': 'lz4'})):
+            filename = os.path.join(temp_dir, name)
+            write_time, read_time, size = measure(mesh, filename, **options)
+            print '{:<20} {:>10.3f} {:>10.3f} {:>12.1f}'.format(
+                label, write_time, read_time, size / 1024.0)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
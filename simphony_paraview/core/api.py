@@ -1,11 +1,25 @@
-from .iterators import iter_cells, iter_grid_cells
+from .iterators import iter_cells, iter_grid_cells, iter_chunks
 from .cuba_data_accumulator import CUBADataAccumulator
-from .cuba_utils import supported_cuba, default_cuba_value
+from .cell_array_builder import CellArrayBuilder
+from .uid_index import UIDIndex
+from .incremental import IncrementalConverter
+from .conversion_cache import ConversionCache, fingerprint, full_fingerprint
+from .session import Session
+from .region import BoxRegion, SphereRegion
+from .cuba_utils import (
+    supported_cuba, default_cuba_value, cuba_schema, CUBASchema)
 from .constants import (
     points2edge, points2face, points2cell, dataset2writer,
-    cuba_value_types, VALUETYPES)
+    dataset2xmlwriter, dataset2extension, cuba_value_types, VALUETYPES)
 from .paraview_utils import (
-    write_to_file, loaded_in_paraview, typical_distance, set_data)
+    write_to_file, write_series, loaded_in_paraview, typical_distance,
+    set_data, default_representation, GLYPH_THRESHOLD, selected_keys,
+    container_kind, is_remote, connection_token, trivial_producer,
+    set_producer_output)
+from .series import PVDCollection, BackgroundWriter
+from .xdmf import XDMFCollection
+from .lattice_source import lattice_source
+from .source_registry import SourceRegistry
 
 from .cuds2vtk import cuds2vtk
 
@@ -13,17 +27,45 @@ from .cuds2vtk import cuds2vtk
 __all__ = [
     'iter_cells',
     'iter_grid_cells',
+    'iter_chunks',
     'CUBADataAccumulator',
+    'CellArrayBuilder',
+    'UIDIndex',
+    'IncrementalConverter',
+    'ConversionCache',
+    'fingerprint',
+    'full_fingerprint',
+    'Session',
+    'BoxRegion',
+    'SphereRegion',
     'supported_cuba',
     'default_cuba_value',
+    'cuba_schema',
+    'CUBASchema',
     'cuba_value_types',
     'VALUETYPES',
     'points2edge',
     'points2face',
     'points2cell',
     'dataset2writer',
+    'dataset2xmlwriter',
+    'dataset2extension',
     'write_to_file',
+    'write_series',
+    'PVDCollection',
+    'BackgroundWriter',
+    'XDMFCollection',
     'loaded_in_paraview',
+    'lattice_source',
+    'SourceRegistry',
     'cuds2vtk',
     'typical_distance',
-    'set_data']
+    'set_data',
+    'default_representation',
+    'GLYPH_THRESHOLD',
+    'selected_keys',
+    'container_kind',
+    'is_remote',
+    'connection_token',
+    'trivial_producer',
+    'set_producer_output']
@@ -0,0 +1,167 @@
+from itertools import chain
+
+import numpy
+from paraview import vtk
+from paraview import vtkConstants
+from paraview.numpy_support import (
+    numpy_to_vtk, numpy_to_vtkIdTypeArray, get_numpy_array_type)
+
+
+#: The numpy type that matches vtkIdType.
+ID_TYPE = get_numpy_array_type(vtkConstants.VTK_ID_TYPE)
+
+
+class CellArrayBuilder(object):
+    """ Build vtk cell connectivity from groups of CUDS elements.
+
+    The builder collects the point references of the appended elements
+    into flat offset/connectivity arrays and the vtk cell type of each
+    element into a cell type array. The vtk containers are created in
+    one step when they are requested.
+
+    >>> builder = CellArrayBuilder(point2index)
+    >>> builder.extend([edge.points for edge in edges], points2edge())
+    >>> builder.extend([cell.points for cell in cells], points2cell())
+    >>> builder.install(unstructured_grid)
+
+    """
+    def __init__(self, point2index):
+        """ Constructor
+
+        Parameters
+        ----------
+        point2index : UIDIndex
+            The mapping from point uid to the vtk point index.
+
+        """
+        self._point2index = point2index
+        self._sizes = []
+        self._connectivity = []
+        self._types = []
+
+    def __len__(self):
+        """ The number of cells that are stored in the builder.
+
+        """
+        return sum(len(sizes) for sizes in self._sizes)
+
+    def extend(self, elements, mapping=None):
+        """ Append a group of elements.
+
+        Parameters
+        ----------
+        elements : list
+            The sequence of point uids for each element.
+
+        mapping : dict
+            The mapping from the number of points to the vtk cell type
+            (e.g. :func:`~.points2cell`). Cell types are not collected
+            when the mapping is not provided.
+
+        """
+        sizes = numpy.fromiter(
+            (len(points) for points in elements),
+            dtype=ID_TYPE, count=len(elements))
+        connectivity = self._point2index.indices(
+            chain.from_iterable(elements)).astype(ID_TYPE)
+        self._sizes.append(sizes)
+        self._connectivity.append(connectivity)
+        if mapping is not None:
+            self._types.append(cell_types(sizes, mapping))
+
+    @property
+    def offsets(self):
+        """ The offset of each cell into the connectivity array. """
+        sizes = _concatenate(self._sizes, ID_TYPE)
+        return numpy.cumsum(sizes) - sizes
+
+    @property
+    def connectivity(self):
+        """ The point indices of all the cells as a flat array. """
+        return _concatenate(self._connectivity, ID_TYPE)
+
+    @property
+    def types(self):
+        """ The vtk cell type of each cell. """
+        return _concatenate(self._types, numpy.uint8)
+
+    def cell_array(self):
+        """ Return a vtkCellArray with the collected cells. """
+        return create_cell_array(
+            _concatenate(self._sizes, ID_TYPE), self.connectivity)
+
+    def install(self, grid):
+        """ Set the collected cells on a vtkUnstructuredGrid.
+
+        """
+        if len(self) == 0:
+            return
+        if len(self._types) != len(self._sizes):
+            message = 'Cell types are required to setup a vtkUnstructuredGrid'
+            raise ValueError(message)
+        set_cells(
+            grid, _concatenate(self._sizes, ID_TYPE), self.connectivity,
+            self.types)
+
+
+def create_cell_array(sizes, connectivity):
+    """ Create a vtkCellArray from the cell sizes and flat connectivity.
+
+    """
+    cell_array = vtk.vtkCellArray()
+    cell_array.SetCells(
+        len(sizes),
+        numpy_to_vtkIdTypeArray(legacy_cells(sizes, connectivity), deep=1))
+    return cell_array
+
+
+def legacy_cells(sizes, connectivity):
+    """ Interleave the cell sizes and the flat connectivity into the
+    legacy vtkCellArray layout.
+
+    """
+    locations = cell_locations(sizes)
+    cells = numpy.empty(len(sizes) + len(connectivity), dtype=ID_TYPE)
+    cells[locations] = sizes
+    mask = numpy.ones(len(cells), dtype=bool)
+    mask[locations] = False
+    cells[mask] = connectivity
+    return cells
+
+
+def set_cells(grid, sizes, connectivity, types):
+    """ Set the cells of a vtkUnstructuredGrid in one call.
+
+    """
+    grid.SetCells(
+        numpy_to_vtk(numpy.asarray(types, dtype=numpy.uint8), deep=1),
+        numpy_to_vtkIdTypeArray(cell_locations(sizes), deep=1),
+        create_cell_array(sizes, connectivity))
+
+
+def cell_types(sizes, mapping):
+    """ Map an array of point counts to vtk cell types.
+
+    The ``mapping`` is evaluated once per distinct number of points.
+
+    """
+    unique, inverse = numpy.unique(sizes, return_inverse=True)
+    types = numpy.array(
+        [mapping[int(size)] for size in unique], dtype=numpy.uint8)
+    return types[inverse]
+
+
+def cell_locations(sizes):
+    """ The offsets of each cell in the vtkCellArray legacy layout.
+
+    """
+    # in the legacy layout every cell is prefixed by its size
+    return (numpy.cumsum(sizes) - sizes +
+            numpy.arange(len(sizes), dtype=ID_TYPE)).astype(ID_TYPE)
+
+
+def _concatenate(arrays, dtype):
+    if len(arrays) == 0:
+        return numpy.empty(0, dtype=dtype)
+    else:
+        return numpy.concatenate(arrays)
@@ -1,3 +1,5 @@
+import warnings
+
 from paraview import servermanager
 from paraview.vtk import VTK_VERSION
 
@@ -7,7 +9,14 @@ if paraview_major == 3:
     from paraview.vtk.io import (
         vtkUnstructuredGridWriter,
         vtkStructuredPointsWriter,
-        vtkPolyDataWriter)
+        vtkStructuredGridWriter,
+        vtkPolyDataWriter,
+        vtkXMLUnstructuredGridWriter,
+        vtkXMLImageDataWriter,
+        vtkXMLStructuredGridWriter,
+        vtkXMLPolyDataWriter,
+        vtkZLibDataCompressor)
+    vtkLZ4DataCompressor = None
     from vtkRenderingPython import (
         vtkRenderWindowInteractor,
         vtkInteractorStyleJoystickCamera)
@@ -18,7 +27,18 @@ elif paraview_major == 4:
     from vtkIOLegacyPython import (
         vtkUnstructuredGridWriter,
         vtkStructuredPointsWriter,
+        vtkStructuredGridWriter,
         vtkPolyDataWriter)
+    from vtkIOXMLPython import (
+        vtkXMLUnstructuredGridWriter,
+        vtkXMLImageDataWriter,
+        vtkXMLStructuredGridWriter,
+        vtkXMLPolyDataWriter)
+    from vtkIOCorePython import vtkZLibDataCompressor
+    try:
+        from vtkIOCorePython import vtkLZ4DataCompressor
+    except ImportError:
+        vtkLZ4DataCompressor = None
     from vtkRenderingCorePython import (
         vtkRenderWindowInteractor)
     from vtkInteractionStylePython import (
@@ -39,9 +59,54 @@ def set_input(source, input):
         raise RuntimeError(message)
 
 
+def create_compressor(name):
+    """ Create the vtk data compressor for the xml writers.
+
+    Parameters
+    ----------
+    name : str
+        One of 'zlib', 'lz4' or None (no compression). When the lz4
+        compressor is not available in this vtk version the zlib
+        compressor is used instead.
+
+    """
+    if name is None:
+        return None
+    elif name == 'lz4' and vtkLZ4DataCompressor is not None:
+        return vtkLZ4DataCompressor()
+    elif name == 'lz4':
+        message = 'LZ4 compression is not supported by vtk {}, using zlib'
+        warnings.warn(message.format(VTK_VERSION))
+        return vtkZLibDataCompressor()
+    elif name == 'zlib':
+        return vtkZLibDataCompressor()
+    else:
+        message = 'Unknown compressor {!r}'
+        raise ValueError(message.format(name))
+
+
+def has_representation(representation, name):
+    """ Check if the representation type ``name`` is available.
+
+    Newer representation types (e.g. 'Point Gaussian') are not
+    supported by older paraview versions.
+
+    """
+    try:
+        available = representation.GetProperty('Representation').Available
+    except AttributeError:
+        return False
+    return name in available
+
+
 __all__ = [
     'vtkUnstructuredGridWriter',
     'vtkStructuredPointsWriter',
+    'vtkStructuredGridWriter',
     'vtkPolyDataWriter',
+    'vtkXMLUnstructuredGridWriter',
+    'vtkXMLImageDataWriter',
+    'vtkXMLStructuredGridWriter',
+    'vtkXMLPolyDataWriter',
     'vtkRenderWindowInteractor',
     'vtkInteractorStyleJoystickCamera']
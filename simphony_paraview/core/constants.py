@@ -1,15 +1,19 @@
 import enum
 from collections import defaultdict
 
-import numpy
 from paraview import vtk
 from paraview import vtkConstants
 from .compatibility import (
     vtkUnstructuredGridWriter,
     vtkStructuredPointsWriter,
-    vtkPolyDataWriter)
+    vtkStructuredGridWriter,
+    vtkPolyDataWriter,
+    vtkXMLUnstructuredGridWriter,
+    vtkXMLImageDataWriter,
+    vtkXMLStructuredGridWriter,
+    vtkXMLPolyDataWriter)
 
-from .cuba_utils import supported_cuba, default_cuba_value
+from .cuba_utils import cuba_schema
 
 
 class VALUETYPES(enum.IntEnum):
@@ -29,7 +33,7 @@ def points2edge():
 def points2face():
     """ Return a mapping from number of points to face cells. """
     return defaultdict(
-        lambda: vtk.Polygon().GetCellType(),
+        lambda: vtk.vtkPolygon().GetCellType(),
         {3: vtk.vtkTriangle().GetCellType(), 4: vtk.vtkQuad().GetCellType()})
 
 
@@ -49,18 +53,30 @@ def dataset2writer():
     return {
         vtkConstants.VTK_UNSTRUCTURED_GRID: vtkUnstructuredGridWriter,
         vtkConstants.VTK_STRUCTURED_POINTS: vtkStructuredPointsWriter,
+        vtkConstants.VTK_STRUCTURED_GRID: vtkStructuredGridWriter,
         vtkConstants.VTK_POLY_DATA: vtkPolyDataWriter}
 
 
+def dataset2xmlwriter():
+    """ Return a mapping from dataset type to xml writer classes. """
+    return {
+        vtkConstants.VTK_UNSTRUCTURED_GRID: vtkXMLUnstructuredGridWriter,
+        vtkConstants.VTK_STRUCTURED_POINTS: vtkXMLImageDataWriter,
+        vtkConstants.VTK_STRUCTURED_GRID: vtkXMLStructuredGridWriter,
+        vtkConstants.VTK_POLY_DATA: vtkXMLPolyDataWriter}
+
+
+def dataset2extension():
+    """ Return a mapping from dataset type to the xml file extension. """
+    return {
+        vtkConstants.VTK_UNSTRUCTURED_GRID: '.vtu',
+        vtkConstants.VTK_STRUCTURED_POINTS: '.vti',
+        vtkConstants.VTK_STRUCTURED_GRID: '.vts',
+        vtkConstants.VTK_POLY_DATA: '.vtp'}
+
+
 def cuba_value_types():
     """ Return a mapping from CUBA to VALUETYPE. """
-    types = {}
-    for cuba in supported_cuba():
-        default = default_cuba_value(cuba)
-        if isinstance(default, (float, int, long)):
-            types[cuba] = VALUETYPES.SCALAR
-        elif isinstance(default, str):
-            types[cuba] = VALUETYPES.STRING
-        elif isinstance(default, numpy.ndarray):
-            types[cuba] = VALUETYPES.VECTOR
-    return types
+    return {
+        cuba: VALUETYPES.SCALAR if schema.shape == () else VALUETYPES.VECTOR
+        for cuba, schema in cuba_schema().iteritems()}
@@ -0,0 +1,251 @@
+import logging
+import zlib
+from collections import OrderedDict
+from itertools import islice
+
+import numpy
+from simphony.core.cuba import CUBA
+from simphony.cuds import ABCMesh, ABCParticles, ABCLattice
+
+from .cuds2vtk import cuds2vtk
+
+
+logger = logging.getLogger(__name__)
+
+#: The number of items of each type in the checksum of
+#: :func:`fingerprint`.
+FINGERPRINT_SAMPLES = 64
+
+
+class ConversionCache(object):
+    """ A memory bounded LRU cache of converted cuds containers.
+
+    The cache stores values (e.g. vtk datasets, source proxies or
+    rendered images) together with their size in bytes. When the total
+    size exceeds ``max_bytes`` the least recently used values are
+    evicted. Containers are identified by a checksum of all their
+    items (see :func:`full_fingerprint`), so that an unchanged
+    container is converted only once.
+
+    >>> cache = ConversionCache(max_bytes=512 * 1024 ** 2)
+    >>> snapshot(mesh, 'front.png', cache=cache)
+    >>> snapshot(mesh, 'temperature.png', select=select, cache=cache)
+    >>> cache.stats
+    {'hits': 1, 'misses': 3, 'evictions': 0, ...}
+
+    """
+    def __init__(self, max_bytes=256 * 1024 ** 2, key=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        max_bytes : int
+            The maximum total size of the cached values.
+
+        key : callable
+            The function that returns the hashable key of a cuds
+            container. Default is :func:`full_fingerprint`. The cheaper
+            :func:`fingerprint` can be used when the container is never
+            modified in place, since it misses changes to the items
+            that are not sampled.
+
+        """
+        self.max_bytes = max_bytes
+        self.key = full_fingerprint if key is None else key
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """ The number of cached values.
+
+        """
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def stats(self):
+        """ The hit, miss and eviction counters and the cache usage.
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self),
+            'nbytes': self.nbytes,
+            'max_bytes': self.max_bytes}
+
+    def get(self, key, default=None):
+        """ Return the value of ``key`` and mark it as recently used.
+
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            logger.debug('Cache miss for %r', key)
+            return default
+        self._entries[key] = entry
+        self.hits += 1
+        logger.debug('Cache hit for %r', key)
+        return entry[0]
+
+    def put(self, key, value, nbytes=0, on_evict=None):
+        """ Store a value, evicting the least recently used values.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the value.
+
+        value : object
+            The value to store.
+
+        nbytes : int
+            The memory used by the value.
+
+        on_evict : callable
+            Called with the value when it is evicted from the cache.
+
+        Returns
+        -------
+        stored : bool
+            False when the value is larger than ``max_bytes`` and was
+            not stored.
+
+        """
+        if key in self._entries:
+            self._evict(key)
+        if nbytes > self.max_bytes:
+            logger.debug(
+                'Value for %r (%d bytes) is larger than the cache',
+                key, nbytes)
+            return False
+        self._entries[key] = (value, nbytes, on_evict)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+            self.evictions += 1
+        return True
+
+    def data_set(self, cuds, key=None, keys=None):
+        """ Return the vtk dataset of a cuds container.
+
+        The container is converted with :func:`~.cuds2vtk` when its
+        dataset is not cached.
+
+        Parameters
+        ----------
+        cuds :
+            A top level cuds object (e.g. a mesh).
+
+        key : hashable
+            The key of the container when it is already known.
+
+        keys : iterable
+            The CUBA keys of the item data to convert. Default is all
+            the supported keys.
+
+        """
+        key = (
+            'data_set', self.key(cuds) if key is None else key,
+            None if keys is None else frozenset(keys))
+        data_set = self.get(key)
+        if data_set is None:
+            data_set = cuds2vtk(cuds, keys=keys)
+            self.put(
+                key, data_set, nbytes=data_set.GetActualMemorySize() * 1024)
+        return data_set
+
+    def keys(self):
+        """ The keys of the cached values, least recently used first.
+
+        """
+        return list(self._entries)
+
+    def discard(self, key):
+        """ Evict the value of ``key`` if it is cached.
+
+        """
+        if key in self._entries:
+            self._evict(key)
+
+    def clear(self):
+        """ Evict all the values.
+
+        """
+        for key in list(self._entries):
+            self._evict(key)
+
+    def _evict(self, key):
+        value, nbytes, on_evict = self._entries.pop(key)
+        self.nbytes -= nbytes
+        logger.debug('Evicting %r from the cache', key)
+        if on_evict is not None:
+            on_evict(value)
+
+
+def fingerprint(cuds, samples=FINGERPRINT_SAMPLES):
+    """ Return a cheap key that changes when the cuds container changes.
+
+    The key is made of the container type and name, the number of
+    items of each type and a checksum of the coordinates, connectivity
+    and data of the first ``samples`` items of each type. The cost of
+    the key does not depend on the size of the container, but changes
+    that keep the number of items and modify only items after the
+    sampled ones are not detected. It is therefore not the default key
+    of a :class:`ConversionCache` (see :func:`full_fingerprint`).
+
+    """
+    if isinstance(cuds, ABCMesh):
+        item_types = (CUBA.POINT, CUBA.EDGE, CUBA.FACE, CUBA.CELL)
+        header = ()
+    elif isinstance(cuds, ABCParticles):
+        item_types = (CUBA.PARTICLE, CUBA.BOND)
+        header = ()
+    elif isinstance(cuds, ABCLattice):
+        item_types = (CUBA.NODE,)
+        cell = cuds.primitive_cell
+        header = tuple(
+            tuple(numpy.ravel(value)) for value in (
+                cuds.origin, cuds.size, cell.p1, cell.p2, cell.p3))
+    else:
+        msg = 'Provided object {} is not of any known cuds container types'
+        raise TypeError(msg.format(type(cuds)))
+    counts = tuple(cuds.count_of(item_type) for item_type in item_types)
+    checksum = zlib.adler32(repr(header))
+    for item_type in item_types:
+        for item in islice(cuds.iter(item_type=item_type), samples):
+            checksum = _item_checksum(item, checksum)
+    return (type(cuds).__name__, cuds.name, counts, checksum & 0xffffffff)
+
+
+def full_fingerprint(cuds):
+    """ Return a key that changes when any item of the cuds container
+    changes.
+
+    As :func:`fingerprint` but the checksum covers all the items, so
+    computing the key requires a pass over the whole container. This
+    is the default key of a :class:`ConversionCache`.
+
+    """
+    return fingerprint(cuds, samples=None)
+
+
+def _item_checksum(item, checksum):
+    if hasattr(item, 'uid'):
+        identity = item.uid.int
+    else:
+        identity = tuple(item.index)
+    links = getattr(item, 'points', None) or getattr(item, 'particles', ())
+    checksum = zlib.adler32(repr((
+        identity, tuple(getattr(item, 'coordinates', ())),
+        [uid.int for uid in links])), checksum)
+    for cuba, value in sorted(item.data.iteritems()):
+        checksum = zlib.adler32(cuba.name, checksum)
+        checksum = zlib.adler32(numpy.asarray(value).tostring(), checksum)
+    return checksum
@@ -2,11 +2,11 @@ import logging
 
 import numpy
 from paraview import vtk
-from paraview.numpy_support import get_vtk_array_type, create_vtk_array
+from paraview.numpy_support import (
+    create_vtk_array, numpy_to_vtk, vtk_to_numpy)
 from simphony.core.cuba import CUBA
 
-from .cuba_utils import supported_cuba,  default_cuba_value
-from .constants import cuba_value_types
+from .cuba_utils import cuba_schema
 
 
 logger = logging.getLogger(__name__)
@@ -58,8 +58,21 @@ class CUBADataAccumulator(object):
     >>> accumulator[CUBA.VELOCITY]
     KeyError(...)
 
+    .. rubric:: columnar operation
+
+    When the expected number of items is known the accumulator can
+    store the values in preallocated numpy buffers (one per key) that
+    grow geometrically if more items are appended. Only the keys that
+    are present in each ``DataContainer`` are written and the vtk
+    arrays are created once when :meth:`finalize` is called.
+
+    >>> accumulator = CUBADataAccumulator(size=cuds.count_of(CUBA.POINT))
+    >>> for point in cuds.iter(item_type=CUBA.POINT):
+    ...     accumulator.append(point.data)
+    >>> accumulator.finalize()
+
     """
-    def __init__(self, keys=(), container=None):
+    def __init__(self, keys=(), container=None, size=None, projection=None):
         """Constructor
 
         Parameters
@@ -71,15 +84,42 @@ class CUBADataAccumulator(object):
             accumulator to operate in ``fixed`` mode. If no keys are
             provided then accumulator operates in ``expand`` mode.
 
+        container : vtkFieldData
+
+            The vtkPointData or vtkCellData instance where the arrays
+            are stored. Default is a new vtkPointData.
+
+        size : int
+
+            The expected number of items. Providing this value sets up
+            the accumulator to operate in ``columnar`` mode, where the
+            vtk arrays are only created (and updated) on
+            :meth:`finalize`.
+
+        projection : iterable
+
+            The CUBA keys that are collected in ``expand`` mode. Values
+            of any other keys are never read from the data containers.
+            Default is to collect all the supported CUBA keys.
+
         """
         self.data = vtk.vtkPointData() if container is None else container
-        self._cuba_types = cuba_value_types()
+        self._schema = schema = cuba_schema()
         self._number_of_items = 0
+        if size is None:
+            self._buffers = None
+        else:
+            self._buffers = {}
+            self._capacity = size
+            self._finalized = False
         if len(keys) > 0:
-            self._keys = set(keys) & supported_cuba()
+            self._keys = set(keys) & set(schema)
             self._expand(self._keys)
+        elif projection is not None:
+            self._keys = set(projection) & set(schema)
         else:
-            self._keys = supported_cuba()
+            self._keys = set(schema)
+        self._projection = None if projection is None else self._keys
         self._expand_mode = len(keys) == 0
         self._cubas = None
 
@@ -88,6 +128,8 @@ class CUBADataAccumulator(object):
         """ The set of CUBA keys that this accumulator contains.
 
         """
+        if self._buffers is not None:
+            return set(self._buffers)
         if self._cubas is None:
             data = self.data
             self._cubas = set(
@@ -123,13 +165,109 @@ class CUBADataAccumulator(object):
             The data information to append.
 
         """
+        if self._buffers is not None:
+            self._append_values(data)
+            self._number_of_items += 1
+            self._finalized = False
+            return
         if self._expand_mode:
-            new_keys = set(data.keys()) - self.keys & self._keys
+            new_keys = (set(data.keys()) - self.keys) & self._keys
             self._expand(new_keys)
             self._cubas = None
         self._append(data)
         self._number_of_items += 1
 
+    def append_many(self, iterable):
+        """ Append data from a sequence of ``DataContainer`` instances.
+
+        The result is the same as calling :meth:`append` for each
+        item, but the values are stored in the vtk arrays in one step
+        per key.
+
+        Parameters
+        ----------
+        iterable : iterable
+            The DataContainers to append.
+
+        """
+        if self._buffers is not None:
+            for data in iterable:
+                self.append(data)
+            return
+        items = list(iterable)
+        if self._expand_mode:
+            present = set()
+            for data in items:
+                present.update(data.keys())
+            self._expand((present & self._keys) - self.keys)
+            self._cubas = None
+        columns = {}
+        for cuba in self.keys:
+            default = self._schema[cuba].default
+            columns[cuba] = [data.get(cuba, default) for data in items]
+        self._extend(columns, len(items))
+
+    def append_columns(self, columns):
+        """ Append the values of many items given per CUBA key.
+
+        Keys are handled in the same way as in :meth:`append`, the
+        values of keys (known to the accumulator) that are missing from
+        ``columns`` are stored using :func:`~.default_cuba_value`.
+
+        Parameters
+        ----------
+        columns : dict
+            The mapping from CUBA key to a sequence (e.g. a numpy array)
+            of values, one for each appended item.
+
+        Raises
+        ------
+        ValueError :
+            When the columns have a different number of values or
+            the shape of the values does not match the CUBA key.
+
+        """
+        lengths = set(len(values) for values in columns.itervalues())
+        if len(lengths) > 1:
+            message = 'All columns should have the same length, got {}'
+            raise ValueError(message.format(sorted(lengths)))
+        count = lengths.pop() if len(lengths) > 0 else 0
+        if self._expand_mode:
+            self._expand((set(columns) & self._keys) - self.keys)
+            self._cubas = None
+        if self._buffers is not None:
+            start = len(self)
+            self._grow(start + count)
+            for cuba, buffer in self._buffers.iteritems():
+                if cuba in columns:
+                    buffer[start:start + count] = self._column(
+                        cuba, columns[cuba], count)
+            self._number_of_items += count
+            self._finalized = False
+        else:
+            self._extend(columns, count)
+
+    def finalize(self):
+        """ Copy the values collected in ``columnar`` mode to the container.
+
+        One vtkDataArray is created per key and added to the vtk data
+        container, replacing any array with the same name that was
+        created by a previous call. In the other modes this method has
+        no effect.
+
+        """
+        if self._buffers is None or self._finalized:
+            return
+        size = len(self)
+        for cuba, buffer in self._buffers.iteritems():
+            schema = self._schema[cuba]
+            values = buffer[:size].reshape(size, schema.components)
+            array = numpy_to_vtk(
+                values, deep=1, array_type=schema.vtk_type)
+            array.SetName(cuba.name)
+            self.data.AddArray(array)
+        self._finalized = True
+
     def __len__(self):
         """ The number of values that are stored per key
 
@@ -158,6 +296,7 @@ class CUBADataAccumulator(object):
             When values for the requested CUBA key do not exist.
 
         """
+        self.finalize()
         container = self.data
         array = container.GetArray(key.name)
         if array is None:
@@ -167,23 +306,95 @@ class CUBADataAccumulator(object):
             return array
 
     def _expand(self, cubas):
+        if self._buffers is not None:
+            for cuba in cubas:
+                self._add_buffer(cuba)
+            return
         size = len(self)
         for cuba in cubas:
-            default = default_cuba_value(cuba)
-            temp = numpy.asarray(default)
-            vtk_type = get_vtk_array_type(temp.dtype)
-            array = create_vtk_array(vtk_type)
-            array.SetNumberOfComponents(temp.size)
+            schema = self._schema[cuba]
+            array = create_vtk_array(schema.vtk_type)
+            array.SetNumberOfComponents(schema.components)
             array.SetNumberOfTuples(size)
             array.SetName(cuba.name)
-            for index, value in enumerate(temp.ravel()):
+            for index, value in enumerate(schema.default.ravel()):
                 array.FillComponent(index, value)
             self.data.AddArray(array)
 
     def _append(self, data):
+        schemas = self._schema
         for cuba in self.keys:
-            default = default_cuba_value(cuba)
             array = self[cuba]
-            value = data.get(cuba, default)
+            value = data.get(cuba, schemas[cuba].default)
             temp = numpy.asarray(value)
             array.InsertNextTuple(temp.ravel())
+
+    def _extend(self, columns, count):
+        if count == 0:
+            return
+        size = len(self) + count
+        for cuba in self.keys:
+            array = self[cuba]
+            if cuba in columns:
+                values = self._column(cuba, columns[cuba], count)
+            else:
+                values = self._schema[cuba].default
+            components = array.GetNumberOfComponents()
+            # the allocated memory grows geometrically (as for
+            # InsertNextTuple), so the values are not copied on every call
+            if size * components > array.GetSize():
+                array.Resize(max(size, 2 * len(self)))
+            array.SetNumberOfTuples(size)
+            vtk_to_numpy(array).reshape(size, components)[len(self):] = \
+                numpy.reshape(values, (-1, components))
+            array.Modified()
+        self._number_of_items = size
+
+    def _column(self, cuba, values, count):
+        schema = self._schema[cuba]
+        column = numpy.asarray(values, dtype=schema.dtype)
+        if column.shape != (count,) + schema.shape:
+            message = 'Values for {} should have shape {}, got {}'
+            raise ValueError(message.format(
+                cuba.name, (count,) + schema.shape, column.shape))
+        return column
+
+    def _append_values(self, data):
+        index = self._number_of_items
+        if index == self._capacity:
+            self._grow(index + 1)
+        buffers = self._buffers
+        if self._projection is None:
+            values = data.iteritems()
+        else:
+            values = (
+                (cuba, data[cuba]) for cuba in self._projection
+                if cuba in data)
+        for cuba, value in values:
+            buffer = buffers.get(cuba)
+            if buffer is None:
+                if not (self._expand_mode and cuba in self._keys):
+                    continue
+                buffer = self._add_buffer(cuba)
+            buffer[index] = value
+
+    def _add_buffer(self, cuba):
+        schema = self._schema[cuba]
+        buffer = numpy.empty(
+            (self._capacity,) + schema.shape, dtype=schema.dtype)
+        buffer[...] = schema.default
+        self._buffers[cuba] = buffer
+        return buffer
+
+    def _grow(self, required):
+        if required <= self._capacity:
+            return
+        size = len(self)
+        while self._capacity < required:
+            self._capacity = max(2 * self._capacity, 16)
+        for cuba, buffer in self._buffers.items():
+            grown = numpy.empty(
+                (self._capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            grown[:size] = buffer[:size]
+            grown[size:] = self._schema[cuba].default
+            self._buffers[cuba] = grown
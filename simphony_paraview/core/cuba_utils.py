@@ -1,26 +1,54 @@
 import warnings
+from collections import Mapping, namedtuple
 
 import numpy
+from paraview.numpy_support import get_vtk_array_type
 from simphony.core.cuba import CUBA
 from simphony.core.keywords import KEYWORDS
 
 
+#: The storage information of a supported CUBA key.
+CUBASchema = namedtuple(
+    'CUBASchema', ['dtype', 'shape', 'components', 'default', 'vtk_type'])
+
+
+class CUBASchemaRegistry(Mapping):
+    """ Immutable mapping from the supported CUBA keys to a CUBASchema.
+
+    """
+    def __init__(self, schemas):
+        self._schemas = dict(schemas)
+
+    def __getitem__(self, cuba):
+        return self._schemas[cuba]
+
+    def __iter__(self):
+        return iter(self._schemas)
+
+    def __len__(self):
+        return len(self._schemas)
+
+
+_registry = []
+
+
+def cuba_schema():
+    """ Return the schema registry of the supported CUBA keys.
+
+    The registry is built once, on the first call, and maps each
+    supported CUBA key to a :class:`CUBASchema` with the numpy dtype,
+    the value shape, the number of components, the (read-only) default
+    value and the vtk array type used to store its values.
+
+    """
+    if len(_registry) == 0:
+        _registry.append(CUBASchemaRegistry(_create_schemas()))
+    return _registry[0]
+
+
 def supported_cuba():
     """ Return a set of currently supported CUBA keys. """
-    supported = set()
-    message = 'property {} is currently ignored'
-    for cuba in CUBA:
-        default = default_cuba_value(cuba)
-        if isinstance(default, (float, int, long)):
-            supported.add(cuba)
-        elif isinstance(default, numpy.ndarray):
-            if default.ndim > 2:
-                warnings.warn(message.format(cuba.name))
-            else:
-                supported.add(cuba)
-        else:
-            warnings.warn(message.format(cuba.name))
-    return supported
+    return set(cuba_schema())
 
 
 def default_cuba_value(cuba):
@@ -72,3 +100,26 @@ def default_cuba_value(cuba):
     else:
         message = 'property {!r} is currently ignored'
         warnings.warn(message.format(cuba))
+
+
+def _create_schemas():
+    message = 'property {} is currently ignored'
+    for cuba in CUBA:
+        default = default_cuba_value(cuba)
+        if isinstance(default, (float, int, long)):
+            pass
+        elif isinstance(default, numpy.ndarray):
+            if default.ndim > 2:
+                warnings.warn(message.format(cuba.name))
+                continue
+        else:
+            warnings.warn(message.format(cuba.name))
+            continue
+        default = numpy.asarray(default)
+        default.flags.writeable = False
+        yield cuba, CUBASchema(
+            dtype=default.dtype,
+            shape=default.shape,
+            components=default.size,
+            default=default,
+            vtk_type=get_vtk_array_type(default.dtype))
@@ -1,30 +1,86 @@
-from itertools import izip
+from array import array
+from itertools import izip, islice, chain, repeat, product
+from operator import attrgetter
 
 import numpy
 from paraview import vtk
+from paraview.numpy_support import numpy_to_vtk
 from simphony.core.cuba import CUBA
 from simphony.cuds import ABCMesh, ABCParticles, ABCLattice
 from simphony.cuds.primitive_cell import BravaisLattice
 
 from .cuba_data_accumulator import CUBADataAccumulator
+from .cell_array_builder import CellArrayBuilder
+from .uid_index import UIDIndex
 from .constants import points2edge, points2face, points2cell
+from .iterators import iter_chunks
 
 
-def cuds2vtk(cuds):
-    """ Create a vtk.Dataset from a CUDS container """
+#: The Bravais lattices that are converted into structured points.
+ORTHOGONAL_LATTICES = (
+    BravaisLattice.CUBIC, BravaisLattice.TETRAGONAL,
+    BravaisLattice.ORTHORHOMBIC)
+
+
+def cuds2vtk(cuds, preview=None, region=None, keys=None):
+    """ Create a vtk.Dataset from a CUDS container
+
+    Meshes are converted into a vtkUnstructuredGrid and particles into
+    a vtkPolyData. Lattices with an orthogonal primitive cell (cubic,
+    tetragonal and orthorhombic) are converted into a
+    vtkStructuredPoints and the other Bravais lattices into a
+    vtkStructuredGrid, so that the node connectivity is implicit.
+
+    Lattices can provide the node data in bulk instead of through
+    ``iter``. A lattice with a ``node_arrays(keys)`` method returns a
+    mapping from CUBA key to a numpy array of shape ``size +
+    value_shape`` indexed by the node index. A lattice with an
+    ``iter_node_slabs(keys)`` method yields one such mapping per k
+    layer, with arrays of shape ``size[:2] + value_shape``. In both
+    cases ``keys`` is the ``keys`` argument of this function (None for
+    all keys) and the arrays are copied into the vtk point data without
+    creating the lattice nodes.
+
+    Parameters
+    ----------
+    cuds :
+        A top level cuds object (e.g. a mesh).
+
+    preview : int
+        The approximate maximum number of items to convert. When
+        provided only a regular subsample of the container is converted:
+        every n-th particle (and the bonds between sampled particles),
+        every n-th mesh element (and the points that it uses) or every
+        n-th lattice node along each axis. Default is to convert all
+        the items.
+
+    region : BoxRegion or SphereRegion
+        Convert only the points, particles or nodes inside the region
+        and the elements or bonds that reference only such points.
+        Lattices are cropped to the block of nodes that covers the
+        region. Default is to convert the whole container.
+
+    keys : iterable
+        The CUBA keys of the item data to convert. The values of any
+        other keys are not read from the data containers. Default is to
+        convert all the supported CUBA keys.
+
+    """
+    if preview is not None and preview < 1:
+        message = 'The preview budget should be positive, got {}'
+        raise ValueError(message.format(preview))
 
     if isinstance(cuds, ABCMesh):
-        data_set = _mesh2unstructured_grid(cuds)
+        data_set = _mesh2unstructured_grid(cuds, preview, region, keys)
     elif isinstance(cuds, ABCParticles):
-        data_set = _particles2poly_data(cuds)
+        data_set = _particles2poly_data(cuds, preview, region, keys)
     elif isinstance(cuds, ABCLattice):
         lattice_type = cuds.primitive_cell.bravais_lattice
-        if lattice_type in (
-                BravaisLattice.CUBIC, BravaisLattice.TETRAGONAL,
-                BravaisLattice.ORTHORHOMBIC):
-            data_set = _lattice2structured_points(cuds)
+        if lattice_type in ORTHOGONAL_LATTICES:
+            data_set = _lattice2structured_points(
+                cuds, preview, region, keys)
         else:
-            data_set = _lattice2poly_data(cuds)
+            data_set = _lattice2structured_grid(cuds, preview, region, keys)
     else:
         msg = 'Provided object {} is not of any known cuds container types'
         raise TypeError(msg.format(type(cuds)))
@@ -32,36 +88,65 @@ def cuds2vtk(cuds):
     return data_set
 
 
-def _particles2poly_data(cuds):
-    particle2index = {}
-    points = vtk.vtkPoints()
-    lines = vtk.vtkCellArray()
+def _particles2poly_data(cuds, preview=None, region=None, keys=None):
+    particle2index = UIDIndex()
+    coordinates = array('f')
     poly_data = vtk.vtkPolyData()
+    step = _step(cuds.count_of(CUBA.PARTICLE), preview)
+
+    # copy particles
+    data_collector = CUBADataAccumulator(
+        container=poly_data.GetPointData(),
+        size=_sampled(cuds.count_of(CUBA.PARTICLE), step), projection=keys)
+    particles = islice(cuds.iter(item_type=CUBA.PARTICLE), 0, None, step)
+    for particles in iter_chunks(particles):
+        particles = _inside(particles, region)
+        particle2index.extend(particle.uid for particle in particles)
+        for particle in particles:
+            coordinates.extend(particle.coordinates)
+            data_collector.append(particle.data)
+    data_collector.finalize()
+
+    # copy bonds
+    builder = CellArrayBuilder(particle2index)
+    data_collector = CUBADataAccumulator(
+        container=poly_data.GetCellData(),
+        size=_sampled(cuds.count_of(CUBA.BOND), step), projection=keys)
+    for bonds in iter_chunks(cuds.iter(item_type=CUBA.BOND)):
+        if step > 1 or region is not None:
+            bonds = _referencing(
+                bonds, attrgetter('particles'), particle2index)
+        builder.extend([bond.particles for bond in bonds])
+        for bond in bonds:
+            data_collector.append(bond.data)
+    data_collector.finalize()
 
-    point_data = poly_data.GetPointData()
-    data_collector = CUBADataAccumulator(container=point_data)
-    for index, particle in enumerate(cuds.iter(item_type=CUBA.PARTICLE)):
-        particle2index[particle.uid] = index
-        points.InsertPoint(index, *particle.coordinates)
-        data_collector.append(particle.data)
-
-    cell_data = poly_data.GetCellData()
-    data_collector = CUBADataAccumulator(container=cell_data)
-    for bond in cuds.iter(item_type=CUBA.BOND):
-        lines.InsertNextCell(len(bond.particles))
-        for uuid in bond.particles:
-            lines.InsertCellPoint(particle2index[uuid])
-        data_collector.append(bond.data)
-
-    poly_data.SetPoints(points)
-    poly_data.SetLines(lines)
+    poly_data.SetPoints(_coordinates2points(coordinates))
+    poly_data.SetLines(builder.cell_array())
     return poly_data
 
 
-def _lattice2structured_points(cuds):
-    origin = cuds.origin
-    size = cuds.size
+def _lattice2structured_points(cuds, preview=None, region=None, keys=None):
+    origin = numpy.asarray(cuds.origin, dtype=float)
+    lengths = lattice_spacing(cuds)
+    first, last = lattice_block(cuds, region)
+    stride = _lattice_stride(numpy.maximum(last - first + 1, 0), preview)
+    dimensions = [
+        len(range(start, stop + 1, stride))
+        for start, stop in zip(first, last)]
 
+    structured_points = vtk.vtkStructuredPoints()
+    structured_points.SetSpacing(tuple(stride * lengths))
+    structured_points.SetOrigin(tuple(origin + first * lengths))
+    structured_points.SetExtent(
+        0, dimensions[0] - 1, 0, dimensions[1] - 1, 0, dimensions[2] - 1)
+    lattice_point_data(
+        cuds, structured_points.GetPointData(), first, last, stride, keys)
+    return structured_points
+
+
+def lattice_spacing(cuds):
+    """ The node spacing along each axis of an orthogonal lattice. """
     primitive_cell = cuds.primitive_cell
     p1, p2, p3 = primitive_cell.p1, primitive_cell.p2, primitive_cell.p3
 
@@ -69,87 +154,318 @@ def _lattice2structured_points(cuds):
         '''length of a vector'''
         return numpy.sqrt(numpy.dot(vector, vector))
 
-    spacing = tuple(map(vector_length, (p1, p2, p3)))
+    return numpy.array(map(vector_length, (p1, p2, p3)))
 
-    structured_points = vtk.vtkStructuredPoints()
-    structured_points.SetSpacing(spacing)
-    structured_points.SetOrigin(origin)
-    structured_points.SetExtent(0, size[0] - 1, 0, size[1] - 1, 0, size[2] - 1)
-
-    y, z, x = numpy.meshgrid(
-        range(size[1]), range(size[2]), range(size[0]))
-    indices = izip(x.ravel(), y.ravel(), z.ravel())
-    point_data = structured_points.GetPointData()
-    data_collector = CUBADataAccumulator(container=point_data)
-    for node in cuds.iter(indices):
-        data_collector.append(node.data)
 
-    return structured_points
+def lattice_block(cuds, region=None):
+    """ The first and last node index of the block of an orthogonal
+    lattice that covers the region (or the whole lattice).
 
+    The block is empty (``last < first`` along every axis) when the
+    region does not cover any node of the lattice.
 
-def _lattice2poly_data(cuds):
-    poly_data = vtk.vtkPolyData()
-    points = vtk.vtkPoints()
-    coordinates = cuds.get_coordinate
+    """
+    size = numpy.array(cuds.size)
+    if region is None:
+        return numpy.zeros(3, dtype=int), size - 1
+    # nodes on the boundary are inside the region
+    origin = numpy.asarray(cuds.origin, dtype=float)
+    lengths = lattice_spacing(cuds)
+    lower, upper = region.bounds
+    first = numpy.maximum(
+        numpy.ceil((lower - origin) / lengths - 1e-9).astype(int), 0)
+    last = numpy.minimum(
+        numpy.floor((upper - origin) / lengths + 1e-9).astype(int), size - 1)
+    if numpy.any(last < first):
+        last = first - 1
+    return first, last
+
+
+def lattice_point_data(cuds, point_data, first, last, stride=1, keys=None):
+    """ Copy the data of the block of lattice nodes between the
+    ``first`` and ``last`` indices into the vtk point data.
+
+    The nodes are stored in vtk (x first) order.
+
+    """
+    ranges = [
+        range(start, stop + 1, stride) for start, stop in zip(first, last)]
+    data_collector = CUBADataAccumulator(
+        container=point_data,
+        size=numpy.prod([len(indices) for indices in ranges]),
+        projection=keys)
+    columns = _lattice_columns(cuds, first, last, stride, keys)
+    if columns is None:
+        for node in cuds.iter(_lattice_indices(ranges)):
+            data_collector.append(node.data)
+    else:
+        for chunk in columns:
+            data_collector.append_columns(chunk)
+    data_collector.finalize()
+
+
+def _lattice2structured_grid(cuds, preview=None, region=None, keys=None):
+    structured_grid = vtk.vtkStructuredGrid()
+    stride = _lattice_stride(cuds.size, preview)
+    if region is None:
+        indices = _lattice_index_array(
+            [range(0, length, stride) for length in cuds.size])
+        coordinates = _lattice_coordinates(cuds, indices)
+        first, last = numpy.zeros(3, dtype=int), numpy.array(cuds.size) - 1
+        dimensions = [_sampled(length, stride) for length in cuds.size]
+    else:
+        # only the sampled nodes of the block that covers the bounding
+        # box of the region are tested
+        lower, upper = _lattice_index_bounds(cuds, region)
+        indices = _lattice_index_array([
+            range(start + (-start % stride), stop + 1, stride)
+            for start, stop in zip(lower, upper)])
+        coordinates = _lattice_coordinates(cuds, indices)
+        # keep the block of nodes that encloses the nodes in the region
+        selected = indices[region.contains(coordinates)]
+        if len(selected) == 0:
+            # an empty block, as for structured points
+            first = numpy.zeros(3, dtype=int)
+            last = first - 1
+            dimensions = [0, 0, 0]
+        else:
+            first, last = selected.min(axis=0), selected.max(axis=0)
+            dimensions = list((last - first) // stride + 1)
+        block = numpy.all((indices >= first) & (indices <= last), axis=1)
+        indices, coordinates = indices[block], coordinates[block]
+    structured_grid.SetDimensions(dimensions)
 
     # copy node data
-    point_data = poly_data.GetPointData()
-    data_collector = CUBADataAccumulator(container=point_data)
-    for node in cuds.iter(item_type=CUBA.NODE):
-        points.InsertNextPoint(coordinates(node.index))
-        data_collector.append(node.data)
+    point_data = structured_grid.GetPointData()
+    data_collector = CUBADataAccumulator(
+        container=point_data, size=len(indices), projection=keys)
+    columns = _lattice_columns(cuds, first, last, stride, keys)
+    if columns is None:
+        data_collector.append_many(
+            node.data for node in cuds.iter(izip(*indices.T)))
+    else:
+        for chunk in columns:
+            data_collector.append_columns(chunk)
+    data_collector.finalize()
 
-    poly_data.SetPoints(points)
-    return poly_data
+    structured_grid.SetPoints(_coordinates2points(
+        numpy.ascontiguousarray(coordinates, dtype=numpy.float32)))
+    return structured_grid
 
 
-def _mesh2unstructured_grid(cuds):
-    point2index = {}
+def _mesh2unstructured_grid(cuds, preview=None, region=None, keys=None):
+    point2index = UIDIndex()
     unstructured_grid = vtk.vtkUnstructuredGrid()
     unstructured_grid.Allocate()
+    element_types = (CUBA.EDGE, CUBA.FACE, CUBA.CELL)
+    number_of_elements = sum(
+        cuds.count_of(item_type) for item_type in element_types)
+    step = _step(number_of_elements, preview)
+    if step == 1:
+        elements = dict(
+            (item_type, cuds.iter(item_type=item_type))
+            for item_type in element_types)
+        points = cuds.iter(item_type=CUBA.POINT)
+        number_of_points = cuds.count_of(CUBA.POINT)
+    else:
+        elements = _sample_elements(cuds, element_types, step)
+        used = set(
+            uid for items in elements.itervalues()
+            for item in items for uid in item.points)
+        points = (
+            point for point in cuds.iter(item_type=CUBA.POINT)
+            if point.uid in used)
+        number_of_points = len(used)
+        number_of_elements = sum(len(items) for items in elements.values())
 
     # copy points
-    points = vtk.vtkPoints()
+    coordinates = array('f')
     point_data = unstructured_grid.GetPointData()
-    data_collector = CUBADataAccumulator(container=point_data)
-    for index, point in enumerate(cuds.iter(item_type=CUBA.POINT)):
-        point2index[point.uid] = index
-        points.InsertNextPoint(*point.coordinates)
-        data_collector.append(point.data)
+    data_collector = CUBADataAccumulator(
+        container=point_data, size=number_of_points, projection=keys)
+    for chunk in iter_chunks(points):
+        chunk = _inside(chunk, region)
+        point2index.extend(point.uid for point in chunk)
+        for point in chunk:
+            coordinates.extend(point.coordinates)
+            data_collector.append(point.data)
+    data_collector.finalize()
 
     # prepare to copy elements
     cell_data = unstructured_grid.GetCellData()
-    data_collector = CUBADataAccumulator(container=cell_data)
-
-    # copy edges
-    mapping = points2edge()
-    for edge in cuds.iter(item_type=CUBA.EDGE):
-        npoints = len(edge.points)
-        ids = vtk.vtkIdList()
-        for uid in edge.points:
-            ids.InsertNextId(point2index[uid])
-        unstructured_grid.InsertNextCell(mapping[npoints], ids)
-        data_collector.append(edge.data)
-
-    # copy faces
-    mapping = points2face()
-    for face in cuds.iter(item_type=CUBA.FACE):
-        npoints = len(face.points)
-        ids = vtk.vtkIdList()
-        for uid in face.points:
-            ids.InsertNextId(point2index[uid])
-        unstructured_grid.InsertNextCell(mapping[npoints], ids)
-        data_collector.append(face.data)
-
-    # copy cells
-    mapping = points2cell()
-    for cell in cuds.iter(item_type=CUBA.CELL):
-        npoints = len(cell.points)
-        ids = vtk.vtkIdList()
-        for uid in cell.points:
-            ids.InsertNextId(point2index[uid])
-        unstructured_grid.InsertNextCell(mapping[npoints], ids)
-        data_collector.append(cell.data)
-
-    unstructured_grid.SetPoints(points)
+    data_collector = CUBADataAccumulator(
+        container=cell_data, size=number_of_elements, projection=keys)
+
+    # copy edges, faces and cells
+    builder = CellArrayBuilder(point2index)
+    for item_type, mapping in (
+            (CUBA.EDGE, points2edge()),
+            (CUBA.FACE, points2face()),
+            (CUBA.CELL, points2cell())):
+        for chunk in iter_chunks(elements[item_type]):
+            if region is not None:
+                chunk = _referencing(chunk, attrgetter('points'), point2index)
+            builder.extend([element.points for element in chunk], mapping)
+            for element in chunk:
+                data_collector.append(element.data)
+    builder.install(unstructured_grid)
+    data_collector.finalize()
+
+    unstructured_grid.SetPoints(_coordinates2points(coordinates))
     return unstructured_grid
+
+
+def _step(count, preview):
+    """ The sampling step that reduces ``count`` items to ``preview``. """
+    if preview is None or count <= preview:
+        return 1
+    return -(-count // preview)
+
+
+def _sampled(count, step):
+    """ The number of items left when sampling every ``step`` item. """
+    return -(-count // step)
+
+
+def _lattice_stride(size, preview):
+    """ The smallest node stride that fits the lattice in ``preview``. """
+    stride = 1
+    if preview is not None:
+        while numpy.prod(
+                [_sampled(length, stride) for length in size]) > preview:
+            stride += 1
+    return stride
+
+
+def _lattice_indices(ranges):
+    """ Iterate over the lattice indices in vtk (x first) order. """
+    return izip(*_lattice_index_array(ranges).T)
+
+
+def _lattice_index_array(ranges):
+    """ The (N, 3) array of lattice indices in vtk (x first) order. """
+    y, z, x = numpy.meshgrid(ranges[1], ranges[2], ranges[0])
+    return numpy.column_stack([x.ravel(), y.ravel(), z.ravel()])
+
+
+def _lattice_index_bounds(cuds, region):
+    """ The first and last node index of the block of a lattice that
+    covers the bounding box of the region.
+
+    The corners of the bounding box are mapped to (fractional) node
+    indices with the inverse of the primitive cell vectors.
+
+    """
+    cell = cuds.primitive_cell
+    vectors = numpy.array([cell.p1, cell.p2, cell.p3], dtype=float)
+    lower, upper = region.bounds
+    corners = numpy.array(list(product(*zip(lower, upper))), dtype=float)
+    # the pseudo inverse also maps the nodes of planar lattices
+    indices = numpy.dot(
+        corners - numpy.asarray(cuds.origin, dtype=float),
+        numpy.linalg.pinv(vectors))
+    first = numpy.maximum(
+        numpy.floor(indices.min(axis=0)).astype(int), 0)
+    last = numpy.minimum(
+        numpy.ceil(indices.max(axis=0)).astype(int),
+        numpy.array(cuds.size) - 1)
+    return first, last
+
+
+def _lattice_coordinates(cuds, indices):
+    """ The coordinates of the lattice nodes at the (N, 3) indices. """
+    cell = cuds.primitive_cell
+    vectors = numpy.array([cell.p1, cell.p2, cell.p3], dtype=float)
+    return numpy.asarray(cuds.origin, dtype=float) + numpy.dot(
+        indices, vectors)
+
+
+def _lattice_columns(cuds, first, last, stride, keys):
+    """ Iterate over the node data columns that the lattice provides in
+    bulk (see :func:`cuds2vtk`) for the block of nodes between the
+    ``first`` and ``last`` indices.
+
+    The columns are in vtk (x first) order. Returns None when the
+    lattice does not provide its node data in bulk.
+
+    """
+    # a negative stop would wrap around to the end of the axis
+    slices = tuple(
+        slice(start, max(stop + 1, start), stride)
+        for start, stop in zip(first, last))
+    if hasattr(cuds, 'node_arrays'):
+        arrays = cuds.node_arrays(keys)
+        return [dict(
+            (cuba, _x_first(values[slices], 3))
+            for cuba, values in arrays.iteritems())]
+    elif hasattr(cuds, 'iter_node_slabs'):
+        return _slab_columns(cuds.iter_node_slabs(keys), slices)
+    else:
+        return None
+
+
+def _slab_columns(slabs, slices):
+    """ Iterate over the node data columns of the selected k layers. """
+    layers = slices[2]
+    for k, slab in enumerate(slabs):
+        if k >= layers.stop:
+            return
+        if k >= layers.start and (k - layers.start) % layers.step == 0:
+            yield dict(
+                (cuba, _x_first(values[slices[:2]], 2))
+                for cuba, values in slab.iteritems())
+
+
+def _x_first(values, axes):
+    """ Flatten the first ``axes`` (index) axes of the node values so
+    that the first index varies fastest.
+
+    """
+    values = numpy.asarray(values)
+    order = range(axes)[::-1] + range(axes, values.ndim)
+    return values.transpose(order).reshape(
+        (-1,) + values.shape[axes:])
+
+
+def _inside(items, region):
+    """ Return the items with coordinates inside the region. """
+    if region is None or len(items) == 0:
+        return items
+    inside = region.contains([item.coordinates for item in items])
+    return [item for item, keep in izip(items, inside) if keep]
+
+
+def _referencing(items, links, index):
+    """ Return the items whose linked uids are all part of the index. """
+    if len(items) == 0:
+        return items
+    sizes = [len(links(item)) for item in items]
+    found = index.find([uid for item in items for uid in links(item)]) >= 0
+    missing = numpy.bincount(
+        numpy.repeat(numpy.arange(len(items)), sizes),
+        weights=~found, minlength=len(items))
+    return [item for item, count in izip(items, missing) if count == 0]
+
+
+def _sample_elements(cuds, element_types, step):
+    """ Return every ``step`` element of the mesh grouped by item type. """
+    elements = chain.from_iterable(
+        izip(repeat(item_type), cuds.iter(item_type=item_type))
+        for item_type in element_types)
+    sampled = dict((item_type, []) for item_type in element_types)
+    for item_type, element in islice(elements, 0, None, step):
+        sampled[item_type].append(element)
+    return sampled
+
+
+def _coordinates2points(coordinates):
+    """ Create a vtkPoints instance from a single precision buffer.
+
+    The coordinates are copied in one call, the resulting vtkPoints
+    has the same (float) data type as a default constructed instance.
+
+    """
+    values = numpy.frombuffer(coordinates, dtype=numpy.float32)
+    points = vtk.vtkPoints()
+    points.SetData(numpy_to_vtk(values.reshape(-1, 3), deep=1))
+    return points
@@ -0,0 +1,566 @@
+from collections import OrderedDict
+from itertools import chain
+
+import numpy
+from paraview import vtk
+from paraview.numpy_support import create_vtk_array, vtk_to_numpy
+from simphony.core.cuba import CUBA
+from simphony.cuds import ABCMesh, ABCParticles, Edge, Face, Cell
+
+from .cuba_data_accumulator import CUBADataAccumulator
+from .cuba_utils import cuba_schema
+from .cell_array_builder import (
+    ID_TYPE, cell_locations, create_cell_array, legacy_cells, set_cells)
+from .constants import points2edge, points2face, points2cell
+from .iterators import iter_chunks
+from .uid_index import UIDIndex
+
+
+class IncrementalConverter(object):
+    """ Keep the vtk dataset of a Particles or Mesh container up to date.
+
+    The converter creates the vtk dataset once and then applies the
+    changes of the container in place. Items that are modified have
+    their coordinates and attribute tuples overwritten, new items are
+    appended and removed items are replaced by the last items of the
+    dataset, so that the cost of an update depends on the number of
+    changed items rather than on the size of the container.
+
+    >>> converter = IncrementalConverter(particles)
+    >>> particles.update(moved_particles)
+    >>> particles.remove(lost_uids)
+    >>> converter.update(
+    ...     changed=[particle.uid for particle in moved_particles],
+    ...     removed=lost_uids)
+    >>> snapshot(particles, 'step.png', converter=converter)
+
+    .. note:: The order of the items in the vtk dataset is not kept
+       when items are removed. New elements are appended to the vtk
+       cell arrays in place and removed elements are overwritten by
+       the last elements when they have the same number of points.
+       Otherwise, and when elements change their number of points, the
+       vtk cell arrays are replaced with a single vectorized copy.
+
+    """
+    def __init__(self, cuds):
+        """ Constructor
+
+        Parameters
+        ----------
+        cuds : ABCMesh or ABCParticles
+            The container to convert.
+
+        Raises
+        ------
+        TypeError :
+            When the container is not a mesh or particles container.
+
+        """
+        if isinstance(cuds, ABCMesh):
+            self._point_type = CUBA.POINT
+            self._element_types = (CUBA.EDGE, CUBA.FACE, CUBA.CELL)
+            self.data_set = vtk.vtkUnstructuredGrid()
+        elif isinstance(cuds, ABCParticles):
+            self._point_type = CUBA.PARTICLE
+            self._element_types = (CUBA.BOND,)
+            self.data_set = vtk.vtkPolyData()
+        else:
+            message = 'Provided object {} is not a mesh or particles container'
+            raise TypeError(message.format(type(cuds)))
+        self.cuds = cuds
+        self._points = _ItemTable(self.data_set.GetPointData())
+        self._elements = _ItemTable(self.data_set.GetCellData())
+        self._mappings = (
+            (Edge, points2edge()), (Face, points2face()),
+            (Cell, points2cell()))
+        self._sizes = _Column(ID_TYPE)
+        self._connectivity = _Column(ID_TYPE)
+        self._types = _Column(numpy.uint8)
+        # the number of element points that refer to each point
+        self._uses = _Column(ID_TYPE)
+        self._offsets = None
+        self._cells_stale = True
+
+        points = vtk.vtkPoints()
+        points.SetNumberOfPoints(0)
+        self.data_set.SetPoints(points)
+        for items in iter_chunks(cuds.iter(item_type=self._point_type)):
+            self._store_points(items, new=True)
+        for item_type in self._element_types:
+            for items in iter_chunks(cuds.iter(item_type=item_type)):
+                self._store_elements(items, new=True)
+        self._install_cells()
+
+    def update(self, changed=(), removed=()):
+        """ Apply the changes of the container to the vtk dataset.
+
+        Parameters
+        ----------
+        changed : iterable
+            The uids of the items that have been added or modified
+            since the last update.
+
+        removed : iterable
+            The uids of the items that have been removed since the last
+            update.
+
+        Returns
+        -------
+        data_set : vtkDataSet
+            The updated vtk dataset.
+
+        Raises
+        ------
+        KeyError :
+            When a removed uid was never converted.
+
+        ValueError :
+            When a removed point is still used by an element.
+
+        """
+        removed = list(OrderedDict.fromkeys(removed))
+        changed = list(OrderedDict.fromkeys(changed))
+        removed_points = []
+        if len(removed) > 0:
+            in_elements = self._elements.index.find(removed) >= 0
+            elements = [
+                uid for uid, found in zip(removed, in_elements) if found]
+            removed_points = [
+                uid for uid, found in zip(removed, in_elements) if not found]
+            # fail on unknown uids before the dataset is modified
+            self._points.index.indices(removed_points)
+            if len(elements) > 0:
+                self._remove_elements(elements)
+
+        items = [self.cuds.get(uid) for uid in changed]
+        points = [item for item in items if hasattr(item, 'coordinates')]
+        elements = [item for item in items if not hasattr(item, 'coordinates')]
+        if len(points) > 0:
+            self._store_points(points)
+        if len(elements) > 0:
+            self._store_elements(elements)
+
+        # points are removed last, when the changed elements no longer
+        # refer to them
+        if len(removed_points) > 0:
+            self._remove_points(removed_points)
+
+        self._install_cells()
+        self.data_set.GetPoints().Modified()
+        self.data_set.Modified()
+        return self.data_set
+
+    def _store_points(self, items, new=False):
+        """ Store the coordinates and data of points or particles.
+
+        """
+        rows = self._points.update(
+            [item.uid for item in items], [item.data for item in items],
+            new=new)
+        self._uses.extend(numpy.zeros(
+            len(self._points) - len(self._uses), dtype=ID_TYPE))
+        points = self.data_set.GetPoints()
+        _reserve(points.GetData(), len(self._points))
+        coordinates = numpy.array(
+            [item.coordinates for item in items],
+            dtype=numpy.float64).reshape(-1, 3)
+        _as_rows(points.GetData())[rows] = coordinates
+
+    def _store_elements(self, items, new=False):
+        """ Store the connectivity and data of elements or bonds.
+
+        """
+        count = len(self._elements)
+        rows = self._elements.update(
+            [item.uid for item in items], [item.data for item in items],
+            new=new)
+        elements = [self._points_of(item) for item in items]
+        sizes = numpy.fromiter(
+            (len(points) for points in elements),
+            dtype=ID_TYPE, count=len(elements))
+        connectivity = self._points.index.indices(
+            chain.from_iterable(elements)).astype(ID_TYPE)
+        types = numpy.array(
+            [self._cell_type(item, size) for item, size in zip(items, sizes)],
+            dtype=numpy.uint8)
+
+        existing = rows < count
+        old_sizes = self._sizes.values
+        old_types = self._types.values
+        if (old_sizes[rows[existing]] == sizes[existing]).all() and (
+                old_types[rows[existing]] == types[existing]).all():
+            # connectivity of existing elements is overwritten in place
+            item_mask = numpy.repeat(existing, sizes)
+            numpy.add.at(self._uses.values, connectivity, 1)
+            if existing.any():
+                positions = _ranges(
+                    self._element_offsets()[rows[existing]], sizes[existing])
+                numpy.subtract.at(
+                    self._uses.values, self._connectivity.values[positions], 1)
+                self._connectivity.values[positions] = connectivity[item_mask]
+                self._update_cells(rows[existing], connectivity[item_mask])
+            added = ~existing
+            if added.any():
+                self._append_elements(
+                    sizes[added], connectivity[~item_mask], types[added])
+            return
+
+        all_sizes = numpy.zeros(len(self._elements), dtype=ID_TYPE)
+        all_sizes[:count] = old_sizes
+        all_sizes[rows] = sizes
+        unchanged = numpy.ones(len(self._elements), dtype=bool)
+        unchanged[rows] = False
+        unchanged = numpy.flatnonzero(unchanged)
+        offsets = numpy.cumsum(all_sizes) - all_sizes
+        all_connectivity = numpy.empty(all_sizes.sum(), dtype=ID_TYPE)
+        all_connectivity[_ranges(offsets[unchanged], all_sizes[unchanged])] = \
+            self._connectivity.values[_ranges(
+                self._element_offsets()[unchanged], old_sizes[unchanged])]
+        all_connectivity[_ranges(offsets[rows], sizes)] = connectivity
+        all_types = numpy.zeros(len(self._elements), dtype=numpy.uint8)
+        all_types[:count] = old_types
+        all_types[rows] = types
+        self._sizes.assign(all_sizes)
+        self._types.assign(all_types)
+        self._connectivity.assign(all_connectivity)
+        self._uses.assign(numpy.bincount(
+            all_connectivity, minlength=len(self._points)))
+        self._offsets = None
+        self._cells_stale = True
+
+    def _append_elements(self, sizes, connectivity, types):
+        """ Append new elements at the end of the connectivity and of
+        the vtk cell arrays.
+
+        """
+        start = len(self._connectivity)
+        if self._offsets is not None:
+            self._offsets.extend(start + numpy.cumsum(sizes) - sizes)
+        self._sizes.extend(sizes)
+        self._types.extend(types)
+        self._connectivity.extend(connectivity)
+        if self._cells_stale:
+            # the cell arrays will be replaced anyway
+            return
+        cells = self._cell_array()
+        data = cells.GetData()
+        size = data.GetNumberOfTuples()
+        _reserve(data, size + len(sizes) + len(connectivity))
+        vtk_to_numpy(data)[size:] = legacy_cells(sizes, connectivity)
+        if self._element_types != (CUBA.BOND,):
+            cell_types = self.data_set.GetCellTypesArray()
+            locations = self.data_set.GetCellLocationsArray()
+            count = cell_types.GetNumberOfTuples()
+            _reserve(cell_types, count + len(sizes))
+            vtk_to_numpy(cell_types)[count:] = types
+            _reserve(locations, count + len(sizes))
+            vtk_to_numpy(locations)[count:] = size + cell_locations(sizes)
+        self._set_number_of_cells()
+
+    def _remove_elements(self, uids):
+        rows = self._elements.index.indices(uids)
+        sizes = self._sizes.values
+        offsets = self._element_offsets()
+        connectivity = self._connectivity.values
+        numpy.subtract.at(
+            self._uses.values,
+            connectivity[_ranges(offsets[rows], sizes[rows])], 1)
+        sources, targets = self._elements.remove(uids)
+        count = len(self._elements)
+        if (sizes[sources] != sizes[targets]).any():
+            # the moved elements do not fit, the connectivity is rebuilt
+            rows = numpy.arange(count)
+            rows[targets] = sources
+            self._connectivity.assign(
+                connectivity[_ranges(offsets[rows], sizes[rows])])
+            self._sizes.assign(sizes[rows])
+            self._types.assign(self._types.values[rows])
+            self._offsets = None
+            self._cells_stale = True
+            return
+
+        # the last elements are moved into the rows of the removed ones
+        moved = connectivity[_ranges(offsets[sources], sizes[sources])]
+        connectivity[_ranges(offsets[targets], sizes[targets])] = moved
+        self._types.values[targets] = self._types.values[sources]
+        end = offsets[count]
+        self._connectivity.truncate(end)
+        self._sizes.truncate(count)
+        self._types.truncate(count)
+        self._offsets.truncate(count)
+        if self._cells_stale:
+            return
+        data = self._cell_array().GetData()
+        # in the legacy layout every cell is prefixed by its size
+        vtk_to_numpy(data)[_ranges(
+            offsets[targets] + targets + 1, sizes[targets])] = moved
+        data.SetNumberOfTuples(end + count)
+        if self._element_types != (CUBA.BOND,):
+            cell_types = self.data_set.GetCellTypesArray()
+            vtk_to_numpy(cell_types)[targets] = self._types.values[targets]
+            cell_types.SetNumberOfTuples(count)
+            self.data_set.GetCellLocationsArray().SetNumberOfTuples(count)
+        self._set_number_of_cells()
+
+    def _remove_points(self, uids):
+        indices = self._points.index.indices(uids)
+        used = self._uses.values[indices] > 0
+        if used.any():
+            message = '{} removed point(s) are still used by elements'
+            raise ValueError(message.format(used.sum()))
+        sources, targets = self._points.remove(uids)
+        count = len(self._points)
+        points = self.data_set.GetPoints()
+        coordinates = _as_rows(points.GetData())
+        coordinates[targets] = coordinates[sources]
+        points.SetNumberOfPoints(count)
+        uses = self._uses.values
+        moved = uses[sources] > 0
+        uses[targets] = uses[sources]
+        self._uses.truncate(count)
+        if not moved.any():
+            return
+
+        # only the moved points that are used by elements are beyond the
+        # remaining points
+        connectivity = self._connectivity.values
+        positions = numpy.flatnonzero(connectivity >= count)
+        new_indices = numpy.empty(len(uses) - count, dtype=ID_TYPE)
+        new_indices[sources - count] = targets
+        connectivity[positions] = new_indices[connectivity[positions] - count]
+        if self._cells_stale:
+            return
+        rows = numpy.searchsorted(
+            self._element_offsets(), positions, side='right') - 1
+        cells = self._cell_array()
+        vtk_to_numpy(cells.GetData())[positions + rows + 1] = \
+            connectivity[positions]
+        cells.Modified()
+
+    def _set_number_of_cells(self):
+        """ Install the vtk cell arrays after their size has changed.
+
+        """
+        cells = self._cell_array()
+        data = cells.GetData()
+        # vtkCellArray.SetCells ignores the array that it already holds,
+        # so an empty array is set first to update the number of cells
+        cells.SetCells(0, vtk.vtkIdTypeArray())
+        cells.SetCells(len(self._sizes), data)
+        if self._element_types == (CUBA.BOND,):
+            # drop the cell map of the poly data, it is rebuilt on demand
+            self.data_set.DeleteCells()
+        else:
+            self.data_set.SetCells(
+                self.data_set.GetCellTypesArray(),
+                self.data_set.GetCellLocationsArray(), cells)
+        self.data_set.Modified()
+
+    def _install_cells(self):
+        if not self._cells_stale:
+            return
+        sizes, connectivity = self._sizes.values, self._connectivity.values
+        if self._element_types == (CUBA.BOND,):
+            self.data_set.SetLines(create_cell_array(sizes, connectivity))
+            self.data_set.DeleteCells()
+        else:
+            set_cells(self.data_set, sizes, connectivity, self._types.values)
+        self._cells_stale = False
+
+    def _update_cells(self, rows, connectivity):
+        """ Overwrite the point ids of same sized cells in the vtk cell
+        array.
+
+        """
+        if self._cells_stale:
+            # the cell arrays will be replaced anyway
+            return
+        cells = self._cell_array()
+        sizes = self._sizes.values[rows]
+        # in the legacy layout every cell is prefixed by its size
+        positions = _ranges(self._element_offsets()[rows] + rows + 1, sizes)
+        vtk_to_numpy(cells.GetData())[positions] = connectivity
+        cells.Modified()
+
+    def _element_offsets(self):
+        if self._offsets is None:
+            sizes = self._sizes.values
+            self._offsets = _Column(ID_TYPE)
+            self._offsets.extend(numpy.cumsum(sizes) - sizes)
+        return self._offsets.values
+
+    def _cell_array(self):
+        if self._element_types == (CUBA.BOND,):
+            return self.data_set.GetLines()
+        else:
+            return self.data_set.GetCells()
+
+    def _points_of(self, item):
+        if self._point_type == CUBA.PARTICLE:
+            return item.particles
+        else:
+            return item.points
+
+    def _cell_type(self, item, size):
+        for kind, mapping in self._mappings:
+            if isinstance(item, kind):
+                return mapping[int(size)]
+        return 0
+
+
+class _ItemTable(object):
+    """ The uid index and the CUBA attribute arrays of a group of items.
+
+    """
+    def __init__(self, container):
+        self.index = UIDIndex()
+        self.data = container
+        self._schema = cuba_schema()
+
+    def __len__(self):
+        return len(self.index)
+
+    def update(self, uids, data, new=False):
+        """ Store the data of the items, appending the new ones.
+
+        When ``new`` is true the items are known not to be stored yet
+        and the lookup of their uids is skipped.
+
+        Returns the row of each item.
+
+        """
+        if new:
+            rows = numpy.arange(len(self.index), len(self.index) + len(uids))
+            added = numpy.ones(len(uids), dtype=bool)
+        else:
+            rows = self.index.find(uids)
+            added = rows < 0
+        if added.any():
+            start = len(self.index)
+            self.index.extend(
+                uid for uid, is_new in zip(uids, added) if is_new)
+            rows[added] = numpy.arange(start, len(self.index))
+            for index in range(self.data.GetNumberOfArrays()):
+                array = self.data.GetArray(index)
+                _reserve(array, len(self.index))
+                _as_rows(array)[start:] = self._schema[
+                    CUBA[array.GetName()]].default.ravel()
+        accumulator = CUBADataAccumulator(size=len(data))
+        accumulator.append_many(data)
+        accumulator.finalize()
+        values = accumulator.data
+        updated = set()
+        for index in range(values.GetNumberOfArrays()):
+            source = values.GetArray(index)
+            name = source.GetName()
+            target = self.data.GetArray(name)
+            if target is None:
+                target = self._add_array(CUBA[name])
+            _as_rows(target)[rows] = _as_rows(source)
+            target.Modified()
+            updated.add(name)
+        for index in range(self.data.GetNumberOfArrays()):
+            target = self.data.GetArray(index)
+            name = target.GetName()
+            if name not in updated:
+                _as_rows(target)[rows] = self._schema[
+                    CUBA[name]].default.ravel()
+                target.Modified()
+        return rows
+
+    def remove(self, uids):
+        """ Remove the rows of the items.
+
+        The last rows are moved into the rows of the removed items (see
+        :meth:`UIDIndex.remove`). Returns the previous and the new row
+        of the moved items.
+
+        """
+        sources, targets = self.index.remove(uids)
+        for index in range(self.data.GetNumberOfArrays()):
+            array = self.data.GetArray(index)
+            values = _as_rows(array)
+            values[targets] = values[sources]
+            array.SetNumberOfTuples(len(self.index))
+            array.Modified()
+        return sources, targets
+
+    def _add_array(self, cuba):
+        schema = self._schema[cuba]
+        array = create_vtk_array(schema.vtk_type)
+        array.SetNumberOfComponents(schema.components)
+        array.SetNumberOfTuples(len(self))
+        array.SetName(cuba.name)
+        for index, value in enumerate(schema.default.ravel()):
+            array.FillComponent(index, value)
+        self.data.AddArray(array)
+        return array
+
+
+class _Column(object):
+    """ A one dimensional numpy array that can be appended to.
+
+    As in :func:`_reserve` the allocated memory grows geometrically.
+
+    """
+    def __init__(self, dtype):
+        self._data = numpy.empty(0, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self):
+        """ A view of the stored values. """
+        return self._data[:self._size]
+
+    def extend(self, values):
+        size = self._size + len(values)
+        if size > len(self._data):
+            data = numpy.empty(
+                max(size, 2 * len(self._data)), dtype=self._data.dtype)
+            data[:self._size] = self.values
+            self._data = data
+        self._data[self._size:size] = values
+        self._size = size
+
+    def assign(self, values):
+        self._data = numpy.asarray(values, dtype=self._data.dtype)
+        self._size = len(self._data)
+
+    def truncate(self, size):
+        self._size = size
+
+
+def _reserve(array, size):
+    """ Set the number of tuples of a vtk array keeping its values.
+
+    The allocated memory grows geometrically, so that appending a few
+    tuples at a time does not copy the array on every call.
+
+    """
+    components = array.GetNumberOfComponents()
+    if size * components > array.GetSize():
+        array.Resize(max(size, 2 * array.GetNumberOfTuples()))
+    array.SetNumberOfTuples(size)
+
+
+def _as_rows(array):
+    """ Return a (tuples, components) numpy view of a vtk array. """
+    return vtk_to_numpy(array).reshape(
+        array.GetNumberOfTuples(), array.GetNumberOfComponents())
+
+
+def _ranges(starts, sizes):
+    """ Concatenate the index ranges ``[start, start + size)``.
+
+    """
+    sizes = numpy.asarray(sizes, dtype=ID_TYPE)
+    total = sizes.sum()
+    if total == 0:
+        return numpy.empty(0, dtype=ID_TYPE)
+    shifts = numpy.repeat(
+        numpy.asarray(starts, dtype=ID_TYPE) -
+        (numpy.cumsum(sizes) - sizes), sizes)
+    return numpy.arange(total, dtype=ID_TYPE) + shifts
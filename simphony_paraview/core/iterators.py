@@ -1,3 +1,5 @@
+from itertools import islice
+
 from paraview import vtk
 from paraview.numpy_support import vtk_to_numpy
 
@@ -24,3 +26,13 @@ def iter_grid_cells(grid, cell_types=None):
                 cell = grid.GetCell(index)
                 ids = cell.GetPointIds()
                 yield [ids.GetId(i) for i in range(ids.GetNumberOfIds())]
+
+
+def iter_chunks(iterable, size=65536):
+    """ Iterate over lists of at most ``size`` items. """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if len(chunk) == 0:
+            return
+        yield chunk
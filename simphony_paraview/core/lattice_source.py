@@ -0,0 +1,119 @@
+import numpy
+from paraview import vtk
+from paraview.simple import ProgrammableSource
+from simphony.core.cuba import CUBA
+from simphony.cuds import ABCLattice
+
+from .cuds2vtk import (
+    ORTHOGONAL_LATTICES, lattice_block, lattice_point_data, lattice_spacing)
+from .source_registry import sources
+
+
+_INFORMATION_SCRIPT = """\
+from simphony_paraview.core.lattice_source import request_information
+request_information(self, {token!r}, {extent!r})
+"""
+
+_DATA_SCRIPT = """\
+from simphony_paraview.core.lattice_source import request_data
+request_data(self, {token!r}, {keys!r})
+"""
+
+
+def lattice_source(cuds, region=None, keys=None):
+    """ Create a source proxy that streams the nodes of a lattice.
+
+    The source reports the whole extent, origin and spacing of the
+    lattice without reading any nodes. On every update it copies only
+    the nodes of the requested update extent (e.g. the piece of a
+    parallel render or the extent requested by a slice or streaming
+    filter) from the lattice into a vtkImageData.
+
+    .. note:: The source queries the lattice in the process that
+       created it, so only a builtin session is supported. The source
+       does not keep the lattice alive and the lattice is released
+       from the :class:`~.SourceRegistry` when the source is deleted.
+
+    Parameters
+    ----------
+    cuds : ABCLattice
+        A lattice with an orthogonal primitive cell.
+
+    region : BoxRegion or SphereRegion
+        Provide only the block of nodes that covers the region (see
+        :func:`~.cuds2vtk`). Default is the whole lattice.
+
+    keys : iterable
+        Provide only the node data of these CUBA keys. Default is all
+        the supported keys.
+
+    Raises
+    ------
+    ValueError :
+        When the primitive cell of the lattice is not orthogonal.
+
+    """
+    if not is_streamable(cuds):
+        message = 'Only orthogonal lattices can be streamed, got {}'
+        raise ValueError(message.format(cuds))
+    first, last = lattice_block(cuds, region)
+    extent = tuple(
+        int(value) for bounds in zip(first, last) for value in bounds)
+    token = sources.register(cuds)
+    source = ProgrammableSource()
+    sources.track(source, token)
+    source.OutputDataSetType = 'vtkImageData'
+    source.ScriptRequestInformation = _INFORMATION_SCRIPT.format(
+        token=token, extent=extent)
+    source.Script = _DATA_SCRIPT.format(
+        token=token,
+        keys=None if keys is None else tuple(cuba.name for cuba in keys))
+    source.UpdatePipelineInformation()
+    return source
+
+
+def is_streamable(cuds):
+    """ Check if the cuds container can be provided by a
+    :func:`lattice_source`.
+
+    """
+    return (
+        isinstance(cuds, ABCLattice) and
+        cuds.primitive_cell.bravais_lattice in ORTHOGONAL_LATTICES)
+
+
+def request_information(algorithm, token, extent):
+    """ Report the whole extent, origin and spacing of the lattice.
+
+    Called by the information script of a :func:`lattice_source`.
+
+    """
+    cuds, = sources.get(token)
+    executive = algorithm.GetExecutive()
+    info = executive.GetOutputInformation(0)
+    info.Set(executive.WHOLE_EXTENT(), *extent)
+    info.Set(vtk.vtkDataObject.ORIGIN(), *tuple(cuds.origin))
+    info.Set(vtk.vtkDataObject.SPACING(), *lattice_spacing(cuds))
+    if hasattr(vtk.vtkAlgorithm, 'CAN_PRODUCE_SUB_EXTENT'):
+        info.Set(vtk.vtkAlgorithm.CAN_PRODUCE_SUB_EXTENT(), 1)
+
+
+def request_data(algorithm, token, keys):
+    """ Copy the nodes of the update extent into the output.
+
+    Called by the data script of a :func:`lattice_source`.
+
+    """
+    cuds, = sources.get(token)
+    executive = algorithm.GetExecutive()
+    info = executive.GetOutputInformation(0)
+    extent = info.Get(executive.UPDATE_EXTENT())
+    output = algorithm.GetOutputDataObject(0)
+    output.SetExtent(extent)
+    output.SetOrigin(tuple(cuds.origin))
+    output.SetSpacing(tuple(lattice_spacing(cuds)))
+    if keys is not None:
+        keys = [CUBA[name] for name in keys]
+    lattice_point_data(
+        cuds, output.GetPointData(), numpy.array(extent[0::2]),
+        numpy.array(extent[1::2]), keys=keys)
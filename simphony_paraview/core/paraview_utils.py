@@ -1,55 +1,269 @@
 import contextlib
+import itertools
+import logging
 import os
 import tempfile
 import shutil
+import weakref
 
 import math
 
-from paraview import servermanager
+from paraview import servermanager, vtk, vtkConstants
 from paraview.simple import (
-    Disconnect, Connect, Delete, OpenDataFile, MakeBlueToRedLT)
+    Disconnect, Connect, Delete, OpenDataFile, MakeBlueToRedLT,
+    TrivialProducer, Glyph, Sphere, ExtractSurface)
+from simphony.cuds import ABCMesh, ABCParticles, ABCLattice
 
 from .cuds2vtk import cuds2vtk
-from .constants import dataset2writer
-from .compatibility import set_input
+from .constants import dataset2writer, dataset2xmlwriter, dataset2extension
+from .compatibility import (
+    set_input, create_compressor, has_representation)
+from .series import PVDCollection, BackgroundWriter
+from .xdmf import XDMFCollection
+from .lattice_source import lattice_source, is_streamable
+
+
+logger = logging.getLogger(__name__)
+
+#: Particle sets with more particles are not shown with sphere glyphs
+#: in the ``'auto'`` particle mode.
+GLYPH_THRESHOLD = 100000
+
+#: The rendering modes of particles.
+PARTICLE_MODES = ('auto', 'glyph', 'points', 'gaussian')
+
+# The tokens of the connections, a new connection never reuses a token.
+_connection_tokens = weakref.WeakKeyDictionary()
+_next_token = itertools.count()
 
 
 @contextlib.contextmanager
-def loaded_in_paraview(cuds):
+def loaded_in_paraview(
+        cuds, converter=None, cache=None, preview=None, region=None,
+        keys=None, key=None):
     """ Push cuds dataset to the Paraview server.
 
-    The context manager will create a connection if necessary and save the
-    data of the cuds container into a vtk file. The vtk file is then loaded
-    in the paraview server and a proxy source is returned.
+    The context manager will create a connection if necessary and
+    convert the cuds container into a vtk dataset. In a builtin session
+    the dataset is handed to a trivial producer proxy in memory, while
+    for remote connections the data are saved into a vtk file that is
+    then loaded in the paraview server. In both cases a proxy source is
+    returned.
+
+    Orthogonal lattices are not converted in a builtin session, unless
+    a preview budget or a converter is given. They are provided by a
+    :func:`~.lattice_source` that copies only the nodes of the extent
+    requested by the pipeline. Particles and meshes are always
+    converted, since rendering needs the whole dataset anyway.
+
+    Parameters
+    ----------
+    cuds :
+        A top level cuds object (e.g. a mesh).
+
+    converter : IncrementalConverter
+        An up to date converter of ``cuds``. When provided its vtk
+        dataset is used instead of converting the container again.
+
+    cache : ConversionCache
+        A cache of converted datasets to reuse when ``cuds`` has not
+        changed. When a builtin session is already active the source
+        proxy is also cached and is not deleted on exit. The cache is
+        not used when a converter, a preview budget or a region is
+        provided or the lattice is streamed. A cached proxy is counted
+        with the size of its dataset.
+
+    preview : int
+        Convert only a subsample of about ``preview`` items of the
+        container (see :func:`~.cuds2vtk`).
+
+    region : BoxRegion or SphereRegion
+        Convert only the part of the container inside the region (see
+        :func:`~.cuds2vtk`).
+
+    keys : iterable
+        Convert only the item data of these CUBA keys (see
+        :func:`~.cuds2vtk`).
+
+    key : hashable
+        The key of ``cuds`` in ``cache`` when it is already known.
+        Default is to compute it with the key function of the cache.
 
     """
-    temp_dir = tempfile.mkdtemp(prefix='simphony-')
-    filename = os.path.join(temp_dir, 'temp_cuds.vtk')
+    temp_dir = None
     source = None
+    cached = False
     if servermanager.ActiveConnection is None:
         connection = Connect()
     else:
         connection = None
     try:
-        write_to_file(cuds, filename)
-        source = OpenDataFile(filename)
+        active = servermanager.ActiveConnection
+        stream = (
+            converter is None and preview is None and
+            not is_remote(active) and is_streamable(cuds))
+        use_cache = (
+            cache is not None and converter is None and preview is None and
+            region is None and not stream)
+        # proxies live as long as the connection that created them
+        cache_source = (
+            use_cache and connection is None and not is_remote(active))
+        if use_cache and key is None:
+            key = cache.key(cuds)
+        if cache_source:
+            source_key = (
+                'source', connection_token(active), key,
+                None if keys is None else frozenset(keys))
+            # a missing source is counted as a miss of the dataset below
+            if source_key in cache:
+                source = cache.get(source_key)
+                cached = True
+        if stream:
+            source = lattice_source(cuds, region, keys)
+        elif source is None:
+            if converter is not None:
+                data_set = converter.data_set
+            elif use_cache:
+                data_set = cache.data_set(cuds, key, keys)
+            else:
+                data_set = cuds2vtk(cuds, preview, region, keys)
+            if is_remote(active):
+                temp_dir = tempfile.mkdtemp(prefix='simphony-')
+                filename = os.path.join(temp_dir, 'temp_cuds.vtk')
+                _write_data_set(data_set, filename)
+                source = OpenDataFile(filename)
+            else:
+                source = trivial_producer(data_set)
+            if cache_source:
+                # the proxy keeps its dataset alive after the dataset
+                # entry is evicted
+                cached = cache.put(
+                    source_key, source,
+                    nbytes=data_set.GetActualMemorySize() * 1024,
+                    on_evict=_proxy_deleter(active))
         yield source
     finally:
-        if source is not None:
+        if source is not None and not cached:
             Delete(source)
         if connection is not None:
             Disconnect()
-        shutil.rmtree(temp_dir)
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir)
 
 
-def write_to_file(cuds, filename):
-    """ Write a cuds container into a vtk file. """
-    data_set = cuds2vtk(cuds)
-    kind = data_set.GetDataObjectType()
-    writer = dataset2writer()[kind]()
-    writer.SetFileName(filename)
-    set_input(writer, data_set)
-    writer.Write()
+def write_to_file(
+        cuds, filename, format=None, compressor='zlib', region=None):
+    """ Write a cuds container into a vtk file.
+
+    Parameters
+    ----------
+    cuds :
+        A top level cuds object (e.g. a mesh).
+
+    filename : string
+        The filename to use for the output file.
+
+    format : string
+        The file format, one of 'legacy' (ascii) or 'xml' (binary
+        appended data). Default is to select the format from the
+        extension of ``filename``, 'xml' for the ``.vtu``, ``.vtp``,
+        ``.vti`` and ``.vts`` extensions and 'legacy' otherwise.
+
+    compressor : string
+        The compression of the 'xml' format, one of 'zlib', 'lz4'
+        (when available in vtk) or None.
+
+    region : BoxRegion or SphereRegion
+        Write only the part of the container inside the region (see
+        :func:`~.cuds2vtk`).
+
+    Raises
+    ------
+    ValueError :
+        When the format is unknown or the xml extension of the filename
+        does not match the dataset type of the cuds container.
+
+    """
+    data_set = cuds2vtk(cuds, region=region)
+    _write_data_set(data_set, filename, format, compressor)
+
+
+def write_series(
+        cuds_iterable, directory, times=None, name='series',
+        compressor='zlib', static_geometry=False):
+    """ Write a sequence of cuds states as a ParaView time series.
+
+    Each state is converted to a vtk dataset and saved in the binary
+    xml format as ``<name>_<step>.<extension>`` inside ``directory``.
+    The ``<name>.pvd`` collection that indexes the steps is updated
+    after every written step. Writing takes place on a background
+    thread so that the conversion of the next state is not blocked on
+    disk I/O.
+
+    When the points and cells do not change between the states (e.g.
+    a fixed mesh) use ``static_geometry=True``. The series is then
+    saved as a ``<name>.xmf`` xdmf collection where the geometry is
+    written once (and again only when it changes) and only the point
+    and cell data are written for every step.
+
+    Parameters
+    ----------
+    cuds_iterable : iterable
+        The sequence of top level cuds objects (e.g. a mesh).
+
+    directory : string
+        The output directory, created if it does not exist.
+
+    times : iterable
+        The time value of each state. Default is the step number.
+
+    name : string
+        The base name of the .pvd and dataset files.
+
+    compressor : string
+        The compression of the dataset files, one of 'zlib', 'lz4'
+        (when available in vtk) or None. Not used when the geometry is
+        static.
+
+    static_geometry : bool
+        Write an xdmf collection that shares the geometry between
+        the time steps.
+
+    Returns
+    -------
+    filename : string
+        The filename of the .pvd (or .xmf) collection.
+
+    Raises
+    ------
+    ValueError :
+        When there are fewer time values than cuds states or the
+        dataset cannot be stored in xdmf.
+
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    if static_geometry:
+        collection = XDMFCollection(os.path.join(directory, name + '.xmf'))
+    else:
+        collection = PVDCollection(os.path.join(directory, name + '.pvd'))
+    times = itertools.count() if times is None else iter(times)
+    extensions = dataset2extension()
+    with BackgroundWriter() as writer:
+        for step, cuds in enumerate(cuds_iterable):
+            time = next(times, None)
+            if time is None:
+                message = 'No time value was provided for step {}'
+                raise ValueError(message.format(step))
+            data_set = cuds2vtk(cuds)
+            if static_geometry:
+                writer.submit(_write_xdmf_step, collection, data_set, time)
+                continue
+            filename = os.path.join(directory, '{}_{:06d}{}'.format(
+                name, step, extensions[data_set.GetDataObjectType()]))
+            writer.submit(
+                _write_step, collection, data_set, filename, time, compressor)
+    return collection.filename
 
 
 def typical_distance(source):
@@ -95,10 +309,12 @@ def set_data(representation, source, select):
     """
     name = select[0].name
     if select[1] in ('points', 'particles', 'nodes'):
+        source.UpdatePipeline()
         array = source.PointData[name]
         representation.LookupTable = MakeBlueToRedLT(*array.GetRange())
         representation.ColorAttributeType = 'POINT_DATA'
     elif select[1] in ('elements', 'bonds'):
+        source.UpdatePipeline()
         array = source.CellData[name]
         representation.LookupTable = MakeBlueToRedLT(*array.GetRange())
         representation.ColorAttributeType = 'CELL_DATA'
@@ -106,3 +322,219 @@ def set_data(representation, source, select):
         message = "Unknown data attribute selection {}"
         raise ValueError(message.format(select[1]))
     representation.ColorArrayName = name
+
+
+def default_representation(
+        scene, kind, source, select=None, mode='auto', surface=False):
+    """ Show the source in the scene with the default visualisation.
+
+    Lattices are shown as points and meshes as surfaces. With
+    ``surface`` only the exterior faces of meshes are extracted and
+    shown, so the interior cells of volume meshes are not processed by
+    the renderer. Particles are shown based on the ``mode``:
+
+    - ``'glyph'`` : A sphere glyph for each particle. Creates the
+      geometry of every sphere, so this only works for small sets.
+    - ``'points'`` : Point sprites without any per particle geometry.
+    - ``'gaussian'`` : Point gaussian splats sized as the glyph spheres.
+      Points are used when the paraview version does not support the
+      point gaussian representation.
+    - ``'auto'`` : Glyphs up to :data:`GLYPH_THRESHOLD` particles and
+      gaussian splats above that.
+
+    Parameters
+    ----------
+    scene : RenderScene
+        The scene to show the source in.
+
+    kind : type
+        The cuds container type of the source (e.g. ``ABCMesh``).
+
+    source :
+        The paraview source proxy of the container dataset.
+
+    select : tuple(CUBA, kind)
+        The (CUBA, kind) selection of the CUBA attribute to
+        use. ``kind`` can be one of the {'point', 'particles',
+        'nodes', 'elements', 'bonds'}
+
+    mode : str
+        The rendering mode of particles, one of {'auto', 'glyph',
+        'points', 'gaussian'}.
+
+    surface : bool
+        Show only the exterior surface of meshes.
+
+    Returns
+    -------
+    representation :
+        The representation that shows the selected data.
+
+    """
+    if mode not in PARTICLE_MODES:
+        message = 'Unknown particle mode {!r}'
+        raise ValueError(message.format(mode))
+    if surface and issubclass(kind, ABCMesh):
+        source = scene.track(ExtractSurface(Input=source))
+        _log_surface_reduction(source)
+    representation = scene.show(source)
+
+    items = None if select is None else select[1]
+    message = "Container does not have: {}"
+    if issubclass(kind, ABCLattice):
+        representation.Representation = "Points"
+        if items not in (None, 'nodes'):
+            raise ValueError(message.format(items))
+    elif issubclass(kind, ABCParticles):
+        if mode == 'auto':
+            source.UpdatePipeline()
+            number_of_points = source.GetDataInformation().GetNumberOfPoints()
+            if number_of_points > GLYPH_THRESHOLD:
+                mode = 'gaussian'
+            else:
+                mode = 'glyph'
+        if mode == 'gaussian' and not has_representation(
+                representation, 'Point Gaussian'):
+            mode = 'points'
+        if mode == 'glyph':
+            sphere = scene.track(Sphere(Radius=typical_distance(source)))
+            glyphs = scene.track(
+                Glyph(Input=source, ScaleMode='off', GlyphType=sphere))
+            representation = scene.show(glyphs)
+        elif mode == 'gaussian':
+            representation.Representation = "Point Gaussian"
+            representation.ShaderPreset = "Sphere"
+            representation.GaussianRadius = typical_distance(source)
+        else:
+            representation.Representation = "Points"
+            representation.PointSize = 3
+        if items not in (None, 'particles', 'bonds'):
+            raise ValueError(message.format(items))
+    elif issubclass(kind, ABCMesh):
+        representation.Representation = "Surface"
+        if items not in (None, 'points', 'elements'):
+            raise ValueError(message.format(items))
+
+    if select is not None:
+        set_data(representation, source, select)
+    return representation
+
+
+def selected_keys(select, keys=None):
+    """ The CUBA keys to convert for rendering the selection.
+
+    When ``keys`` is not given only the selected key is needed.
+
+    """
+    if keys is not None:
+        return keys
+    return () if select is None else (select[0],)
+
+
+def container_kind(cuds):
+    """ Return the cuds container type of a container. """
+    for kind in (ABCLattice, ABCParticles, ABCMesh):
+        if isinstance(cuds, kind):
+            return kind
+    msg = 'Provided object {} is not of any known cuds container types'
+    raise TypeError(msg.format(type(cuds)))
+
+
+def is_remote(connection):
+    """ Check if the connection is not a builtin session. """
+    return connection.IsRemote()
+
+
+def connection_token(connection):
+    """ Return an integer that identifies the connection.
+
+    Unlike ``id(connection)`` the token is never reused by a later
+    connection, so it can key the proxies of the connection in a
+    :class:`~.ConversionCache`.
+
+    """
+    token = _connection_tokens.get(connection)
+    if token is None:
+        token = _connection_tokens[connection] = next(_next_token)
+    return token
+
+
+def trivial_producer(data_set):
+    """ Create a source proxy that provides an in-memory vtk dataset.
+
+    .. note:: Only possible when the server runs in the same process
+       (builtin session).
+
+    """
+    source = TrivialProducer()
+    set_producer_output(source, data_set)
+    return source
+
+
+def set_producer_output(source, data_set):
+    """ Replace the dataset provided by a trivial producer proxy.
+
+    """
+    if data_set.GetDataObjectType() == vtkConstants.VTK_STRUCTURED_POINTS:
+        # The legacy vtk readers load structured points as image data
+        image_data = vtk.vtkImageData()
+        image_data.ShallowCopy(data_set)
+        data_set = image_data
+    source.GetClientSideObject().SetOutput(data_set)
+    source.SMProxy.MarkModified(source.SMProxy)
+    source.UpdatePipeline()
+
+
+def _write_step(collection, data_set, filename, time, compressor):
+    _write_data_set(data_set, filename, 'xml', compressor)
+    collection.append(filename, time)
+    collection.write()
+
+
+def _write_xdmf_step(collection, data_set, time):
+    collection.append(data_set, time)
+    collection.write()
+
+
+def _log_surface_reduction(surface):
+    surface.UpdatePipeline()
+    cells = surface.Input.GetDataInformation().GetNumberOfCells()
+    faces = surface.GetDataInformation().GetNumberOfCells()
+    logger.info(
+        'Showing %d exterior faces instead of %d mesh cells (%.1f%%)',
+        faces, cells, 100.0 * faces / cells if cells > 0 else 100.0)
+
+
+def _proxy_deleter(connection):
+    """ Return a function that deletes a proxy of the connection. """
+    def delete(proxy):
+        if servermanager.ActiveConnection is connection:
+            Delete(proxy)
+    return delete
+
+
+def _write_data_set(data_set, filename, format=None, compressor='zlib'):
+    kind = data_set.GetDataObjectType()
+    extension = os.path.splitext(filename)[1].lower()
+    xml_extensions = dataset2extension()
+    if format is None:
+        is_xml = extension in xml_extensions.values()
+        format = 'xml' if is_xml else 'legacy'
+    if format == 'legacy':
+        writer = dataset2writer()[kind]()
+    elif format == 'xml':
+        expected = xml_extensions[kind]
+        if extension in xml_extensions.values() and extension != expected:
+            message = 'A {} file cannot store a {}, please use {}'
+            raise ValueError(
+                message.format(extension, data_set.GetClassName(), expected))
+        writer = dataset2xmlwriter()[kind]()
+        writer.SetDataModeToAppended()
+        writer.EncodeAppendedDataOff()
+        writer.SetCompressor(create_compressor(compressor))
+    else:
+        message = 'Unknown file format {!r}'
+        raise ValueError(message.format(format))
+    writer.SetFileName(filename)
+    set_input(writer, data_set)
+    writer.Write()
@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+import numpy
+
+
+class BoxRegion(namedtuple('BoxRegion', ['lower', 'upper'])):
+    """ An axis aligned box region of space.
+
+    >>> region = BoxRegion(lower=(0.0, 0.0, 0.0), upper=(1.0, 2.0, 1.0))
+    >>> region.contains([(0.5, 0.5, 0.5), (0.5, 3.0, 0.5)])
+    array([ True, False], dtype=bool)
+
+    """
+    def __new__(cls, lower, upper):
+        lower = tuple(float(value) for value in lower)
+        upper = tuple(float(value) for value in upper)
+        if any(low > high for low, high in zip(lower, upper)):
+            message = 'The lower corner {} is above the upper corner {}'
+            raise ValueError(message.format(lower, upper))
+        return super(BoxRegion, cls).__new__(cls, lower, upper)
+
+    @property
+    def bounds(self):
+        """ The (lower, upper) corners of the bounding box. """
+        return self.lower, self.upper
+
+    def contains(self, coordinates):
+        """ Check which of the coordinates are inside the region.
+
+        Parameters
+        ----------
+        coordinates : array_like
+            A single position or a sequence of positions.
+
+        Returns
+        -------
+        inside : numpy.ndarray
+            The boolean mask of the positions inside the region
+            (boundary included).
+
+        """
+        coordinates = _as_positions(coordinates)
+        return numpy.all(
+            (coordinates >= self.lower) & (coordinates <= self.upper), axis=1)
+
+
+class SphereRegion(namedtuple('SphereRegion', ['center', 'radius'])):
+    """ A spherical region of space.
+
+    >>> region = SphereRegion(center=(0.0, 0.0, 0.0), radius=1.0)
+    >>> region.contains([(0.5, 0.5, 0.5), (1.0, 1.0, 0.0)])
+    array([ True, False], dtype=bool)
+
+    """
+    def __new__(cls, center, radius):
+        center = tuple(float(value) for value in center)
+        if radius < 0:
+            message = 'The radius should not be negative, got {}'
+            raise ValueError(message.format(radius))
+        return super(SphereRegion, cls).__new__(cls, center, float(radius))
+
+    @property
+    def bounds(self):
+        """ The (lower, upper) corners of the bounding box. """
+        return (
+            tuple(value - self.radius for value in self.center),
+            tuple(value + self.radius for value in self.center))
+
+    def contains(self, coordinates):
+        """ Check which of the coordinates are inside the region.
+
+        Parameters
+        ----------
+        coordinates : array_like
+            A single position or a sequence of positions.
+
+        Returns
+        -------
+        inside : numpy.ndarray
+            The boolean mask of the positions inside the region
+            (boundary included).
+
+        """
+        offsets = _as_positions(coordinates) - self.center
+        return numpy.einsum('ij,ij->i', offsets, offsets) <= self.radius ** 2
+
+
+def _as_positions(coordinates):
+    return numpy.asarray(coordinates, dtype=float).reshape(-1, 3)
@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import Queue
+from xml.etree import ElementTree
+
+
+class PVDCollection(object):
+    """ A ParaView data collection (.pvd) indexing a time series of files.
+
+    >>> collection = PVDCollection('output/series.pvd')
+    >>> collection.append('output/series_000000.vtu', time=0.0)
+    >>> collection.write()
+
+    """
+    def __init__(self, filename):
+        """ Constructor
+
+        Parameters
+        ----------
+        filename : string
+            The filename of the .pvd file.
+
+        """
+        self.filename = filename
+        self._datasets = []
+
+    def __len__(self):
+        """ The number of datasets in the collection.
+
+        """
+        return len(self._datasets)
+
+    def append(self, filename, time, part=0):
+        """ Add a dataset file to the collection.
+
+        Parameters
+        ----------
+        filename : string
+            The vtk xml file of the dataset.
+
+        time : float
+            The time value of the dataset.
+
+        part : int
+            The part number when a time step is split into many files.
+
+        """
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        relative = os.path.relpath(os.path.abspath(filename), directory)
+        self._datasets.append((time, part, relative.replace(os.sep, '/')))
+
+    def write(self):
+        """ Write the collection to the .pvd file.
+
+        """
+        root = ElementTree.Element(
+            'VTKFile', type='Collection', version='0.1',
+            byte_order='LittleEndian')
+        collection = ElementTree.SubElement(root, 'Collection')
+        for time, part, filename in self._datasets:
+            ElementTree.SubElement(
+                collection, 'DataSet', timestep=repr(float(time)),
+                group='', part=str(part), file=filename)
+        ElementTree.ElementTree(root).write(
+            self.filename, encoding='utf-8', xml_declaration=True)
+
+
+class BackgroundWriter(object):
+    """ Execute write tasks in order on a background thread.
+
+    The number of pending tasks is bounded, so that the producer blocks
+    instead of accumulating datasets in memory when the writes cannot
+    keep up. The first error raised by a task is re-raised on the next
+    call to :meth:`submit` or :meth:`close` and the remaining tasks are
+    discarded.
+
+    >>> with BackgroundWriter() as writer:
+    ...     writer.submit(write, data_set, filename)
+
+    """
+    def __init__(self, maxsize=2):
+        """ Constructor
+
+        Parameters
+        ----------
+        maxsize : int
+            The maximum number of pending tasks.
+
+        """
+        self._queue = Queue.Queue(maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # do not hide the original exception
+            self._shutdown()
+
+    def submit(self, function, *args):
+        """ Queue a call of ``function(*args)``.
+
+        """
+        self._raise_error()
+        self._queue.put((function, args))
+
+    def close(self):
+        """ Wait for the pending tasks to finish and stop the thread.
+
+        """
+        self._shutdown()
+        self._raise_error()
+
+    def _shutdown(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            if self._error is None:
+                function, args = task
+                try:
+                    function(*args)
+                except Exception:
+                    self._error = sys.exc_info()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error_type, error, traceback = self._error
+            raise error_type, error, traceback
@@ -0,0 +1,202 @@
+import contextlib
+
+from paraview import servermanager
+from paraview.servermanager import CreateRenderView
+from paraview.simple import Connect, Disconnect, Delete
+
+from .fixes import CreateRepresentation
+from .paraview_utils import connection_token
+
+
+#: The view properties that are restored when a pooled view is released.
+_VIEW_PROPERTIES = (
+    'Background', 'ViewSize', 'UseOffscreenRendering',
+    'UseOffscreenRenderingForScreenshots')
+
+
+class Session(object):
+    """ A ParaView connection with a pool of reusable render views.
+
+    The session connects once (unless a connection is already active)
+    and hands out render views that are reset and kept for the next
+    :func:`~.snapshot` or :func:`~.show` call, instead of setting up a
+    new connection and view every time. When a
+    :class:`~.ConversionCache` is given, the source proxies of
+    unchanged containers are also kept alive for the duration of the
+    session.
+
+    >>> with Session(cache=ConversionCache()) as session:
+    ...     for index, cuds in enumerate(containers):
+    ...         snapshot(cuds, 'frame{}.png'.format(index), session=session)
+
+    """
+    def __init__(self, cache=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        cache : ConversionCache
+            The cache of converted datasets and proxies to use in the
+            session. Default is no caching.
+
+        """
+        self.cache = cache
+        self.connection = None
+        self._owns_connection = False
+        self._views = []
+        self._free = []
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def is_open(self):
+        """ True while the session holds a connection. """
+        return self.connection is not None
+
+    def open(self):
+        """ Connect to the builtin server if there is no active connection.
+
+        """
+        if self.is_open:
+            return
+        if servermanager.ActiveConnection is None:
+            self.connection = Connect()
+            self._owns_connection = True
+        else:
+            self.connection = servermanager.ActiveConnection
+            self._owns_connection = False
+
+    def close(self):
+        """ Release the pooled views and the cached proxies and
+        disconnect if the session created the connection.
+
+        """
+        if not self.is_open:
+            return
+        try:
+            if self.cache is not None:
+                # proxies are only valid in the connection that created them
+                prefix = ('source', connection_token(self.connection))
+                for key in self.cache.keys():
+                    if key[:2] == prefix:
+                        self.cache.discard(key)
+            if servermanager.ActiveConnection is self.connection:
+                for scene in self._views:
+                    Delete(scene.view)
+        finally:
+            self._views = []
+            self._free = []
+            if self._owns_connection and (
+                    servermanager.ActiveConnection is self.connection):
+                Disconnect()
+            self.connection = None
+            self._owns_connection = False
+
+    @contextlib.contextmanager
+    def view(self):
+        """ Borrow a render view from the pool.
+
+        The yielded :class:`RenderScene` creates representations and
+        keeps track of helper proxies that are removed when the scene is
+        released. The view properties and the camera are then restored
+        to their initial state.
+
+        Raises
+        ------
+        RuntimeError :
+            When the session is not open.
+
+        """
+        if not self.is_open:
+            raise RuntimeError('The session is not open')
+        if len(self._free) > 0:
+            scene = self._free.pop()
+        else:
+            scene = RenderScene(CreateRenderView(), pooled=True)
+            self._views.append(scene)
+        try:
+            yield scene
+        finally:
+            scene.reset()
+            if scene in self._views:
+                self._free.append(scene)
+
+    @property
+    def number_of_views(self):
+        """ The number of render views created by the session. """
+        return len(self._views)
+
+
+class RenderScene(object):
+    """ A render view with the representations and proxies of one use.
+
+    """
+    def __init__(self, view, pooled=False):
+        self.view = view
+        self._pooled = pooled
+        self._representations = []
+        self._proxies = []
+        if pooled:
+            self._defaults = dict(
+                (name, _copy(getattr(view, name)))
+                for name in _VIEW_PROPERTIES)
+
+    def show(self, source):
+        """ Create a representation of the source in the view. """
+        representation = CreateRepresentation(source, self.view)
+        if self._pooled:
+            self._representations.append(representation)
+        return representation
+
+    def track(self, proxy):
+        """ Delete the (pipeline) proxy when the scene is reset. """
+        if self._pooled:
+            self._proxies.append(proxy)
+        return proxy
+
+    def reset(self):
+        """ Remove the representations and proxies of the scene and
+        restore the view state.
+
+        """
+        view = self.view
+        for representation in self._representations:
+            if representation in view.Representations:
+                view.Representations.remove(representation)
+        self._representations = []
+        # consumers are created after their inputs
+        for proxy in reversed(self._proxies):
+            Delete(proxy)
+        self._proxies = []
+        if not self._pooled:
+            return
+        for name, value in self._defaults.items():
+            setattr(view, name, value)
+        camera = view.GetActiveCamera()
+        camera.SetPosition(0.0, 0.0, 1.0)
+        camera.SetFocalPoint(0.0, 0.0, 0.0)
+        camera.SetViewUp(0.0, 1.0, 0.0)
+
+
+@contextlib.contextmanager
+def render_scene(session=None):
+    """ Return a render scene from the session pool or a new view.
+
+    """
+    if session is None:
+        yield RenderScene(CreateRenderView())
+    else:
+        with session.view() as scene:
+            yield scene
+
+
+def _copy(value):
+    try:
+        return list(value)
+    except TypeError:
+        return value
@@ -0,0 +1,84 @@
+import weakref
+from itertools import count
+
+
+class SourceRegistry(object):
+    """ The cuds containers of the programmable source proxies.
+
+    The scripts of a programmable source are plain strings, so they
+    refer to their container (and conversion parameters) by an integer
+    token. The registry keeps only a weak reference to each container.
+    An entry is removed when its container is garbage collected or,
+    when the source proxy is tracked, when the proxy is deleted.
+
+    >>> token = sources.register(lattice)
+    >>> source = ProgrammableSource()
+    >>> sources.track(source, token)
+    >>> sources.get(token)
+    (<Lattice>,)
+
+    """
+    def __init__(self):
+        self._entries = {}
+        self._tokens = count()
+
+    def __len__(self):
+        """ The number of registered sources.
+
+        """
+        return len(self._entries)
+
+    def __contains__(self, token):
+        return token in self._entries
+
+    def register(self, cuds, *parameters):
+        """ Store the container and the parameters of a source.
+
+        Returns
+        -------
+        token : int
+            The token of the entry.
+
+        """
+        token = next(self._tokens)
+
+        def release(reference):
+            self._entries.pop(token, None)
+
+        self._entries[token] = (weakref.ref(cuds, release),) + parameters
+        return token
+
+    def get(self, token):
+        """ Return the container and the parameters of a source.
+
+        Raises
+        ------
+        RuntimeError :
+            When the entry or its container no longer exists.
+
+        """
+        entry = self._entries.get(token)
+        cuds = None if entry is None else entry[0]()
+        if cuds is None:
+            message = 'The cuds container of the source no longer exists'
+            raise RuntimeError(message)
+        return (cuds,) + entry[1:]
+
+    def unregister(self, token):
+        """ Remove the entry of a source if it exists.
+
+        """
+        self._entries.pop(token, None)
+
+    def track(self, proxy, token):
+        """ Remove the entry of a source when its proxy is deleted.
+
+        """
+        def release(caller, event):
+            self.unregister(token)
+
+        proxy.SMProxy.AddObserver('DeleteEvent', release)
+
+
+#: The registry of the sources created in this process.
+sources = SourceRegistry()
@@ -6,7 +6,7 @@ from simphony.core.data_container import DataContainer
 from simphony.core.cuba import CUBA
 from simphony.cuds import (
     Mesh, Point, Cell, Edge, Face, Particles, Particle, Bond)
-from simphony.cuds.lattice import make_cubic_lattice
+from simphony.cuds.lattice import make_cubic_lattice, make_hexagonal_lattice
 
 
 def create_example_lattice():
@@ -22,6 +22,19 @@ def create_example_lattice():
     return lattice
 
 
+def create_example_hexagonal_lattice():
+    lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 3))
+
+    def work_on_nodes(nodes):
+        for node in nodes:
+            index = array(node.index) + 1.0
+            node.data[CUBA.TEMPERATURE] = prod(index)
+            yield node
+
+    lattice.update(work_on_nodes(lattice.iter(item_type=CUBA.NODE)))
+    return lattice
+
+
 def create_example_mesh():
     points = array([
         [0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
@@ -93,6 +106,7 @@ cuds_containers = sampled_from([
     # XXX while the lattice is a vtkStructuredPoints dataset it is
     # read as vtkImageData
     (create_example_lattice(), vtkConstants.VTK_IMAGE_DATA),
+    (create_example_hexagonal_lattice(), vtkConstants.VTK_STRUCTURED_GRID),
     (create_example_particles(), vtkConstants.VTK_POLY_DATA)])
 
 
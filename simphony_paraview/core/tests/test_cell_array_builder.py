@@ -0,0 +1,103 @@
+import unittest
+import uuid
+
+from numpy.testing import assert_array_equal
+from paraview import vtk
+
+from simphony_paraview.core.api import (
+    CellArrayBuilder, UIDIndex, iter_cells, iter_grid_cells,
+    points2edge, points2face, points2cell)
+
+
+class TestCellArrayBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.uids = [uuid.uuid4() for _ in range(12)]
+        self.point2index = UIDIndex(self.uids)
+
+    def test_empty(self):
+        # when
+        builder = CellArrayBuilder(self.point2index)
+
+        # then
+        self.assertEqual(len(builder), 0)
+        self.assertEqual(len(builder.offsets), 0)
+        self.assertEqual(len(builder.connectivity), 0)
+        self.assertEqual(len(builder.types), 0)
+        self.assertEqual(builder.cell_array().GetNumberOfCells(), 0)
+
+    def test_cell_array(self):
+        # given
+        uids = self.uids
+        builder = CellArrayBuilder(self.point2index)
+        lines = [[0, 1], [0, 3], [1, 3, 2]]
+
+        # when
+        builder.extend([[uids[index] for index in line] for line in lines])
+
+        # then
+        self.assertEqual(len(builder), 3)
+        assert_array_equal(builder.offsets, [0, 2, 4])
+        assert_array_equal(builder.connectivity, [0, 1, 0, 3, 1, 3, 2])
+        self.assertEqual(list(iter_cells(builder.cell_array())), lines)
+
+    def test_install(self):
+        # given
+        uids = self.uids
+        builder = CellArrayBuilder(self.point2index)
+        edges = [[1, 4], [3, 8], [0, 5, 6]]
+        faces = [[2, 7, 11], [0, 1, 2, 3]]
+        cells = [[0, 1, 2, 3], [4, 5, 6, 7, 8, 9, 10, 11]]
+        grid = vtk.vtkUnstructuredGrid()
+        points = vtk.vtkPoints()
+        points.SetNumberOfPoints(12)
+        grid.SetPoints(points)
+
+        # when
+        for elements, mapping in (
+                (edges, points2edge()),
+                (faces, points2face()),
+                (cells, points2cell())):
+            builder.extend(
+                [[uids[index] for index in element] for element in elements],
+                mapping)
+        builder.install(grid)
+
+        # then
+        self.assertEqual(grid.GetNumberOfCells(), 7)
+        self.assertEqual(list(iter_grid_cells(grid)), edges + faces + cells)
+        assert_array_equal(
+            [grid.GetCellType(index) for index in range(7)],
+            [vtk.VTK_LINE, vtk.VTK_LINE, vtk.VTK_POLY_LINE,
+             vtk.VTK_TRIANGLE, vtk.VTK_QUAD,
+             vtk.VTK_TETRA, vtk.VTK_HEXAHEDRON])
+
+    def test_install_without_cell_types(self):
+        # given
+        uids = self.uids
+        builder = CellArrayBuilder(self.point2index)
+        builder.extend([[uids[0], uids[1]]])
+
+        # when/then
+        with self.assertRaises(ValueError):
+            builder.install(vtk.vtkUnstructuredGrid())
+
+    def test_extend_with_unknown_point(self):
+        # given
+        builder = CellArrayBuilder(self.point2index)
+
+        # when/then
+        with self.assertRaises(KeyError):
+            builder.extend([[self.uids[0], uuid.uuid4()]])
+
+    def test_extend_with_unsupported_cell(self):
+        # given
+        builder = CellArrayBuilder(self.point2index)
+
+        # when/then
+        with self.assertRaises(KeyError):
+            builder.extend([self.uids[:3]], points2cell())
+
+
+if __name__ == '__main__':
+    unittest.main()
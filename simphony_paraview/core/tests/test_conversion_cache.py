@@ -0,0 +1,168 @@
+import unittest
+
+from hypothesis import given
+from mock import Mock
+from simphony.core.cuba import CUBA
+
+from simphony_paraview.core.api import (
+    ConversionCache, fingerprint, full_fingerprint)
+from simphony_paraview.core.testing import (
+    cuds_containers, create_example_mesh, create_example_particles)
+
+
+class TestConversionCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        # given
+        cache = ConversionCache(max_bytes=100)
+
+        # when
+        missing = cache.get('a')
+        cache.put('a', 1, nbytes=10)
+
+        # then
+        self.assertIsNone(missing)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIn('a', cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.nbytes, 10)
+        self.assertEqual(
+            cache.stats,
+            {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1,
+             'nbytes': 10, 'max_bytes': 100})
+
+    def test_least_recently_used_values_are_evicted(self):
+        # given
+        cache = ConversionCache(max_bytes=100)
+        on_evict = Mock()
+        for key in 'abc':
+            cache.put(key, key.upper(), nbytes=40, on_evict=on_evict)
+        cache.get('b')
+
+        # when
+        cache.put('d', 'D', nbytes=40, on_evict=on_evict)
+
+        # then
+        self.assertEqual(cache.evictions, 2)
+        self.assertEqual(
+            [call[0][0] for call in on_evict.call_args_list], ['A', 'C'])
+        self.assertNotIn('a', cache)
+        self.assertNotIn('c', cache)
+        self.assertEqual(cache.get('b'), 'B')
+        self.assertEqual(cache.get('d'), 'D')
+        self.assertEqual(cache.nbytes, 80)
+
+    def test_values_larger_than_the_cache_are_not_stored(self):
+        # given
+        cache = ConversionCache(max_bytes=100)
+        cache.put('a', 'A', nbytes=40)
+
+        # when
+        stored = cache.put('b', 'B', nbytes=200)
+
+        # then
+        self.assertFalse(stored)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+
+    def test_clear(self):
+        # given
+        cache = ConversionCache()
+        on_evict = Mock()
+        cache.put('a', 'A', nbytes=40, on_evict=on_evict)
+
+        # when
+        cache.clear()
+
+        # then
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.nbytes, 0)
+        on_evict.assert_called_once_with('A')
+
+    def test_data_set(self):
+        # given
+        cache = ConversionCache()
+        cuds = create_example_mesh()
+
+        # when
+        data_set = cache.data_set(cuds)
+
+        # then
+        self.assertIs(cache.data_set(cuds), data_set)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertGreater(cache.nbytes, 0)
+
+        # when
+        point = next(cuds.iter(item_type=CUBA.POINT))
+        point.data[CUBA.TEMPERATURE] = 100
+        cuds.update([point])
+
+        # then
+        self.assertIsNot(cache.data_set(cuds), data_set)
+
+    def test_default_key_detects_changes_of_any_item(self):
+        # given
+        cache = ConversionCache()
+        cuds = create_example_particles()
+        cache.data_set(cuds)
+        particle = list(cuds.iter(item_type=CUBA.PARTICLE))[-1]
+
+        # when
+        particle.data[CUBA.TEMPERATURE] = -1.0
+        cuds.update([particle])
+        data_set = cache.data_set(cuds)
+
+        # then
+        self.assertIs(cache.key, full_fingerprint)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        temperature = data_set.GetPointData().GetArray('TEMPERATURE')
+        self.assertEqual(
+            temperature.GetValue(temperature.GetNumberOfTuples() - 1), -1.0)
+
+
+class TestFingerprint(unittest.TestCase):
+
+    @given(cuds_containers)
+    def test_fingerprint_of_unchanged_containers(self, setup):
+        # given
+        cuds, _ = setup
+
+        # when/then
+        self.assertEqual(fingerprint(cuds), fingerprint(cuds))
+
+    def test_fingerprint_changes_with_the_data(self):
+        # given
+        cuds = create_example_particles()
+        key = fingerprint(cuds)
+        particle = next(cuds.iter(item_type=CUBA.PARTICLE))
+
+        # when
+        particle.coordinates = (10.0, 10.0, 10.0)
+        cuds.update([particle])
+
+        # then
+        self.assertNotEqual(fingerprint(cuds), key)
+
+    def test_fingerprint_samples_the_items(self):
+        # given
+        cuds = create_example_particles()
+        key = fingerprint(cuds, samples=1)
+        full_key = full_fingerprint(cuds)
+        particle = list(cuds.iter(item_type=CUBA.PARTICLE))[-1]
+
+        # when
+        particle.data[CUBA.TEMPERATURE] = -1.0
+        cuds.update([particle])
+
+        # then
+        self.assertEqual(fingerprint(cuds, samples=1), key)
+        self.assertNotEqual(full_fingerprint(cuds), full_key)
+
+    def test_invalid_container(self):
+        with self.assertRaises(TypeError):
+            fingerprint(object())
+
+
+if __name__ == '__main__':
+    unittest.main()
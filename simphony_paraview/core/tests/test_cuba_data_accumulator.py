@@ -2,6 +2,7 @@ import unittest
 
 import numpy
 from numpy.testing import assert_array_equal
+from paraview import vtk
 from paraview.numpy_support import vtk_to_numpy
 from simphony.core.cuba import CUBA
 from simphony.core.data_container import DataContainer
@@ -120,6 +121,274 @@ class TestCUBADataAccumulator(unittest.TestCase):
             vtk_to_numpy(accumulator[CUBA.VELOCITY]),
             [(0.1, 0.2, 0.3)])
 
+    def test_columnar_accumulate(self):
+        # given
+        cuds_data = [create_data_container(constant=i) for i in range(10)]
+
+        # when
+        accumulator = CUBADataAccumulator(size=3)
+        for data in cuds_data:
+            accumulator.append(data)
+        accumulator.finalize()
+
+        # then
+        self.assertEqual(len(accumulator), 10)
+        expected_cuba = set(CUBA) & supported_cuba()
+        self.assertEqual(accumulator.keys, expected_cuba)
+        for cuba in expected_cuba:
+            default = dummy_cuba_value(cuba)
+            if isinstance(default, numpy.ndarray):
+                new_shape = (10,) + default.shape
+                assert_array_equal(
+                    vtk_to_numpy(accumulator[cuba]).reshape(new_shape),
+                    [dummy_cuba_value(cuba, constant=i) for i in range(10)])
+            else:
+                assert_array_equal(
+                    vtk_to_numpy(accumulator[cuba]),
+                    [dummy_cuba_value(cuba, constant=i) for i in range(10)])
+
+    def test_columnar_accumulate_on_keys(self):
+        # given
+        cuds_data = [create_data_container(constant=i) for i in range(10)]
+
+        # when
+        accumulator = CUBADataAccumulator(
+            keys=[CUBA.NAME, CUBA.TEMPERATURE], size=10)
+        for data in cuds_data:
+            accumulator.append(data)
+
+        # then
+        self.assertEqual(len(accumulator), 10)
+        self.assertEqual(accumulator.keys, set([CUBA.TEMPERATURE]))
+        assert_array_equal(
+            vtk_to_numpy(accumulator[CUBA.TEMPERATURE]),
+            [dummy_cuba_value(
+                CUBA.TEMPERATURE, constant=i) for i in range(10)])
+
+    def test_columnar_accumulate_and_expand(self):
+        # given
+        container = vtk.vtkCellData()
+        accumulator = CUBADataAccumulator(container=container, size=0)
+
+        # when
+        accumulator.append(create_data_container(restrict=[CUBA.MASS]))
+        accumulator.append(DataContainer())
+        accumulator.append(DataContainer(VELOCITY=(0.1, 0.2, 0.3)))
+
+        # then
+        self.assertEqual(len(accumulator), 3)
+        self.assertEqual(accumulator.keys, set([CUBA.MASS, CUBA.VELOCITY]))
+        self.assertEqual(container.GetNumberOfArrays(), 0)
+
+        # when
+        accumulator.finalize()
+
+        # then
+        self.assertEqual(container.GetNumberOfArrays(), 2)
+        assert_array_equal(
+            vtk_to_numpy(accumulator[CUBA.MASS]),
+            [dummy_cuba_value(CUBA.MASS), numpy.nan, numpy.nan])
+        assert_array_equal(
+            vtk_to_numpy(accumulator[CUBA.VELOCITY]),
+            [[numpy.nan] * 3, [numpy.nan] * 3, [0.1, 0.2, 0.3]])
+
+        # when
+        accumulator.append(DataContainer(MASS=3.0))
+        accumulator.finalize()
+
+        # then
+        self.assertEqual(container.GetNumberOfArrays(), 2)
+        assert_array_equal(
+            vtk_to_numpy(accumulator[CUBA.MASS]),
+            [dummy_cuba_value(CUBA.MASS), numpy.nan, numpy.nan, 3.0])
+
+    def test_accumulate_with_projection(self):
+        for size in (None, 0):
+            # given
+            container = vtk.vtkPointData()
+            accumulator = CUBADataAccumulator(
+                container=container, size=size,
+                projection=[CUBA.VELOCITY, CUBA.TEMPERATURE])
+
+            # when
+            accumulator.append(create_data_container(restrict=[CUBA.MASS]))
+            accumulator.append(
+                DataContainer(MASS=1.0, VELOCITY=(0.1, 0.2, 0.3)))
+            accumulator.finalize()
+
+            # then
+            self.assertEqual(len(accumulator), 2)
+            self.assertEqual(accumulator.keys, set([CUBA.VELOCITY]))
+            self.assertEqual(container.GetNumberOfArrays(), 1)
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.VELOCITY]),
+                [[numpy.nan] * 3, [0.1, 0.2, 0.3]])
+
+        # given
+        container = vtk.vtkPointData()
+        accumulator = CUBADataAccumulator(
+            container=container, size=0, projection=[])
+
+        # when
+        accumulator.append(create_data_container())
+        accumulator.finalize()
+
+        # then
+        self.assertEqual(len(accumulator), 1)
+        self.assertEqual(container.GetNumberOfArrays(), 0)
+
+    def test_columnar_with_same_array_types(self):
+        # given
+        cuds_data = [create_data_container(constant=i) for i in range(4)]
+        accumulator = CUBADataAccumulator()
+        columnar = CUBADataAccumulator(size=4)
+
+        # when
+        for data in cuds_data:
+            accumulator.append(data)
+            columnar.append(data)
+
+        # then
+        self.assertEqual(columnar.keys, accumulator.keys)
+        for cuba in accumulator.keys:
+            expected = accumulator[cuba]
+            array = columnar[cuba]
+            self.assertEqual(array.GetDataType(), expected.GetDataType())
+            self.assertEqual(
+                array.GetNumberOfComponents(),
+                expected.GetNumberOfComponents())
+            assert_array_equal(vtk_to_numpy(array), vtk_to_numpy(expected))
+
+    def test_append_many(self):
+        # given
+        cuds_data = [
+            create_data_container(restrict=[CUBA.MASS]),
+            DataContainer(),
+            DataContainer(VELOCITY=(0.1, 0.2, 0.3))]
+
+        for size in (None, 1):
+            # when
+            accumulator = CUBADataAccumulator(size=size)
+            accumulator.append(DataContainer(TEMPERATURE=4.0))
+            accumulator.append_many(iter(cuds_data))
+
+            # then
+            self.assertEqual(len(accumulator), 4)
+            self.assertEqual(
+                accumulator.keys,
+                set([CUBA.TEMPERATURE, CUBA.MASS, CUBA.VELOCITY]))
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.TEMPERATURE]),
+                [4.0, numpy.nan, numpy.nan, numpy.nan])
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.MASS]),
+                [numpy.nan, dummy_cuba_value(CUBA.MASS), numpy.nan, numpy.nan])
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.VELOCITY]),
+                [[numpy.nan] * 3] * 3 + [[0.1, 0.2, 0.3]])
+
+    def test_append_many_on_keys(self):
+        # given
+        cuds_data = [create_data_container(constant=i) for i in range(10)]
+
+        for size in (None, 10):
+            # when
+            accumulator = CUBADataAccumulator(
+                keys=[CUBA.NAME, CUBA.TEMPERATURE], size=size)
+            accumulator.append_many(cuds_data)
+
+            # then
+            self.assertEqual(len(accumulator), 10)
+            self.assertEqual(accumulator.keys, set([CUBA.TEMPERATURE]))
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.TEMPERATURE]),
+                [dummy_cuba_value(
+                    CUBA.TEMPERATURE, constant=i) for i in range(10)])
+
+    def test_append_columns(self):
+        # given
+        columns = {
+            CUBA.TEMPERATURE: numpy.arange(5, dtype=float),
+            CUBA.VELOCITY: numpy.ones((5, 3)),
+            CUBA.NAME: ['name'] * 5}
+
+        for size in (None, 2):
+            # when
+            accumulator = CUBADataAccumulator(size=size)
+            accumulator.append(DataContainer(MASS=3.0))
+            accumulator.append_columns(columns)
+
+            # then
+            self.assertEqual(len(accumulator), 6)
+            self.assertEqual(
+                accumulator.keys,
+                set([CUBA.TEMPERATURE, CUBA.MASS, CUBA.VELOCITY]))
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.TEMPERATURE]),
+                [numpy.nan, 0.0, 1.0, 2.0, 3.0, 4.0])
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.MASS]),
+                [3.0] + [numpy.nan] * 5)
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.VELOCITY]),
+                [[numpy.nan] * 3] + [[1.0] * 3] * 5)
+
+    def test_append_columns_in_place(self):
+        # given
+        accumulator = CUBADataAccumulator()
+        accumulator.append_columns({CUBA.VELOCITY: numpy.ones((4, 3))})
+        velocity = accumulator[CUBA.VELOCITY]
+
+        # when
+        for index in range(1, 100):
+            accumulator.append_columns({
+                CUBA.TEMPERATURE: numpy.full(4, index, dtype=float)})
+
+        # then
+        # the arrays are extended instead of replaced
+        self.assertIs(accumulator[CUBA.VELOCITY], velocity)
+        self.assertEqual(len(accumulator), 400)
+        assert_array_equal(
+            vtk_to_numpy(velocity), [[1.0] * 3] * 4 + [[numpy.nan] * 3] * 396)
+        assert_array_equal(
+            vtk_to_numpy(accumulator[CUBA.TEMPERATURE]),
+            [numpy.nan] * 4 + numpy.repeat(range(1, 100), 4).tolist())
+
+    def test_append_columns_on_keys(self):
+        # given
+        columns = {
+            CUBA.TEMPERATURE: numpy.arange(5, dtype=float),
+            CUBA.VELOCITY: numpy.ones((5, 3))}
+
+        for size in (None, 5):
+            # when
+            accumulator = CUBADataAccumulator(
+                keys=[CUBA.TEMPERATURE, CUBA.MASS], size=size)
+            accumulator.append_columns(columns)
+
+            # then
+            self.assertEqual(len(accumulator), 5)
+            self.assertEqual(
+                accumulator.keys, set([CUBA.TEMPERATURE, CUBA.MASS]))
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.TEMPERATURE]), range(5))
+            assert_array_equal(
+                vtk_to_numpy(accumulator[CUBA.MASS]), [numpy.nan] * 5)
+
+    def test_append_invalid_columns(self):
+        # given
+        accumulator = CUBADataAccumulator()
+
+        # when/then
+        with self.assertRaises(ValueError):
+            accumulator.append_columns({
+                CUBA.TEMPERATURE: numpy.arange(5, dtype=float),
+                CUBA.MASS: numpy.arange(4, dtype=float)})
+
+        # when/then
+        with self.assertRaises(ValueError):
+            accumulator.append_columns({CUBA.VELOCITY: numpy.ones((5, 2))})
+
     def test_raise_on_invalid_key(self):
         # given
         accumulator = CUBADataAccumulator()
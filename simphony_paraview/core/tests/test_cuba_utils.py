@@ -0,0 +1,63 @@
+import unittest
+
+import numpy
+from numpy.testing import assert_array_equal
+from paraview.numpy_support import get_vtk_array_type
+from simphony.core.cuba import CUBA
+
+from simphony_paraview.core.api import (
+    cuba_schema, supported_cuba, default_cuba_value, cuba_value_types,
+    VALUETYPES)
+
+
+class TestCUBASchema(unittest.TestCase):
+
+    def test_schema_of_supported_cuba(self):
+        # when
+        schemas = cuba_schema()
+
+        # then
+        self.assertEqual(set(schemas), supported_cuba())
+        for cuba, schema in schemas.iteritems():
+            default = numpy.asarray(default_cuba_value(cuba))
+            self.assertEqual(schema.dtype, default.dtype)
+            self.assertEqual(schema.shape, default.shape)
+            self.assertEqual(schema.components, default.size)
+            self.assertEqual(
+                schema.vtk_type, get_vtk_array_type(default.dtype))
+            assert_array_equal(schema.default, default)
+
+    def test_schema_is_built_once(self):
+        self.assertIs(cuba_schema(), cuba_schema())
+
+    def test_schema_is_immutable(self):
+        # given
+        schemas = cuba_schema()
+
+        # when/then
+        with self.assertRaises(TypeError):
+            schemas[CUBA.TEMPERATURE] = None
+        with self.assertRaises(ValueError):
+            schemas[CUBA.VELOCITY].default[0] = 1.0
+
+    def test_unsupported_cuba(self):
+        # given
+        schemas = cuba_schema()
+
+        # then
+        self.assertNotIn(CUBA.NAME, schemas)
+        with self.assertRaises(KeyError):
+            schemas[CUBA.NAME]
+
+    def test_cuba_value_types(self):
+        # when
+        types = cuba_value_types()
+
+        # then
+        self.assertEqual(set(types), supported_cuba())
+        self.assertEqual(types[CUBA.TEMPERATURE], VALUETYPES.SCALAR)
+        self.assertEqual(types[CUBA.VELOCITY], VALUETYPES.VECTOR)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@ import itertools
 from functools import partial
 
 import numpy
-from numpy.testing import assert_array_equal
+from mock import patch
+from numpy.testing import assert_array_equal, assert_array_almost_equal
 from paraview.numpy_support import vtk_to_numpy
 from simphony.core.data_container import DataContainer
 from simphony.core.cuba import CUBA
@@ -15,7 +16,8 @@ from simphony.cuds.lattice import (
 from simphony.testing.utils import (
     compare_data_containers, compare_particles, compare_bonds, compare_points)
 
-from simphony_paraview.core.api import cuds2vtk, iter_cells
+from simphony_paraview.core.api import (
+    cuds2vtk, iter_cells, BoxRegion, SphereRegion)
 
 
 class TestCUDS2VTK(unittest.TestCase):
@@ -105,6 +107,39 @@ class TestCUDS2VTK(unittest.TestCase):
             vtk_to_numpy(arrays['TEMPERATURE']),
             [bond_temperature[int(index)] for index in mass])
 
+    def test_with_cuds_particles_and_missing_values(self):
+        # given
+        cuds = Particles('test')
+        cuds.add([
+            Particle(
+                coordinates=(0.0, 1.0, 2.0),
+                data=DataContainer(TEMPERATURE=10.0)),
+            Particle(
+                coordinates=(3.0, 4.0, 5.0),
+                data=DataContainer(VELOCITY=(0.1, 0.2, 0.3))),
+            Particle(coordinates=(6.0, 7.0, 8.0))])
+
+        # when
+        data_set = cuds2vtk(cuds)
+
+        # then
+        self.assertEqual(data_set.GetNumberOfPoints(), 3)
+        point_data = data_set.GetPointData()
+        arrays = {
+            point_data.GetArray(index).GetName():
+            vtk_to_numpy(point_data.GetArray(index))
+            for index in range(point_data.GetNumberOfArrays())}
+        self.assertItemsEqual(arrays.keys(), ['TEMPERATURE', 'VELOCITY'])
+        for index, particle in enumerate(cuds.iter(item_type=CUBA.PARTICLE)):
+            assert_array_equal(
+                data_set.GetPoint(index), particle.coordinates)
+            assert_array_equal(
+                arrays['TEMPERATURE'][index],
+                particle.data.get(CUBA.TEMPERATURE, numpy.nan))
+            assert_array_equal(
+                arrays['VELOCITY'][index],
+                particle.data.get(CUBA.VELOCITY, [numpy.nan] * 3))
+
     def test_source_from_a_xy_plane_rectangular_lattice(self):
         # given
         lattice = make_orthorhombic_lattice(
@@ -200,6 +235,30 @@ class TestCUDS2VTK(unittest.TestCase):
             assert_array_equal(
                 points[point_id], numpy.asarray(position, dtype=points.dtype))
 
+    def test_source_from_a_hexagonal_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice(
+            'test', 0.1, 0.2, (5, 4, 3), (1.0, 2.0, 3.0))
+        self.add_velocity(lattice)
+
+        # when
+        data_set = cuds2vtk(cuds=lattice)
+
+        # then
+        self.assertEqual(data_set.GetClassName(), 'vtkStructuredGrid')
+        self.assertEqual(data_set.GetDimensions(), (5, 4, 3))
+        # the hexahedral cells between the nodes are implicit
+        self.assertEqual(data_set.GetNumberOfCells(), 4 * 3 * 2)
+        points = vtk_to_numpy(data_set.GetPoints().GetData())
+        velocity = vtk_to_numpy(data_set.GetPointData().GetArray('VELOCITY'))
+        # nodes are stored with the x index changing fastest
+        for point_id, index in enumerate(
+                itertools.product(range(3), range(4), range(5))):
+            index = index[::-1]
+            assert_array_almost_equal(
+                points[point_id], lattice.get_coordinate(index), decimal=5)
+            assert_array_equal(velocity[point_id], index)
+
     def test_with_cuds_mesh(self):
         # given
         points = numpy.array([
@@ -302,12 +361,331 @@ class TestCUDS2VTK(unittest.TestCase):
         self.assertEqual(data_set.GetNumberOfPoints(), 0)
         self.assertEqual(data_set.GetNumberOfCells(), 0)
 
+    def test_preview_of_a_cubic_lattice(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.4, (14, 24, 34), (4, 5, 6))
+        self.add_velocity(lattice)
+
+        # when
+        data_set = cuds2vtk(cuds=lattice, preview=1000)
+
+        # then
+        # every third node along each axis gives 5 x 8 x 12 nodes
+        self.assertEqual(data_set.GetDimensions(), (5, 8, 12))
+        assert_array_equal(data_set.GetOrigin(), (4.0, 5.0, 6.0))
+        assert_array_almost_equal(data_set.GetSpacing(), (1.2, 1.2, 1.2))
+        velocity = vtk_to_numpy(data_set.GetPointData().GetArray('VELOCITY'))
+        for point_id in range(data_set.GetNumberOfPoints()):
+            position = numpy.array(data_set.GetPoint(point_id))
+            index = numpy.round((position - (4.0, 5.0, 6.0)) / 0.4)
+            assert_array_equal(velocity[point_id], index)
+
+    def test_preview_of_a_xy_plane_hexagonal_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 1))
+
+        # when
+        data_set = cuds2vtk(cuds=lattice, preview=6)
+
+        # then
+        self.assertEqual(data_set.GetNumberOfPoints(), 3 * 2)
+        for index in itertools.product((0, 2, 4), (0, 2), (0,)):
+            position = lattice.get_coordinate(index)
+            point_id = data_set.FindPoint(position)
+            assert_array_equal(
+                data_set.GetPoint(point_id),
+                numpy.asarray(position, dtype=numpy.float32))
+
+    def test_preview_of_particles(self):
+        # given
+        cuds = Particles('test')
+        uids = cuds.add([
+            Particle(
+                coordinates=(index, 0.0, 0.0),
+                data=DataContainer(TEMPERATURE=index))
+            for index in range(10)])
+        cuds.add([
+            Bond(particles=[uids[0], uids[2]]),
+            Bond(particles=[uids[0], uids[1]]),
+            Bond(particles=[uids[4], uids[6], uids[8]])])
+
+        # when
+        data_set = cuds2vtk(cuds, preview=5)
+
+        # then
+        self.assertEqual(data_set.GetNumberOfPoints(), 5)
+        temperature = vtk_to_numpy(
+            data_set.GetPointData().GetArray('TEMPERATURE'))
+        assert_array_equal(temperature, [0, 2, 4, 6, 8])
+        self.assertEqual(data_set.GetNumberOfCells(), 2)
+        self.assertEqual(
+            [data_set.GetCell(index).GetNumberOfPoints()
+             for index in range(2)], [2, 3])
+
+    def test_preview_of_a_mesh(self):
+        # given
+        cuds = Mesh('test')
+        uids = cuds.add([
+            Point(coordinates=(index, index % 2, 0.0)) for index in range(12)])
+        cuds.add([
+            Edge(points=uids[index:index + 2],
+                 data=DataContainer(TEMPERATURE=index))
+            for index in range(0, 11)])
+
+        # when
+        data_set = cuds2vtk(cuds, preview=3)
+
+        # then
+        # every fourth edge is kept with the points that it uses
+        self.assertEqual(data_set.GetNumberOfCells(), 3)
+        self.assertEqual(data_set.GetNumberOfPoints(), 6)
+        temperature = vtk_to_numpy(
+            data_set.GetCellData().GetArray('TEMPERATURE'))
+        assert_array_equal(temperature, [0, 4, 8])
+        for index, expected in enumerate((0, 4, 8)):
+            ids = data_set.GetCell(index).GetPointIds()
+            self.assertEqual(
+                [data_set.GetPoint(ids.GetId(item))[0] for item in (0, 1)],
+                [expected, expected + 1])
+
+    def test_region_of_a_cubic_lattice(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.4, (14, 24, 34), (4, 5, 6))
+        self.add_velocity(lattice)
+        region = BoxRegion(lower=(4.5, 5.0, 0.0), upper=(5.7, 6.0, 6.8))
+
+        # when
+        data_set = cuds2vtk(cuds=lattice, region=region)
+
+        # then
+        # nodes 2-4 along x, 0-2 along y and 0-2 along z
+        self.assertEqual(data_set.GetDimensions(), (3, 3, 3))
+        assert_array_almost_equal(data_set.GetOrigin(), (4.8, 5.0, 6.0))
+        velocity = vtk_to_numpy(data_set.GetPointData().GetArray('VELOCITY'))
+        assert_array_equal(velocity[0], (2, 0, 0))
+        assert_array_equal(velocity[-1], (4, 2, 2))
+
+    def test_region_of_a_hexagonal_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 1.0, 1.0, (6, 6, 3))
+        self.add_velocity(lattice)
+        region = BoxRegion(lower=(2.9, 0.0, 1.0), upper=(4.1, 1.0, 1.0))
+
+        # when
+        data_set = cuds2vtk(cuds=lattice, region=region)
+
+        # then
+        # the nodes (3, 0, 1), (4, 0, 1) and (3, 1, 1) are inside
+        self.assertEqual(data_set.GetDimensions(), (2, 2, 1))
+        velocity = vtk_to_numpy(data_set.GetPointData().GetArray('VELOCITY'))
+        assert_array_equal(velocity[0], (3, 0, 1))
+        assert_array_equal(velocity[-1], (4, 1, 1))
+
+    def test_region_tests_only_the_nodes_of_its_bounding_box(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 1.0, 1.0, (60, 60, 30))
+        region = BoxRegion(lower=(2.9, 0.0, 1.0), upper=(4.1, 1.0, 1.0))
+        contains = BoxRegion.contains
+
+        # when
+        with patch.object(
+                BoxRegion, 'contains', autospec=True,
+                side_effect=contains) as mock_contains:
+            data_set = cuds2vtk(cuds=lattice, region=region)
+
+        # then
+        self.assertEqual(data_set.GetDimensions(), (2, 2, 1))
+        (_, coordinates), _ = mock_contains.call_args
+        self.assertLess(len(coordinates), 100)
+
+    def test_empty_region_of_a_hexagonal_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 1.0, 1.0, (6, 6, 3))
+        self.add_velocity(lattice)
+        region = BoxRegion(lower=(-5.0, -5.0, -5.0), upper=(-4.0, -4.0, -4.0))
+
+        # when
+        data_set = cuds2vtk(cuds=lattice, region=region)
+
+        # then
+        self.assertEqual(data_set.GetDimensions(), (0, 0, 0))
+        self.assertEqual(data_set.GetNumberOfPoints(), 0)
+        velocity = data_set.GetPointData().GetArray('VELOCITY')
+        self.assertTrue(velocity is None or velocity.GetNumberOfTuples() == 0)
+
+    def test_region_outside_of_a_lattice(self):
+        # given
+        factories = [
+            partial(make_cubic_lattice, 'test', 0.5, (5, 4, 3)),
+            partial(make_hexagonal_lattice, 'test', 0.5, 0.5, (5, 4, 3))]
+        # below the origin along x only
+        region = BoxRegion(lower=(-1.0, 0.0, 0.0), upper=(-0.6, 1.0, 1.0))
+        for factory in factories:
+            lattice = factory()
+            self.add_velocity(lattice)
+            bulk = factory()
+            bulk.node_arrays = lambda keys: {
+                CUBA.VELOCITY: self.velocity_array(bulk.size)}
+
+            # when
+            data_sets = [
+                cuds2vtk(cuds=lattice, region=region),
+                cuds2vtk(cuds=bulk, region=region)]
+
+            # then
+            for data_set in data_sets:
+                self.assertEqual(data_set.GetNumberOfPoints(), 0)
+                velocity = data_set.GetPointData().GetArray('VELOCITY')
+                self.assertTrue(
+                    velocity is None or velocity.GetNumberOfTuples() == 0)
+
+    def test_region_of_particles(self):
+        # given
+        cuds = Particles('test')
+        uids = cuds.add([
+            Particle(
+                coordinates=(index, 0.0, 0.0),
+                data=DataContainer(TEMPERATURE=index))
+            for index in range(10)])
+        cuds.add([
+            Bond(particles=[uids[2], uids[3]]),
+            Bond(particles=[uids[3], uids[6]]),
+            Bond(particles=[uids[3], uids[4], uids[5]])])
+
+        # when
+        data_set = cuds2vtk(
+            cuds, region=SphereRegion(center=(3.5, 0, 0), radius=1.5))
+
+        # then
+        temperature = vtk_to_numpy(
+            data_set.GetPointData().GetArray('TEMPERATURE'))
+        assert_array_equal(temperature, [2, 3, 4, 5])
+        self.assertEqual(data_set.GetNumberOfCells(), 2)
+        self.assertEqual(
+            [data_set.GetCell(index).GetNumberOfPoints()
+             for index in range(2)], [2, 3])
+
+    def test_region_of_a_mesh(self):
+        # given
+        cuds = Mesh('test')
+        uids = cuds.add([
+            Point(coordinates=(index, index % 2, 0.0)) for index in range(12)])
+        cuds.add([
+            Edge(points=uids[index:index + 2],
+                 data=DataContainer(TEMPERATURE=index))
+            for index in range(0, 11)])
+
+        # when
+        data_set = cuds2vtk(
+            cuds, region=BoxRegion(lower=(2, 0, 0), upper=(5, 1, 0)))
+
+        # then
+        self.assertEqual(data_set.GetNumberOfPoints(), 4)
+        temperature = vtk_to_numpy(
+            data_set.GetCellData().GetArray('TEMPERATURE'))
+        assert_array_equal(temperature, [2, 3, 4])
+
+    def test_with_projected_keys(self):
+        # given
+        cuds = Particles('test')
+        uids = cuds.add([
+            Particle(
+                coordinates=(index, 0.0, 0.0),
+                data=DataContainer(
+                    TEMPERATURE=index, MASS=1.0, VELOCITY=(index, 0, 0)))
+            for index in range(4)])
+        cuds.add([Bond(particles=uids[:2], data=DataContainer(MASS=2.0))])
+
+        # when
+        data_set = cuds2vtk(cuds, keys=[CUBA.TEMPERATURE, CUBA.MASS])
+
+        # then
+        point_data = data_set.GetPointData()
+        self.assertEqual(
+            sorted(point_data.GetArray(index).GetName()
+                   for index in range(point_data.GetNumberOfArrays())),
+            ['MASS', 'TEMPERATURE'])
+        self.assertEqual(data_set.GetCellData().GetNumberOfArrays(), 1)
+
+        # when
+        data_set = cuds2vtk(cuds, keys=())
+
+        # then
+        self.assertEqual(data_set.GetPointData().GetNumberOfArrays(), 0)
+        self.assertEqual(data_set.GetNumberOfPoints(), 4)
+
+    def test_lattice_with_node_arrays(self):
+        # given
+        for lattice, region in (
+                (make_cubic_lattice('test', 0.4, (14, 24, 34), (4, 5, 6)),
+                 BoxRegion(lower=(4.5, 5.0, 0.0), upper=(5.7, 6.0, 6.8))),
+                (make_hexagonal_lattice('test', 1.0, 1.0, (6, 6, 3)),
+                 BoxRegion(lower=(2.9, 0.0, 1.0), upper=(4.1, 1.0, 1.0)))):
+            self.add_velocity(lattice)
+            expected = [
+                cuds2vtk(lattice), cuds2vtk(lattice, preview=100),
+                cuds2vtk(lattice, region=region)]
+            requested = []
+
+            def node_arrays(keys):
+                requested.append(keys)
+                return {CUBA.VELOCITY: self.velocity_array(lattice.size)}
+
+            lattice.node_arrays = node_arrays
+
+            # when
+            with patch.object(lattice, 'iter', side_effect=AssertionError):
+                data_sets = [
+                    cuds2vtk(lattice), cuds2vtk(lattice, preview=100),
+                    cuds2vtk(lattice, region=region, keys=[CUBA.VELOCITY])]
+
+            # then
+            self.assertEqual(requested, [None, None, [CUBA.VELOCITY]])
+            for data_set, expected_data_set in zip(data_sets, expected):
+                self.assertEqual(
+                    data_set.GetDimensions(),
+                    expected_data_set.GetDimensions())
+                assert_array_equal(
+                    vtk_to_numpy(
+                        data_set.GetPointData().GetArray('VELOCITY')),
+                    vtk_to_numpy(
+                        expected_data_set.GetPointData().GetArray(
+                            'VELOCITY')))
+
+    def test_lattice_with_node_slabs(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.4, (14, 24, 34), (4, 5, 6))
+        self.add_velocity(lattice)
+        region = BoxRegion(lower=(4.5, 5.0, 6.4), upper=(5.7, 6.0, 7.6))
+        expected = cuds2vtk(lattice, region=region)
+        velocity = self.velocity_array(lattice.size)
+        lattice.iter_node_slabs = lambda keys: (
+            {CUBA.VELOCITY: velocity[:, :, k]} for k in range(34))
+
+        # when
+        with patch.object(lattice, 'iter', side_effect=AssertionError):
+            data_set = cuds2vtk(lattice, region=region)
+
+        # then
+        self.assertEqual(data_set.GetDimensions(), (3, 3, 4))
+        assert_array_equal(
+            vtk_to_numpy(data_set.GetPointData().GetArray('VELOCITY')),
+            vtk_to_numpy(expected.GetPointData().GetArray('VELOCITY')))
+
+    def test_with_invalid_preview(self):
+        with self.assertRaises(ValueError):
+            cuds2vtk(Particles('test'), preview=0)
+
     def add_velocity(self, lattice):
         nodes = [node for node in lattice.iter(item_type=CUBA.NODE)]
         for node in nodes:
             node.data[CUBA.VELOCITY] = node.index
         lattice.update(nodes)
 
+    def velocity_array(self, size):
+        # the node index as the velocity of each node
+        return numpy.indices(size).transpose(1, 2, 3, 0)
+
     def test_with_invalid_cuds(self):
         # given
         cuds = object()
@@ -0,0 +1,120 @@
+import unittest
+
+from mock import patch
+from paraview.simple import Connect, Disconnect
+from simphony.core.cuba import CUBA
+from simphony.cuds import ABCMesh, ABCParticles, ABCLattice
+
+from simphony_paraview.core.api import (
+    default_representation, cuds2vtk, trivial_producer, Session)
+from simphony_paraview.core.testing import (
+    create_example_mesh, create_example_particles, create_example_lattice)
+
+
+class TestDefaultRepresentation(unittest.TestCase):
+
+    def setUp(self):
+        Connect()
+        self.session = Session()
+        self.session.open()
+
+    def tearDown(self):
+        self.session.close()
+        Disconnect()
+
+    def test_lattice_and_mesh(self):
+        for create, kind, expected in (
+                (create_example_lattice, ABCLattice, 'Points'),
+                (create_example_mesh, ABCMesh, 'Surface')):
+            with self.session.view() as scene:
+                # given
+                source = scene.track(trivial_producer(cuds2vtk(create())))
+
+                # when
+                representation = default_representation(
+                    scene, kind, source)
+
+                # then
+                self.assertEqual(representation.Representation, expected)
+
+    def test_mesh_surface(self):
+        module = 'simphony_paraview.core.paraview_utils'
+        with self.session.view() as scene:
+            # given
+            source = scene.track(
+                trivial_producer(cuds2vtk(create_example_mesh())))
+
+            # when
+            with patch('{}.logger'.format(module)) as logger:
+                representation = default_representation(
+                    scene, ABCMesh, source,
+                    select=(CUBA.TEMPERATURE, 'elements'), surface=True)
+
+            # then
+            surface = representation.Input
+            self.assertIsNot(surface, source)
+            self.assertEqual(representation.Representation, 'Surface')
+            self.assertEqual(representation.ColorArrayName, 'TEMPERATURE')
+            # the edges and the triangle are kept while the tetrahedron
+            # and the hexahedron are replaced by their 4 + 6 faces
+            self.assertEqual(
+                surface.GetDataInformation().GetNumberOfCells(), 13)
+            logger.info.assert_called_once_with(
+                'Showing %d exterior faces instead of %d mesh cells (%.1f%%)',
+                13, 5, 260.0)
+
+    def test_particle_modes(self):
+        for mode in ('glyph', 'points', 'gaussian'):
+            with self.session.view() as scene:
+                # given
+                source = scene.track(
+                    trivial_producer(cuds2vtk(create_example_particles())))
+
+                # when
+                representation = default_representation(
+                    scene, ABCParticles, source,
+                    select=(CUBA.TEMPERATURE, 'particles'), mode=mode)
+
+                # then
+                self.assertEqual(representation.ColorArrayName, 'TEMPERATURE')
+                if mode == 'glyph':
+                    self.assertIsNot(representation.Input, source)
+                else:
+                    self.assertIs(representation.Input, source)
+                    self.assertIn(
+                        representation.Representation,
+                        ('Points', 'Point Gaussian'))
+
+    def test_auto_mode_threshold(self):
+        module = 'simphony_paraview.core.paraview_utils'
+        for threshold, glyphs in ((100, True), (1, False)):
+            with self.session.view() as scene:
+                # given
+                source = scene.track(
+                    trivial_producer(cuds2vtk(create_example_particles())))
+
+                # when
+                with patch(
+                        '{}.GLYPH_THRESHOLD'.format(module), threshold):
+                    representation = default_representation(
+                        scene, ABCParticles, source)
+
+                # then
+                self.assertEqual(representation.Input is not source, glyphs)
+
+    def test_invalid_selections(self):
+        with self.session.view() as scene:
+            # given
+            source = scene.track(
+                trivial_producer(cuds2vtk(create_example_mesh())))
+
+            # when/then
+            with self.assertRaises(ValueError):
+                default_representation(scene, ABCMesh, source, mode='sprite')
+            with self.assertRaises(ValueError):
+                default_representation(
+                    scene, ABCMesh, source, select=(CUBA.TEMPERATURE, 'nodes'))
+
+
+if __name__ == '__main__':
+    unittest.main()
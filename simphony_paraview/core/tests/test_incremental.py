@@ -0,0 +1,312 @@
+import unittest
+
+import numpy
+from numpy.testing import assert_array_equal
+from paraview import vtk
+from paraview.numpy_support import vtk_to_numpy
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds import Particle, Particles, Bond, Point, Cell
+
+from simphony_paraview.core.api import IncrementalConverter, cuds2vtk
+from simphony_paraview.core.testing import (
+    create_example_mesh, create_example_particles, create_example_lattice)
+
+
+class TestIncrementalConverter(unittest.TestCase):
+
+    def test_initial_conversion(self):
+        # given
+        for cuds in (create_example_particles(), create_example_mesh()):
+
+            # when
+            converter = IncrementalConverter(cuds)
+
+            # then
+            self.assertDataSetEqual(converter.data_set, cuds2vtk(cuds))
+
+    def test_invalid_container(self):
+        with self.assertRaises(TypeError):
+            IncrementalConverter(create_example_lattice())
+
+    def test_update_modified_particles(self):
+        # given
+        particles = create_example_particles()
+        converter = IncrementalConverter(particles)
+        data_set = converter.data_set
+        particle = particles.get(
+            next(particles.iter(item_type=CUBA.PARTICLE)).uid)
+        particle.coordinates = (5.0, 6.0, 7.0)
+        particle.data = DataContainer(TEMPERATURE=-1.0)
+        particles.update([particle])
+
+        # when
+        result = converter.update(changed=[particle.uid])
+
+        # then
+        self.assertIs(result, data_set)
+        self.assertDataSetEqual(data_set, cuds2vtk(particles))
+
+    def test_update_with_new_particles_and_bonds(self):
+        # given
+        particles = create_example_particles()
+        converter = IncrementalConverter(particles)
+        uids = particles.add([
+            Particle(coordinates=(2.0, 2.0, 2.0)),
+            Particle(
+                coordinates=(3.0, 2.0, 2.0),
+                data=DataContainer(VELOCITY=(1.0, 0.0, 0.0)))])
+        bond = Bond(particles=uids, data=DataContainer(TEMPERATURE=3.0))
+        uids += particles.add([bond])
+
+        # when
+        converter.update(changed=uids)
+
+        # then
+        self.assertDataSetEqual(converter.data_set, cuds2vtk(particles))
+
+    def test_update_with_removed_items(self):
+        # given
+        particles = create_example_particles()
+        converter = IncrementalConverter(particles)
+        bond = next(particles.iter(item_type=CUBA.BOND))
+        particle = particles.get(bond.particles[1])
+        particles.remove([bond.uid])
+
+        # when/then
+        with self.assertRaises(ValueError):
+            converter.update(removed=[bond.uid, particle.uid])
+
+        # given
+        particles = create_example_particles()
+        converter = IncrementalConverter(particles)
+        bonds = list(particles.iter(item_type=CUBA.BOND))
+        particle = particles.get(bonds[-1].particles[-1])
+        removed = [bonds[-1].uid, particle.uid]
+        particles.remove(removed)
+
+        # when
+        converter.update(removed=removed)
+
+        # then
+        self.assertSameItems(converter.data_set, cuds2vtk(particles))
+        with self.assertRaises(KeyError):
+            converter.update(removed=removed)
+
+    def test_update_with_removed_items_in_place(self):
+        # given
+        particles = Particles('test')
+        uids = particles.add([
+            Particle(
+                coordinates=(index, 0.0, 0.0),
+                data=DataContainer(TEMPERATURE=index))
+            for index in range(100)])
+        bonds = particles.add([
+            Bond(particles=uids[index:index + 2])
+            for index in range(0, 50, 2)])
+        bonds += particles.add([Bond(particles=uids[98:])])
+        converter = IncrementalConverter(particles)
+        data_set = converter.data_set
+        points, cells = data_set.GetPoints().GetData(), converter._cell_array()
+        coordinates = vtk_to_numpy(points).copy()
+        temperature = vtk_to_numpy(
+            data_set.GetPointData().GetArray('TEMPERATURE')).copy()
+        # every line is stored as (2, first, second)
+        lines = vtk_to_numpy(cells.GetData()).reshape(-1, 3).copy()
+        removed = [bonds[5], uids[60]]
+        particles.remove(removed)
+
+        # when
+        converter.update(removed=removed)
+
+        # then
+        self.assertIs(data_set.GetPoints().GetData(), points)
+        self.assertIs(converter._cell_array(), cells)
+        # only the rows of the removed items are overwritten, by the
+        # last particle and by the last bond that refers to it
+        self.assertEqual(data_set.GetNumberOfPoints(), 99)
+        self.assertEqual(data_set.GetNumberOfCells(), 25)
+        new_coordinates = vtk_to_numpy(points)
+        new_temperature = vtk_to_numpy(
+            data_set.GetPointData().GetArray('TEMPERATURE'))
+        new_lines = vtk_to_numpy(cells.GetData()).reshape(-1, 3)
+        assert_array_equal(numpy.flatnonzero(
+            (new_coordinates != coordinates[:99]).any(axis=1)), [60])
+        assert_array_equal(
+            numpy.flatnonzero(new_temperature != temperature[:99]), [60])
+        assert_array_equal(numpy.flatnonzero(
+            (new_lines != lines[:25]).any(axis=1)), [5])
+        assert_array_equal(new_lines[5], [2, 98, 60])
+        self.assertSameItems(data_set, cuds2vtk(particles))
+
+    def test_update_with_moved_bond(self):
+        # given
+        particles = create_example_particles()
+        converter = IncrementalConverter(particles)
+        bond = list(particles.iter(item_type=CUBA.BOND))[-1]
+        old = bond.particles[-1]
+        uids = particles.add([Particle(coordinates=(2.0, 2.0, 2.0))])
+        bond.particles = bond.particles[:-1] + uids
+        particles.update([bond])
+        particles.remove([old])
+
+        # when
+        converter.update(changed=uids + [bond.uid], removed=[old])
+
+        # then
+        self.assertSameItems(converter.data_set, cuds2vtk(particles))
+
+    def test_update_with_new_cells_in_place(self):
+        # given
+        for cuds in (create_example_particles(), create_example_mesh()):
+            converter = IncrementalConverter(cuds)
+            data_set = converter.data_set
+            if isinstance(data_set, vtk.vtkPolyData):
+                cells = data_set.GetLines()
+                points = list(cuds.iter(item_type=CUBA.PARTICLE))
+                items = [Bond(particles=[points[0].uid, points[-1].uid])]
+            else:
+                cells = data_set.GetCells()
+                points = list(cuds.iter(item_type=CUBA.POINT))
+                items = [
+                    Cell(points=[point.uid for point in points[:4]]),
+                    Cell(points=[point.uid for point in points[4:8]])]
+            data_set.GetCell(0)
+            uids = cuds.add(items)
+
+            # when
+            converter.update(changed=uids)
+
+            # then
+            self.assertIs(converter._cell_array(), cells)
+            self.assertDataSetEqual(data_set, cuds2vtk(cuds))
+
+    def test_update_mesh(self):
+        # given
+        mesh = create_example_mesh()
+        converter = IncrementalConverter(mesh)
+        points = list(mesh.iter(item_type=CUBA.POINT))
+        cells = list(mesh.iter(item_type=CUBA.CELL))
+        tetra, hexahedron = cells
+        hexahedron.points = list(reversed(hexahedron.points))
+        tetra.points = tetra.points[:3] + [points[11].uid]
+        tetra.data = DataContainer(TEMPERATURE=10)
+        points[0].coordinates = (-1.0, -1.0, -1.0)
+        mesh.update(cells + points[:1])
+
+        # when
+        converter.update(
+            changed=[tetra.uid, hexahedron.uid, points[0].uid])
+
+        # then
+        self.assertDataSetEqual(converter.data_set, cuds2vtk(mesh))
+
+    def test_update_mesh_with_new_and_removed_cells(self):
+        # given
+        mesh = create_example_mesh()
+        converter = IncrementalConverter(mesh)
+        edge = next(mesh.iter(item_type=CUBA.EDGE))
+        mesh.remove([edge.uid])
+        point_uids = mesh.add([Point(coordinates=(0.5, 0.5, 0.5))])
+        tetra = next(mesh.iter(item_type=CUBA.CELL))
+        cell = Cell(
+            points=tetra.points[:3] + point_uids,
+            data=DataContainer(TEMPERATURE=7))
+        mesh.add([cell])
+
+        # when
+        converter.update(
+            changed=point_uids + [cell.uid], removed=[edge.uid])
+
+        # then
+        data_set = converter.data_set
+        expected = cuds2vtk(mesh)
+        self.assertEqual(
+            data_set.GetNumberOfCells(), expected.GetNumberOfCells())
+        self.assertEqual(
+            data_set.GetNumberOfPoints(), expected.GetNumberOfPoints())
+        last = data_set.GetNumberOfCells() - 1
+        self.assertEqual(
+            data_set.GetCellType(last), vtk.vtkTetra().GetCellType())
+        ids = data_set.GetCell(last).GetPointIds()
+        self.assertEqual(
+            [ids.GetId(index) for index in range(4)], [0, 1, 2, 12])
+        temperature = data_set.GetCellData().GetArray('TEMPERATURE')
+        self.assertEqual(temperature.GetValue(last), 7)
+
+    def assertDataSetEqual(self, data_set, expected):
+        self.assertEqual(
+            data_set.GetNumberOfPoints(), expected.GetNumberOfPoints())
+        self.assertEqual(
+            data_set.GetNumberOfCells(), expected.GetNumberOfCells())
+        assert_array_equal(
+            vtk_to_numpy(data_set.GetPoints().GetData()),
+            vtk_to_numpy(expected.GetPoints().GetData()))
+        for index in range(expected.GetNumberOfCells()):
+            cell = data_set.GetCell(index)
+            expected_cell = expected.GetCell(index)
+            self.assertEqual(cell.GetCellType(), expected_cell.GetCellType())
+            ids, expected_ids = cell.GetPointIds(), expected_cell.GetPointIds()
+            self.assertEqual(
+                [ids.GetId(item) for item in range(ids.GetNumberOfIds())],
+                [expected_ids.GetId(item)
+                 for item in range(expected_ids.GetNumberOfIds())])
+        for data, expected_data in (
+                (data_set.GetPointData(), expected.GetPointData()),
+                (data_set.GetCellData(), expected.GetCellData())):
+            names = sorted(
+                expected_data.GetArray(index).GetName()
+                for index in range(expected_data.GetNumberOfArrays()))
+            self.assertEqual(
+                sorted(data.GetArray(index).GetName()
+                       for index in range(data.GetNumberOfArrays())),
+                names)
+            for name in names:
+                assert_array_equal(
+                    vtk_to_numpy(data.GetArray(name)),
+                    vtk_to_numpy(expected_data.GetArray(name)))
+
+    def assertSameItems(self, data_set, expected):
+        """ Compare the points and cells of two datasets in any order.
+
+        """
+        self.assertEqual(
+            sorted(self.item_rows(data_set)), sorted(self.item_rows(expected)))
+
+    def item_rows(self, data_set):
+        """ The coordinates and data of the points and of the cells.
+
+        """
+        coordinates = vtk_to_numpy(data_set.GetPoints().GetData())
+        rows = []
+        for data, count in (
+                (data_set.GetPointData(), data_set.GetNumberOfPoints()),
+                (data_set.GetCellData(), data_set.GetNumberOfCells())):
+            arrays = sorted(
+                (array.GetName(), vtk_to_numpy(array).reshape(
+                    count, array.GetNumberOfComponents()))
+                for array in map(data.GetArray, range(
+                    data.GetNumberOfArrays())))
+            # the default value of missing data is nan
+            rows.append([
+                [(name, [None if value != value else value
+                         for value in values[item].tolist()])
+                 for name, values in arrays]
+                for item in range(count)])
+        point_rows, cell_rows = rows
+        items = [
+            ('point', coordinates[index].tolist(), point_rows[index])
+            for index in range(data_set.GetNumberOfPoints())]
+        for index in range(data_set.GetNumberOfCells()):
+            cell = data_set.GetCell(index)
+            ids = cell.GetPointIds()
+            items.append((
+                'cell', cell.GetCellType(),
+                [coordinates[ids.GetId(item)].tolist()
+                 for item in range(ids.GetNumberOfIds())],
+                cell_rows[index]))
+        return items
+
+
+if __name__ == '__main__':
+    unittest.main()
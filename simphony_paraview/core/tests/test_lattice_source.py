@@ -0,0 +1,104 @@
+import gc
+import unittest
+
+from numpy.testing import assert_array_equal
+from paraview import vtk
+from paraview.numpy_support import vtk_to_numpy
+from paraview.simple import Connect, Disconnect, Delete, ExtractSubset
+from simphony.core.cuba import CUBA
+from simphony.cuds.lattice import make_cubic_lattice, make_hexagonal_lattice
+
+from simphony_paraview.core.api import lattice_source, cuds2vtk, BoxRegion
+from simphony_paraview.core.source_registry import sources
+
+
+class TestLatticeSource(unittest.TestCase):
+
+    def setUp(self):
+        Connect()
+        self.lattice = make_cubic_lattice('test', 0.5, (4, 3, 5), (1, 2, 3))
+        nodes = list(self.lattice.iter(item_type=CUBA.NODE))
+        for node in nodes:
+            node.data[CUBA.VELOCITY] = node.index
+            node.data[CUBA.TEMPERATURE] = sum(node.index)
+        self.lattice.update(nodes)
+
+    def tearDown(self):
+        Disconnect()
+
+    def test_information(self):
+        # when
+        source = lattice_source(self.lattice)
+
+        # then
+        algorithm = source.GetClientSideObject()
+        executive = algorithm.GetExecutive()
+        info = executive.GetOutputInformation(0)
+        self.assertEqual(
+            info.Get(executive.WHOLE_EXTENT()), (0, 3, 0, 2, 0, 4))
+        self.assertEqual(info.Get(vtk.vtkDataObject.ORIGIN()), (1, 2, 3))
+        self.assertEqual(
+            info.Get(vtk.vtkDataObject.SPACING()), (0.5, 0.5, 0.5))
+        # no node has been copied yet
+        self.assertEqual(
+            algorithm.GetOutputDataObject(0).GetNumberOfPoints(), 0)
+
+    def test_update_extent(self):
+        # given
+        source = lattice_source(self.lattice)
+        subset = ExtractSubset(Input=source, VOI=[1, 2, 0, 1, 3, 3])
+        region = BoxRegion(lower=(1.5, 2.0, 4.5), upper=(2.0, 2.5, 4.5))
+        expected = cuds2vtk(self.lattice, region=region)
+
+        # when
+        subset.UpdatePipeline()
+
+        # then
+        output = source.GetClientSideObject().GetOutputDataObject(0)
+        self.assertEqual(output.GetExtent(), (1, 2, 0, 1, 3, 3))
+        self.assertEqual(output.GetPoint(0), (1.5, 2.0, 4.5))
+        for name in ('VELOCITY', 'TEMPERATURE'):
+            assert_array_equal(
+                vtk_to_numpy(output.GetPointData().GetArray(name)),
+                vtk_to_numpy(expected.GetPointData().GetArray(name)))
+
+    def test_region_and_keys(self):
+        # given
+        region = BoxRegion(lower=(1.5, 2.0, 4.5), upper=(2.0, 2.5, 4.5))
+        source = lattice_source(
+            self.lattice, region=region, keys=(CUBA.TEMPERATURE,))
+
+        # when
+        source.UpdatePipeline()
+
+        # then
+        output = source.GetClientSideObject().GetOutputDataObject(0)
+        self.assertEqual(output.GetExtent(), (1, 2, 0, 1, 3, 3))
+        point_data = output.GetPointData()
+        self.assertEqual(point_data.GetNumberOfArrays(), 1)
+        self.assertEqual(point_data.GetArray(0).GetName(), 'TEMPERATURE')
+
+    def test_deleted_source(self):
+        # given
+        source = lattice_source(self.lattice)
+        number_of_sources = len(sources)
+
+        # when
+        Delete(source)
+        del source
+        gc.collect()
+
+        # then
+        self.assertEqual(len(sources), number_of_sources - 1)
+
+    def test_non_orthogonal_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 3))
+
+        # when/then
+        with self.assertRaises(ValueError):
+            lattice_source(lattice)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,14 @@
 import unittest
 
 from hypothesis import given
-from paraview import servermanager
+from mock import patch
+from paraview import servermanager, vtkConstants
 from paraview.simple import Connect, Disconnect, GetActiveSource
 
-from simphony_paraview.core.api import loaded_in_paraview
-from simphony_paraview.core.testing import cuds_containers
+from simphony_paraview.core.api import (
+    loaded_in_paraview, IncrementalConverter)
+from simphony_paraview.core.testing import (
+    cuds_containers, create_example_particles, create_example_lattice)
 
 
 class TestLoadedInParaview(unittest.TestCase):
@@ -45,3 +48,58 @@ class TestLoadedInParaview(unittest.TestCase):
         finally:
             if servermanager.ActiveConnection is connection:
                 Disconnect()
+
+    @given(cuds_containers)
+    def test_loaded_in_memory(self, setup):
+        # given
+        cuds, kind = setup
+        module = 'simphony_paraview.core.paraview_utils'
+
+        # when/then
+        with patch('{}._write_data_set'.format(module)) as write:
+            with loaded_in_paraview(cuds) as source:
+                info = source.GetDataInformation()
+                self.assertEqual(info.GetDataSetType(), kind)
+            self.assertFalse(write.called)
+
+    @given(cuds_containers)
+    def test_loaded_from_file_with_remote_connection(self, setup):
+        # given
+        cuds, kind = setup
+        module = 'simphony_paraview.core.paraview_utils'
+
+        # when/then
+        with patch('{}.is_remote'.format(module), return_value=True):
+            with patch('{}.trivial_producer'.format(module)) as producer:
+                with loaded_in_paraview(cuds) as source:
+                    info = source.GetDataInformation()
+                    self.assertEqual(info.GetDataSetType(), kind)
+                self.assertFalse(producer.called)
+
+    def test_loaded_with_converter(self):
+        # given
+        cuds = create_example_particles()
+        converter = IncrementalConverter(cuds)
+        module = 'simphony_paraview.core.paraview_utils'
+
+        # when/then
+        with patch('{}.cuds2vtk'.format(module)) as cuds2vtk:
+            with loaded_in_paraview(cuds, converter) as source:
+                info = source.GetDataInformation()
+                self.assertEqual(info.GetNumberOfPoints(), 4)
+            self.assertFalse(cuds2vtk.called)
+
+    def test_orthogonal_lattice_is_streamed(self):
+        # given
+        cuds = create_example_lattice()
+        module = 'simphony_paraview.core.paraview_utils'
+
+        # when/then
+        with patch('{}.cuds2vtk'.format(module)) as cuds2vtk:
+            with loaded_in_paraview(cuds) as source:
+                source.UpdatePipeline()
+                info = source.GetDataInformation()
+                self.assertEqual(
+                    info.GetDataSetType(), vtkConstants.VTK_IMAGE_DATA)
+                self.assertEqual(info.GetNumberOfPoints(), 5 * 10 * 12)
+            self.assertFalse(cuds2vtk.called)
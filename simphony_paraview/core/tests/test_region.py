@@ -0,0 +1,55 @@
+import unittest
+
+from numpy.testing import assert_array_equal
+
+from simphony_paraview.core.api import BoxRegion, SphereRegion
+
+
+class TestBoxRegion(unittest.TestCase):
+
+    def test_contains(self):
+        # given
+        region = BoxRegion(lower=(0, 0, 0), upper=(1, 2, 1))
+
+        # when
+        inside = region.contains(
+            [(0.5, 0.5, 0.5), (0.5, 3.0, 0.5), (1.0, 2.0, 0.0)])
+
+        # then
+        assert_array_equal(inside, [True, False, True])
+        assert_array_equal(region.contains((-0.1, 0.0, 0.0)), [False])
+
+    def test_bounds(self):
+        region = BoxRegion(lower=(0, 0, 0), upper=(1, 2, 1))
+        self.assertEqual(region.bounds, ((0.0, 0.0, 0.0), (1.0, 2.0, 1.0)))
+        self.assertEqual(region, BoxRegion((0.0, 0.0, 0.0), [1, 2, 1]))
+
+    def test_invalid_box(self):
+        with self.assertRaises(ValueError):
+            BoxRegion(lower=(0, 0, 0), upper=(1, -1, 1))
+
+
+class TestSphereRegion(unittest.TestCase):
+
+    def test_contains(self):
+        # given
+        region = SphereRegion(center=(1, 1, 1), radius=1)
+
+        # when
+        inside = region.contains(
+            [(1.5, 1.5, 1.5), (2.0, 2.0, 1.0), (2.0, 1.0, 1.0)])
+
+        # then
+        assert_array_equal(inside, [True, False, True])
+
+    def test_bounds(self):
+        region = SphereRegion(center=(1, 1, 1), radius=0.5)
+        self.assertEqual(region.bounds, ((0.5, 0.5, 0.5), (1.5, 1.5, 1.5)))
+
+    def test_invalid_sphere(self):
+        with self.assertRaises(ValueError):
+            SphereRegion(center=(0, 0, 0), radius=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import unittest
+
+from mock import patch
+from paraview import servermanager
+from paraview.simple import Connect, Disconnect
+
+from simphony_paraview.core.api import (
+    Session, ConversionCache, loaded_in_paraview, connection_token)
+from simphony_paraview.core.testing import create_example_mesh
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        if servermanager.ActiveConnection is not None:
+            Disconnect()
+
+    def tearDown(self):
+        if servermanager.ActiveConnection is not None:
+            raise RuntimeError('There is still an active connection')
+
+    def test_session_owns_the_connection(self):
+        # when
+        with Session() as session:
+
+            # then
+            self.assertTrue(session.is_open)
+            self.assertIs(
+                servermanager.ActiveConnection, session.connection)
+
+        # then
+        self.assertFalse(session.is_open)
+        self.assertIsNone(servermanager.ActiveConnection)
+
+    def test_session_with_active_connection(self):
+        # given
+        connection = Connect()
+        try:
+
+            # when
+            with Session() as session:
+                self.assertIs(session.connection, connection)
+
+            # then
+            self.assertIs(servermanager.ActiveConnection, connection)
+        finally:
+            Disconnect()
+
+    def test_views_are_reused_and_reset(self):
+        # given
+        with Session() as session:
+            with session.view() as scene:
+                view = scene.view
+                background = list(view.Background)
+                view.Background = (0.2, 0.2, 0.2)
+                view.GetActiveCamera().Elevation(45)
+
+            # when
+            with session.view() as scene:
+
+                # then
+                self.assertIs(scene.view, view)
+                self.assertEqual(list(view.Background), background)
+                self.assertEqual(
+                    view.GetActiveCamera().GetPosition(), (0.0, 0.0, 1.0))
+
+                # when
+                with session.view() as other:
+
+                    # then
+                    self.assertIsNot(other.view, view)
+
+            self.assertEqual(session.number_of_views, 2)
+
+    def test_views_are_deleted_on_close(self):
+        # given
+        session = Session()
+        session.open()
+        with session.view() as scene:
+            view = scene.view
+
+        # when
+        with patch('simphony_paraview.core.session.Delete') as delete:
+            session.close()
+
+        # then
+        delete.assert_called_once_with(view)
+        self.assertEqual(session.number_of_views, 0)
+
+    def test_representations_are_removed_on_release(self):
+        # given
+        cuds = create_example_mesh()
+        with Session() as session:
+            with loaded_in_paraview(cuds) as source:
+                with session.view() as scene:
+                    representation = scene.show(source)
+                    view = scene.view
+                    self.assertIn(representation, view.Representations)
+
+                # then
+                self.assertNotIn(representation, view.Representations)
+
+    def test_cached_sources_are_reused_in_the_session(self):
+        # given
+        cuds = create_example_mesh()
+        cache = ConversionCache()
+
+        # when
+        with Session(cache=cache):
+            with loaded_in_paraview(cuds, cache=cache) as first:
+                pass
+            with loaded_in_paraview(cuds, cache=cache) as second:
+                pass
+
+            # then
+            self.assertIs(first, second)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # then
+        self.assertEqual(
+            [key[0] for key in cache.keys()], ['data_set'])
+
+    def test_cached_sources_count_their_dataset(self):
+        # given
+        cuds = create_example_mesh()
+        cache = ConversionCache()
+
+        # when
+        with Session(cache=cache):
+            with loaded_in_paraview(cuds, cache=cache):
+                pass
+
+            # then
+            data_set = cache.data_set(cuds)
+            self.assertEqual(
+                cache.nbytes, 2 * data_set.GetActualMemorySize() * 1024)
+
+    def test_connection_tokens_are_not_reused(self):
+        # given
+        with Session() as session:
+            token = connection_token(session.connection)
+            self.assertEqual(connection_token(session.connection), token)
+
+        # when
+        with Session() as session:
+            other = connection_token(session.connection)
+
+        # then
+        self.assertNotEqual(other, token)
+
+    def test_view_of_closed_session(self):
+        # given
+        session = Session()
+
+        # when/then
+        with self.assertRaises(RuntimeError):
+            with session.view():
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import gc
+import unittest
+
+from mock import Mock
+from paraview import vtk
+
+from simphony_paraview.core.api import SourceRegistry
+from simphony_paraview.core.testing import create_example_particles
+
+
+class TestSourceRegistry(unittest.TestCase):
+
+    def test_register(self):
+        # given
+        registry = SourceRegistry()
+        cuds = create_example_particles()
+
+        # when
+        token = registry.register(cuds, 10, None)
+
+        # then
+        self.assertIn(token, registry)
+        self.assertEqual(len(registry), 1)
+        entry = registry.get(token)
+        self.assertIs(entry[0], cuds)
+        self.assertEqual(entry[1:], (10, None))
+        self.assertNotEqual(registry.register(cuds), token)
+
+    def test_released_container(self):
+        # given
+        registry = SourceRegistry()
+        cuds = create_example_particles()
+        token = registry.register(cuds)
+
+        # when
+        del cuds
+        gc.collect()
+
+        # then
+        self.assertNotIn(token, registry)
+        with self.assertRaises(RuntimeError):
+            registry.get(token)
+
+    def test_unregister(self):
+        # given
+        registry = SourceRegistry()
+        cuds = create_example_particles()
+        token = registry.register(cuds)
+
+        # when
+        registry.unregister(token)
+        registry.unregister(token)
+
+        # then
+        self.assertEqual(len(registry), 0)
+        with self.assertRaises(RuntimeError):
+            registry.get(token)
+
+    def test_deleted_proxy(self):
+        # given
+        registry = SourceRegistry()
+        cuds = create_example_particles()
+        token = registry.register(cuds)
+        proxy = Mock(SMProxy=vtk.vtkObject())
+        registry.track(proxy, token)
+        self.assertIn(token, registry)
+
+        # when
+        del proxy
+        gc.collect()
+
+        # then
+        self.assertNotIn(token, registry)
+
+
+if __name__ == '__main__':
+    unittest.main()
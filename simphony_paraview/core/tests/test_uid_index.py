@@ -0,0 +1,158 @@
+import unittest
+import uuid
+
+import numpy
+from mock import patch
+from numpy.testing import assert_array_equal
+
+from simphony_paraview.core.api import UIDIndex
+
+
+class TestUIDIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.uids = [uuid.uuid4() for _ in range(100)]
+
+    def test_empty(self):
+        # when
+        index = UIDIndex()
+
+        # then
+        self.assertEqual(len(index), 0)
+        self.assertNotIn(self.uids[0], index)
+        self.assertEqual(len(index.indices([])), 0)
+        with self.assertRaises(KeyError):
+            index[self.uids[0]]
+
+    def test_indices(self):
+        # given
+        uids = self.uids
+
+        # when
+        index = UIDIndex(uids)
+
+        # then
+        self.assertEqual(len(index), 100)
+        assert_array_equal(index.indices(uids), range(100))
+        assert_array_equal(
+            index.indices(reversed(uids)), list(reversed(range(100))))
+        assert_array_equal(
+            index.indices([uids[7], uids[7], uids[3]]), [7, 7, 3])
+        for position, uid in enumerate(uids):
+            self.assertIn(uid, index)
+            self.assertEqual(index[uid], position)
+
+    def test_extend(self):
+        # given
+        uids = self.uids
+        index = UIDIndex(uids[:40])
+        assert_array_equal(index.indices(uids[:40]), range(40))
+
+        # when
+        index.extend(uids[40:90])
+        for uid in uids[90:]:
+            index.append(uid)
+
+        # then
+        self.assertEqual(len(index), 100)
+        assert_array_equal(index.indices(uids), range(100))
+
+    def test_extend_merges_into_the_lookup_table(self):
+        # given
+        uids = self.uids
+        index = UIDIndex(uids[:90])
+        index.remove([uids[5]])
+        assert_array_equal(index.indices(uids[6:89]), range(6, 89))
+
+        # when
+        with patch.object(numpy, 'lexsort', wraps=numpy.lexsort) as lexsort:
+            index.extend(uids[90:])
+            indices = index.indices(uids[:5] + uids[6:])
+
+        # then
+        assert_array_equal(
+            indices, range(5) + range(6, 89) + [5] + range(89, 99))
+        # only the new uids are sorted
+        self.assertEqual(lexsort.call_count, 1)
+        self.assertEqual(len(lexsort.call_args[0][0][0]), 10)
+
+    def test_side_table_is_merged(self):
+        # given
+        uids = [uuid.uuid4() for _ in range(3000)]
+        index = UIDIndex(uids[:1000])
+        index.find(uids[:1])
+
+        # when
+        for start in range(1000, 3000, 100):
+            index.extend(uids[start:start + 100])
+            index.remove(uids[start - 1000:start - 950])
+        index.extend(uids[:50])
+
+        # then
+        self.assertEqual(len(index), 2050)
+        self.assertLess(len(index._new_keys), 1024)
+        remaining = [uid for uid in uids if uid in index]
+        self.assertEqual(len(remaining), 2050)
+        assert_array_equal(
+            numpy.sort(index.indices(remaining)), range(2050))
+        self.assertEqual(index[uids[0]], 2000)
+
+    def test_find(self):
+        # given
+        uids = self.uids
+        index = UIDIndex(uids[:50])
+
+        # when
+        indices = index.find([uids[10], uids[60], uids[0]])
+
+        # then
+        assert_array_equal(indices, [10, -1, 0])
+
+    def test_remove(self):
+        # given
+        uids = self.uids
+        index = UIDIndex(uids)
+
+        # when
+        sources, targets = index.remove([uids[3], uids[50], uids[99]])
+
+        # then
+        self.assertEqual(len(index), 97)
+        # only the uids at the end are moved into the free indices
+        assert_array_equal(sources, [97, 98])
+        assert_array_equal(targets, [3, 50])
+        remaining = uids[:3] + [uids[97]] + uids[4:50] + [uids[98]] + \
+            uids[51:97]
+        assert_array_equal(index.indices(remaining), range(97))
+        self.assertNotIn(uids[50], index)
+        with self.assertRaises(KeyError):
+            index.remove([uids[3]])
+
+    def test_uids_with_extreme_values(self):
+        # given
+        uids = [
+            uuid.UUID(int=0),
+            uuid.UUID(int=(1 << 128) - 1),
+            uuid.UUID(int=(1 << 64) - 1),
+            uuid.UUID(int=1 << 64)]
+
+        # when
+        index = UIDIndex(uids)
+
+        # then
+        assert_array_equal(index.indices(uids), range(4))
+
+    def test_missing_uids(self):
+        # given
+        index = UIDIndex(self.uids)
+        missing = uuid.uuid4()
+
+        # when/then
+        with self.assertRaises(KeyError) as context:
+            index.indices([self.uids[0], missing])
+        self.assertIn(str(missing), str(context.exception))
+        self.assertNotIn(missing, index)
+
+
+if __name__ == '__main__':
+    unittest.main()
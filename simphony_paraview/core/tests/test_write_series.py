@@ -0,0 +1,160 @@
+import unittest
+import tempfile
+import shutil
+import os
+from xml.etree import ElementTree
+
+from mock import patch
+
+from simphony_paraview.core.api import (
+    write_series, PVDCollection, BackgroundWriter)
+from simphony_paraview.core.testing import (
+    create_example_mesh, create_example_particles)
+
+
+class TestWriteSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_write_series(self):
+        # given
+        states = [create_example_mesh() for _ in range(3)]
+        directory = os.path.join(self.temp_dir, 'output')
+
+        # when
+        filename = write_series(states, directory, times=[0.0, 0.5, 1.0])
+
+        # then
+        self.assertEqual(filename, os.path.join(directory, 'series.pvd'))
+        datasets = self.read_collection(filename)
+        self.assertEqual(
+            [dataset.get('timestep') for dataset in datasets],
+            ['0.0', '0.5', '1.0'])
+        for step, dataset in enumerate(datasets):
+            name = 'series_{:06d}.vtu'.format(step)
+            self.assertEqual(dataset.get('file'), name)
+            with open(os.path.join(directory, name), 'rb') as handle:
+                self.assertTrue(handle.read(8) == '<VTKFile')
+
+    def test_write_series_with_default_times(self):
+        # given
+        states = [create_example_particles() for _ in range(2)]
+
+        # when
+        filename = write_series(states, self.temp_dir, name='particles')
+
+        # then
+        datasets = self.read_collection(filename)
+        self.assertEqual(
+            [dataset.get('timestep') for dataset in datasets],
+            ['0.0', '1.0'])
+        self.assertEqual(
+            [dataset.get('file') for dataset in datasets],
+            ['particles_000000.vtp', 'particles_000001.vtp'])
+
+    def test_write_series_with_static_geometry(self):
+        # given
+        states = [create_example_mesh() for _ in range(3)]
+
+        # when
+        filename = write_series(
+            states, self.temp_dir, times=[0.0, 0.5, 1.0],
+            static_geometry=True)
+
+        # then
+        self.assertEqual(filename, os.path.join(self.temp_dir, 'series.xmf'))
+        root = ElementTree.parse(filename).getroot()
+        grids = root.find('Domain/Grid').findall('Grid')
+        self.assertEqual(
+            [grid.find('Time').get('Value') for grid in grids],
+            ['0.0', '0.5', '1.0'])
+        self.assertEqual(
+            set(grid.find('Geometry/DataItem').text for grid in grids),
+            set(['series_geometry_000000.bin']))
+
+    def test_write_series_with_missing_times(self):
+        # given
+        states = [create_example_mesh() for _ in range(3)]
+
+        # when/then
+        with self.assertRaises(ValueError):
+            write_series(states, self.temp_dir, times=[0.0, 1.0])
+
+    def test_write_series_propagates_write_errors(self):
+        # given
+        states = [create_example_mesh() for _ in range(3)]
+        function = 'simphony_paraview.core.paraview_utils._write_data_set'
+
+        # when/then
+        with patch(function, side_effect=IOError('disk full')):
+            with self.assertRaises(IOError):
+                write_series(states, self.temp_dir)
+
+    def read_collection(self, filename):
+        root = ElementTree.parse(filename).getroot()
+        self.assertEqual(root.get('type'), 'Collection')
+        return root.find('Collection').findall('DataSet')
+
+
+class TestPVDCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_append_and_write(self):
+        # given
+        filename = os.path.join(self.temp_dir, 'test.pvd')
+        collection = PVDCollection(filename)
+
+        # when
+        collection.append(os.path.join(self.temp_dir, 'a', 'b.vtu'), 0.1)
+        collection.append(os.path.join(self.temp_dir, 'c.vtu'), 2, part=1)
+        collection.write()
+
+        # then
+        self.assertEqual(len(collection), 2)
+        root = ElementTree.parse(filename).getroot()
+        datasets = root.find('Collection').findall('DataSet')
+        self.assertEqual(
+            [(dataset.get('file'), dataset.get('timestep'),
+              dataset.get('part')) for dataset in datasets],
+            [('a/b.vtu', '0.1', '0'), ('c.vtu', '2.0', '1')])
+
+
+class TestBackgroundWriter(unittest.TestCase):
+
+    def test_tasks_are_executed_in_order(self):
+        # given
+        results = []
+
+        # when
+        with BackgroundWriter(maxsize=1) as writer:
+            for value in range(10):
+                writer.submit(results.append, value)
+
+        # then
+        self.assertEqual(results, range(10))
+
+    def test_error_is_raised_on_close(self):
+        # given
+        results = []
+
+        def fail():
+            raise RuntimeError('write failed')
+
+        # when
+        writer = BackgroundWriter()
+        writer.submit(fail)
+        writer.submit(results.append, 1)
+
+        # then
+        with self.assertRaises(RuntimeError):
+            writer.close()
+        self.assertEqual(results, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,20 @@ import shutil
 import os
 
 from hypothesis import given
+from hypothesis.strategies import sampled_from
 from paraview.simple import OpenDataFile, Delete, Connect, Disconnect
-from paraview import servermanager
+from paraview import servermanager, vtkConstants
 
 from simphony_paraview.core.api import write_to_file
-from simphony_paraview.core.testing import cuds_containers
+from simphony_paraview.core.testing import (
+    cuds_containers, create_example_mesh)
+
+#: The xml file extension for each dataset type read by paraview
+extensions = {
+    vtkConstants.VTK_UNSTRUCTURED_GRID: '.vtu',
+    vtkConstants.VTK_IMAGE_DATA: '.vti',
+    vtkConstants.VTK_STRUCTURED_GRID: '.vts',
+    vtkConstants.VTK_POLY_DATA: '.vtp'}
 
 
 class TestWriteToFile(unittest.TestCase):
@@ -38,6 +47,50 @@ class TestWriteToFile(unittest.TestCase):
 
         # then
         self.assertTrue(os.path.exists(self.filename))
+        self.assertFileContent(filename, kind)
+
+    @given(cuds_containers, sampled_from(['zlib', 'lz4', None]))
+    def test_write_xml(self, setup, compressor):
+        # given
+        cuds, kind = setup
+        filename = os.path.join(self.temp_dir, 'test' + extensions[kind])
+
+        # when
+        write_to_file(cuds, filename, compressor=compressor)
+
+        # then
+        self.assertTrue(os.path.exists(filename))
+        with open(filename, 'rb') as handle:
+            self.assertTrue(handle.read(8) == '<VTKFile')
+        self.assertFileContent(filename, kind)
+
+    def test_write_legacy_with_explicit_format(self):
+        # given
+        cuds = create_example_mesh()
+        filename = os.path.join(self.temp_dir, 'test.vtu')
+
+        # when
+        write_to_file(cuds, filename, format='legacy')
+
+        # then
+        with open(filename, 'rb') as handle:
+            self.assertTrue(handle.read(6) == '# vtk ')
+
+    def test_write_with_invalid_arguments(self):
+        # given
+        cuds = create_example_mesh()
+
+        # when/then
+        with self.assertRaises(ValueError):
+            write_to_file(cuds, os.path.join(self.temp_dir, 'test.vtp'))
+        with self.assertRaises(ValueError):
+            write_to_file(cuds, self.filename, format='hdf5')
+        with self.assertRaises(ValueError):
+            write_to_file(
+                cuds, os.path.join(self.temp_dir, 'test.vtu'),
+                compressor='bz2')
+
+    def assertFileContent(self, filename, kind):
         Connect()
         reader = None
         try:
@@ -0,0 +1,224 @@
+import unittest
+import tempfile
+import shutil
+import os
+from xml.etree import ElementTree
+
+import numpy
+from numpy.testing import assert_array_equal
+from paraview import vtk
+from paraview.numpy_support import vtk_to_numpy
+
+from simphony_paraview.core.api import XDMFCollection, cuds2vtk
+from simphony_paraview.core.testing import (
+    create_example_mesh, create_example_particles, create_example_lattice,
+    create_example_hexagonal_lattice)
+
+#: The numpy type of the xdmf number types for each precision.
+number_types = {
+    ('Float', '4'): numpy.float32,
+    ('Float', '8'): numpy.float64,
+    ('Int', '4'): numpy.int32,
+    ('Int', '8'): numpy.int64}
+
+
+class TestXDMFCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.filename = os.path.join(self.temp_dir, 'test.xmf')
+
+    def test_mesh_geometry_is_written_once(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_sets = [cuds2vtk(create_example_mesh()) for _ in range(3)]
+
+        # when
+        for time, data_set in enumerate(data_sets):
+            collection.append(data_set, time)
+        collection.write()
+
+        # then
+        self.assertEqual(len(collection), 3)
+        self.assertEqual(collection.geometry_files, 1)
+        grids = self.read_grids()
+        self.assertEqual(
+            [grid.find('Time').get('Value') for grid in grids],
+            ['0.0', '1.0', '2.0'])
+        for grid in grids:
+            topology = grid.find('Topology')
+            self.assertEqual(topology.get('TopologyType'), 'Mixed')
+            self.assertEqual(topology.get('NumberOfElements'), '5')
+            self.assertEqual(
+                topology.find('DataItem').text, 'test_geometry_000000.bin')
+            coordinates = self.read_item(grid.find('Geometry/DataItem'))
+            assert_array_equal(
+                coordinates,
+                vtk_to_numpy(data_sets[0].GetPoints().GetData()))
+        self.assertEqual(
+            sorted(os.listdir(self.temp_dir)),
+            ['test.xmf', 'test_000000.bin', 'test_000001.bin',
+             'test_000002.bin', 'test_geometry_000000.bin'])
+
+    def test_mesh_topology(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_set = cuds2vtk(create_example_mesh())
+
+        # when
+        collection.append(data_set, 0.0)
+        collection.write()
+
+        # then
+        grid, = self.read_grids()
+        topology = self.read_item(grid.find('Topology/DataItem'))
+        # the mesh has 2 lines, a triangle, a tetrahedron and a
+        # hexahedron that are mapped to xdmf cell types 2, 4, 6 and 9
+        types = topology[[0, 4, 8, 12, 17]]
+        assert_array_equal(types, [2, 2, 4, 6, 9])
+        self.assertEqual(len(topology), 4 + 4 + 4 + 5 + 9)
+
+    def test_attributes_are_written_per_step(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_set = cuds2vtk(create_example_mesh())
+        temperature = data_set.GetPointData().GetArray('TEMPERATURE')
+
+        # when
+        collection.append(data_set, 0.0)
+        temperature.SetValue(0, 42.0)
+        collection.append(data_set, 1.0)
+        collection.write()
+
+        # then
+        self.assertEqual(collection.geometry_files, 1)
+        first, second = self.read_grids()
+        for grid, expected in ((first, 0.0), (second, 42.0)):
+            attributes = {
+                (attribute.get('Name'), attribute.get('Center')): attribute
+                for attribute in grid.findall('Attribute')}
+            attribute = attributes['TEMPERATURE', 'Node']
+            self.assertEqual(attribute.get('AttributeType'), 'Scalar')
+            values = self.read_item(attribute.find('DataItem'))
+            self.assertEqual(values[0], expected)
+            self.assertEqual(len(values), 12)
+            self.assertIn(('TEMPERATURE', 'Cell'), attributes)
+
+    def test_changed_geometry_is_written_again(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_set = cuds2vtk(create_example_mesh())
+        moved = cuds2vtk(create_example_mesh())
+        moved.GetPoints().SetPoint(0, 0.5, 0.5, 0.5)
+
+        # when
+        for time, data_set in enumerate((data_set, moved, moved)):
+            collection.append(data_set, time)
+        collection.write()
+
+        # then
+        self.assertEqual(collection.geometry_files, 2)
+        grids = self.read_grids()
+        self.assertEqual(
+            [grid.find('Geometry/DataItem').text for grid in grids],
+            ['test_geometry_000000.bin', 'test_geometry_000001.bin',
+             'test_geometry_000001.bin'])
+
+    def test_particles(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_set = cuds2vtk(create_example_particles())
+
+        # when
+        collection.append(data_set, 0.0)
+        collection.write()
+
+        # then
+        grid, = self.read_grids()
+        self.assertEqual(grid.find('Topology').get('NumberOfElements'), '3')
+        topology = self.read_item(grid.find('Topology/DataItem'))
+        assert_array_equal(
+            topology, [2, 2, 0, 1, 2, 2, 0, 3, 2, 3, 1, 3, 2])
+
+    def test_lattice(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_set = cuds2vtk(create_example_lattice())
+
+        # when
+        collection.append(data_set, 0.0)
+        collection.write()
+
+        # then
+        self.assertEqual(collection.geometry_files, 0)
+        grid, = self.read_grids()
+        topology = grid.find('Topology')
+        self.assertEqual(topology.get('TopologyType'), '3DCoRectMesh')
+        self.assertEqual(topology.get('Dimensions'), '12 10 5')
+        attribute, = grid.findall('Attribute')
+        values = self.read_item(attribute.find('DataItem'))
+        self.assertEqual(values.shape, (12, 10, 5))
+        assert_array_equal(
+            values.ravel(),
+            vtk_to_numpy(data_set.GetPointData().GetArray('TEMPERATURE')))
+
+    def test_hexagonal_lattice(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_set = cuds2vtk(create_example_hexagonal_lattice())
+
+        # when
+        collection.append(data_set, 0.0)
+        collection.append(data_set, 1.0)
+        collection.write()
+
+        # then
+        self.assertEqual(collection.geometry_files, 1)
+        first, second = self.read_grids()
+        topology = first.find('Topology')
+        self.assertEqual(topology.get('TopologyType'), '3DSMesh')
+        self.assertEqual(topology.get('Dimensions'), '3 4 5')
+        coordinates = self.read_item(first.find('Geometry/DataItem'))
+        assert_array_equal(
+            coordinates, vtk_to_numpy(data_set.GetPoints().GetData()))
+        attribute, = second.findall('Attribute')
+        values = self.read_item(attribute.find('DataItem'))
+        self.assertEqual(values.shape, (3, 4, 5))
+
+    def test_unsupported_cells(self):
+        # given
+        collection = XDMFCollection(self.filename)
+        data_set = vtk.vtkUnstructuredGrid()
+        points = vtk.vtkPoints()
+        for index in range(10):
+            points.InsertNextPoint(index, index % 2, index % 3)
+        data_set.SetPoints(points)
+        data_set.InsertNextCell(
+            vtk.vtkPentagonalPrism().GetCellType(), 10, range(10))
+
+        # when/then
+        with self.assertRaises(ValueError):
+            collection.append(data_set, 0.0)
+
+    def read_grids(self):
+        root = ElementTree.parse(self.filename).getroot()
+        collection = root.find('Domain/Grid')
+        self.assertEqual(collection.get('CollectionType'), 'Temporal')
+        return collection.findall('Grid')
+
+    def read_item(self, item):
+        self.assertEqual(item.get('Format'), 'Binary')
+        dtype = numpy.dtype(
+            number_types[item.get('NumberType'), item.get('Precision')])
+        shape = tuple(int(size) for size in item.get('Dimensions').split())
+        with open(os.path.join(self.temp_dir, item.text), 'rb') as handle:
+            handle.seek(int(item.get('Seek')))
+            values = numpy.fromfile(
+                handle, dtype=dtype.newbyteorder('<'),
+                count=int(numpy.prod(shape)))
+        return values.reshape(shape)
+
+
+if __name__ == '__main__':
+    unittest.main()
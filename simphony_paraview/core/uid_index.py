@@ -0,0 +1,269 @@
+import uuid
+
+import numpy
+
+
+#: The structured type used to store a 128bit uid.
+UID_DTYPE = numpy.dtype([('high', numpy.uint64), ('low', numpy.uint64)])
+
+_LOW_MASK = (1 << 64) - 1
+
+# The number of added or removed uids that are always kept out of the
+# main lookup table.
+_MERGE_SIZE = 1024
+
+
+class UIDIndex(object):
+    """ Compact mapping from item uids to their (insertion) index.
+
+    The uids are stored as 128bit integers in a sorted structured array
+    and are resolved in bulk using binary search. Compared to a ``dict``
+    keyed by ``uuid.UUID`` objects the index uses a fraction of the
+    memory and a whole list of uids is resolved in one vectorized call.
+
+    Uids that are added after the first search are kept in a small
+    sorted side table, which is merged into the main table only when it
+    has grown in proportion to the index. Removed uids are marked in the
+    tables and dropped at the next merge.
+
+    >>> point2index = UIDIndex()
+    >>> point2index.extend(point.uid for point in points)
+    >>> point2index.indices(cell.points)
+    array([3, 0, 1, 2])
+
+    """
+    def __init__(self, uids=()):
+        """ Constructor
+
+        Parameters
+        ----------
+        uids : iterable
+            The initial sequence of uids.
+
+        """
+        self._stored = numpy.empty(0, dtype=UID_DTYPE)
+        self._number_of_items = 0
+        # the sorted keys and their indices, -1 marks a removed key
+        self._keys = None
+        self._order = None
+        self._new_keys = numpy.empty(0, dtype=UID_DTYPE)
+        self._new_order = numpy.empty(0, dtype=numpy.intp)
+        self._number_of_removed = 0
+        self.extend(uids)
+
+    def __len__(self):
+        """ The number of uids in the index.
+
+        """
+        return self._number_of_items
+
+    def __contains__(self, uid):
+        return bool(self.find([uid])[0] >= 0)
+
+    def __getitem__(self, uid):
+        """ Return the index of a single uid.
+
+        Raises
+        ------
+        KeyError :
+            When the uid is not part of the index.
+
+        """
+        return int(self.indices([uid])[0])
+
+    def extend(self, uids):
+        """ Append a sequence of uids.
+
+        The uids are assigned consecutive indices in the order that
+        they are provided. When the index has already been searched
+        only the new uids are sorted, into the side table of the
+        lookup.
+
+        """
+        keys = uid_keys(uids)
+        if len(keys) == 0:
+            return
+        start = self._number_of_items
+        size = start + len(keys)
+        if size > len(self._stored):
+            stored = numpy.empty(
+                max(size, 2 * len(self._stored)), dtype=UID_DTYPE)
+            stored[:start] = self._stored[:start]
+            self._stored = stored
+        self._stored[start:size] = keys
+        self._number_of_items = size
+        if self._keys is not None:
+            order = numpy.lexsort((keys['low'], keys['high']))
+            live = self._new_order >= 0
+            self._new_keys, self._new_order = _merge(
+                self._new_keys[live], self._new_order[live],
+                keys[order], order + start)
+            self._number_of_removed -= int((~live).sum())
+            self._merge_tables()
+
+    def append(self, uid):
+        """ Append a single uid.
+
+        .. note:: Use :meth:`extend` when adding many uids.
+
+        """
+        self.extend([uid])
+
+    def indices(self, uids):
+        """ Return the indices of a sequence of uids.
+
+        Parameters
+        ----------
+        uids : iterable
+            The uids to resolve.
+
+        Returns
+        -------
+        indices : numpy.ndarray
+            The index of each uid.
+
+        Raises
+        ------
+        KeyError :
+            When any of the uids is not part of the index.
+
+        """
+        return self._indices(uid_keys(uids))
+
+    def find(self, uids):
+        """ Return the indices of a sequence of uids or -1 when missing.
+
+        """
+        return self._find(uid_keys(uids))
+
+    def remove(self, uids):
+        """ Remove a sequence of uids from the index.
+
+        The uids at the end of the index are moved into the indices of
+        the removed uids, so that the cost of the removal depends on the
+        number of removed uids and not on the size of the index.
+
+        Returns
+        -------
+        sources, targets : numpy.ndarray
+            The previous and the new index of the moved uids.
+
+        Raises
+        ------
+        KeyError :
+            When any of the uids is not part of the index.
+
+        """
+        query = uid_keys(uids)
+        removed = numpy.unique(self._indices(query))
+        count = self._number_of_items - len(removed)
+        tail = numpy.arange(count, self._number_of_items)
+        sources = tail[~numpy.in1d(tail, removed, assume_unique=True)]
+        targets = removed[removed < count]
+        self._set_indices(query, numpy.full(len(query), -1, dtype=int))
+        self._set_indices(self._stored[sources], targets)
+        self._stored[targets] = self._stored[sources]
+        self._number_of_items = count
+        self._number_of_removed += len(removed)
+        self._merge_tables()
+        return sources, targets
+
+    def _indices(self, query):
+        indices = self._find(query)
+        missing = indices < 0
+        if missing.any():
+            message = 'Could not find {} uid(s), e.g. {}'
+            raise KeyError(message.format(
+                missing.sum(), uid_from_key(query[missing][0])))
+        return indices
+
+    def _find(self, query):
+        indices = numpy.full(len(query), -1, dtype=numpy.intp)
+        if len(query) == 0:
+            return indices
+        for keys, order in self._tables():
+            positions, found = _search(keys, order, query)
+            indices[found] = order[positions[found]]
+        return indices
+
+    def _set_indices(self, query, indices):
+        """ Change the index of the uids that are in the lookup tables.
+
+        """
+        for keys, order in self._tables():
+            positions, found = _search(keys, order, query)
+            order[positions[found]] = indices[found]
+
+    def _tables(self):
+        """ Return the main and the side lookup tables.
+
+        """
+        if self._keys is None:
+            keys = self._stored[:self._number_of_items]
+            order = numpy.lexsort((keys['low'], keys['high']))
+            self._keys = keys[order]
+            self._order = order
+        return (self._keys, self._order), (self._new_keys, self._new_order)
+
+    def _merge_tables(self):
+        """ Merge the side table into the main table and drop the
+        removed keys, once they have grown in proportion to the index.
+
+        """
+        pending = len(self._new_keys) + self._number_of_removed
+        if self._keys is None or pending <= max(
+                _MERGE_SIZE, len(self._keys) // 8):
+            return
+        live = self._order >= 0
+        new_live = self._new_order >= 0
+        self._keys, self._order = _merge(
+            self._keys[live], self._order[live],
+            self._new_keys[new_live], self._new_order[new_live])
+        self._new_keys = self._new_keys[:0]
+        self._new_order = self._new_order[:0]
+        self._number_of_removed = 0
+
+
+def uid_keys(uids):
+    """ Convert a sequence of uids to an array of :data:`UID_DTYPE` keys.
+
+    """
+    values = [uid.int for uid in uids]
+    count = len(values)
+    keys = numpy.empty(count, dtype=UID_DTYPE)
+    keys['high'] = numpy.fromiter(
+        (value >> 64 for value in values), dtype=numpy.uint64, count=count)
+    keys['low'] = numpy.fromiter(
+        (value & _LOW_MASK for value in values),
+        dtype=numpy.uint64, count=count)
+    return keys
+
+
+def uid_from_key(key):
+    """ Convert a :data:`UID_DTYPE` key back to a ``uuid.UUID``.
+
+    """
+    return uuid.UUID(int=(int(key['high']) << 64) | int(key['low']))
+
+
+def _search(keys, order, query):
+    """ Return the positions of the query keys in a sorted table and
+    the mask of the keys that are found and not removed.
+
+    """
+    if len(keys) == 0:
+        return (
+            numpy.zeros(len(query), dtype=numpy.intp),
+            numpy.zeros(len(query), dtype=bool))
+    positions = numpy.searchsorted(keys, query)
+    positions[positions == len(keys)] = 0
+    found = (keys[positions] == query) & (order[positions] >= 0)
+    return positions, found
+
+
+def _merge(keys, order, new_keys, new_order):
+    """ Merge two sorted tables of keys and indices. """
+    positions = numpy.searchsorted(keys, new_keys)
+    return (
+        numpy.insert(keys, positions, new_keys),
+        numpy.insert(order, positions, new_order))
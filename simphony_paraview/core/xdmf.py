@@ -0,0 +1,396 @@
+import os
+from xml.etree import ElementTree
+
+import numpy
+from paraview import vtkConstants
+from paraview.numpy_support import vtk_to_numpy
+
+from .cell_array_builder import ID_TYPE
+
+
+#: The xdmf cell type of each supported vtk cell type.
+VTK2XDMF = {
+    vtkConstants.VTK_VERTEX: 0x1,
+    vtkConstants.VTK_POLY_VERTEX: 0x1,
+    vtkConstants.VTK_LINE: 0x2,
+    vtkConstants.VTK_POLY_LINE: 0x2,
+    vtkConstants.VTK_POLYGON: 0x3,
+    vtkConstants.VTK_TRIANGLE: 0x4,
+    vtkConstants.VTK_QUAD: 0x5,
+    vtkConstants.VTK_TETRA: 0x6,
+    vtkConstants.VTK_PYRAMID: 0x7,
+    vtkConstants.VTK_WEDGE: 0x8,
+    vtkConstants.VTK_HEXAHEDRON: 0x9}
+
+#: The xdmf cell types that store their number of points in a mixed
+#: topology.
+_SIZED_XDMF_TYPES = (0x1, 0x2, 0x3)
+
+#: The xdmf attribute type for each number of components.
+_ATTRIBUTE_TYPES = {1: 'Scalar', 3: 'Vector', 9: 'Tensor'}
+
+
+class XDMFCollection(object):
+    """ An xdmf temporal collection that stores the geometry only once.
+
+    Each appended vtk dataset is stored as a uniform grid in the
+    collection. The points and cells are saved in raw binary files that
+    are shared between consecutive time steps and are only written
+    again when they change. The point and cell data arrays are saved
+    in a binary file per time step.
+
+    >>> collection = XDMFCollection('output/series.xmf')
+    >>> collection.append(data_set, time=0.0)
+    >>> collection.write()
+
+    """
+    def __init__(self, filename):
+        """ Constructor
+
+        Parameters
+        ----------
+        filename : string
+            The filename of the .xmf file.
+
+        """
+        self.filename = filename
+        self._steps = []
+        self._geometry = None
+        self._geometry_files = 0
+
+    def __len__(self):
+        """ The number of time steps in the collection.
+
+        """
+        return len(self._steps)
+
+    @property
+    def geometry_files(self):
+        """ The number of times that the geometry was written.
+
+        """
+        return self._geometry_files
+
+    def append(self, data_set, time):
+        """ Add a vtk dataset as a new time step and save its heavy data.
+
+        Parameters
+        ----------
+        data_set : vtkDataSet
+            A vtkUnstructuredGrid, vtkPolyData, vtkStructuredGrid or
+            vtkImageData instance.
+
+        time : float
+            The time value of the dataset.
+
+        Raises
+        ------
+        ValueError :
+            When the dataset contains cells or arrays that cannot be
+            stored in xdmf.
+
+        """
+        if data_set.GetDataObjectType() in (
+                vtkConstants.VTK_STRUCTURED_POINTS,
+                vtkConstants.VTK_IMAGE_DATA):
+            geometry = _ImageGeometry(data_set)
+        elif (data_set.GetDataObjectType() ==
+                vtkConstants.VTK_STRUCTURED_GRID):
+            geometry = _StructuredGeometry(data_set)
+        else:
+            geometry = _UnstructuredGeometry(data_set)
+        if self._geometry is None or geometry != self._geometry:
+            if geometry.heavy:
+                geometry.save(self._heavy_filename(
+                    'geometry_{:06d}'.format(self._geometry_files)))
+                self._geometry_files += 1
+            self._geometry = geometry
+
+        attributes = []
+        for center, container, shape in (
+                ('Node', data_set.GetPointData(), geometry.point_shape),
+                ('Cell', data_set.GetCellData(), geometry.cell_shape)):
+            for index in range(container.GetNumberOfArrays()):
+                array = container.GetArray(index)
+                if array is None:
+                    continue
+                components = array.GetNumberOfComponents()
+                dimensions = shape if components == 1 else (
+                    shape + (components,))
+                attributes.append((
+                    array.GetName(), center, components,
+                    vtk_to_numpy(array).reshape(dimensions)))
+        items = _write_arrays(
+            self._heavy_filename('{:06d}'.format(len(self._steps))),
+            [attribute[3] for attribute in attributes])
+        self._steps.append((
+            time, self._geometry,
+            [attribute[:3] + (item,)
+             for attribute, item in zip(attributes, items)]))
+
+    def write(self):
+        """ Write the collection to the .xmf file.
+
+        """
+        root = ElementTree.Element('Xdmf', Version='2.0')
+        domain = ElementTree.SubElement(root, 'Domain')
+        name = os.path.splitext(os.path.basename(self.filename))[0]
+        collection = ElementTree.SubElement(
+            domain, 'Grid', Name=name, GridType='Collection',
+            CollectionType='Temporal')
+        for step, (time, geometry, attributes) in enumerate(self._steps):
+            grid = ElementTree.SubElement(
+                collection, 'Grid', Name='{}_{:06d}'.format(name, step),
+                GridType='Uniform')
+            ElementTree.SubElement(grid, 'Time', Value=repr(float(time)))
+            geometry.write(grid)
+            for array_name, center, components, item in attributes:
+                attribute = ElementTree.SubElement(
+                    grid, 'Attribute', Name=array_name, Center=center,
+                    AttributeType=_ATTRIBUTE_TYPES.get(components, 'Matrix'))
+                _data_item(attribute, item)
+        ElementTree.ElementTree(root).write(
+            self.filename, encoding='utf-8', xml_declaration=True)
+
+    def _heavy_filename(self, suffix):
+        base = os.path.splitext(self.filename)[0]
+        return '{}_{}.bin'.format(base, suffix)
+
+
+class _UnstructuredGeometry(object):
+    """ The points and mixed cell topology of a vtkUnstructuredGrid or
+    vtkPolyData.
+
+    """
+    heavy = True
+
+    def __init__(self, data_set):
+        points = data_set.GetPoints()
+        if points is None:
+            self.coordinates = numpy.empty((0, 3), dtype=numpy.float32)
+        else:
+            self.coordinates = vtk_to_numpy(points.GetData()).reshape(-1, 3)
+        self.topology, self.number_of_cells = _mixed_topology(data_set)
+        self.point_shape = (len(self.coordinates),)
+        self.cell_shape = (self.number_of_cells,)
+        self._items = None
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, _UnstructuredGeometry) and
+            numpy.array_equal(self.topology, other.topology) and
+            numpy.array_equal(self.coordinates, other.coordinates))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def save(self, filename):
+        self._items = _write_arrays(
+            filename, [self.topology, self.coordinates])
+
+    def write(self, grid):
+        topology_item, coordinates_item = self._items
+        topology = ElementTree.SubElement(
+            grid, 'Topology', TopologyType='Mixed',
+            NumberOfElements=str(self.number_of_cells))
+        _data_item(topology, topology_item)
+        geometry = ElementTree.SubElement(grid, 'Geometry', GeometryType='XYZ')
+        _data_item(geometry, coordinates_item)
+
+
+class _StructuredGeometry(object):
+    """ The curvilinear grid of a vtkStructuredGrid.
+
+    The cells are implicit, only the point coordinates are saved. Xdmf
+    expects the dimensions in z, y, x order.
+
+    """
+    heavy = True
+
+    def __init__(self, data_set):
+        nx, ny, nz = data_set.GetDimensions()
+        self.coordinates = vtk_to_numpy(
+            data_set.GetPoints().GetData()).reshape(-1, 3)
+        self.point_shape = (nz, ny, nx)
+        self.cell_shape = tuple(max(size - 1, 1) for size in self.point_shape)
+        self._items = None
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, _StructuredGeometry) and
+            self.point_shape == other.point_shape and
+            numpy.array_equal(self.coordinates, other.coordinates))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def save(self, filename):
+        self._items = _write_arrays(filename, [self.coordinates])
+
+    def write(self, grid):
+        coordinates_item, = self._items
+        ElementTree.SubElement(
+            grid, 'Topology', TopologyType='3DSMesh',
+            Dimensions=_dimensions(self.point_shape))
+        geometry = ElementTree.SubElement(grid, 'Geometry', GeometryType='XYZ')
+        _data_item(geometry, coordinates_item)
+
+
+class _ImageGeometry(object):
+    """ The uniform grid of a vtkImageData, stored in the xml file.
+
+    Xdmf expects the dimensions, origin and spacing in z, y, x order.
+
+    """
+    heavy = False
+
+    def __init__(self, data_set):
+        origin = data_set.GetOrigin()
+        spacing = data_set.GetSpacing()
+        extent = data_set.GetExtent()
+        axes = (2, 1, 0)
+        self.point_shape = tuple(
+            extent[2 * axis + 1] - extent[2 * axis] + 1 for axis in axes)
+        self.cell_shape = tuple(max(size - 1, 1) for size in self.point_shape)
+        self.origin = tuple(
+            origin[axis] + extent[2 * axis] * spacing[axis] for axis in axes)
+        self.spacing = tuple(spacing[axis] for axis in axes)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, _ImageGeometry) and
+            (self.point_shape, self.origin, self.spacing) ==
+            (other.point_shape, other.origin, other.spacing))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def write(self, grid):
+        ElementTree.SubElement(
+            grid, 'Topology', TopologyType='3DCoRectMesh',
+            Dimensions=_dimensions(self.point_shape))
+        geometry = ElementTree.SubElement(
+            grid, 'Geometry', GeometryType='ORIGIN_DXDYDZ')
+        for values in (self.origin, self.spacing):
+            item = ElementTree.SubElement(
+                geometry, 'DataItem', Dimensions='3', NumberType='Float',
+                Precision='8', Format='XML')
+            item.text = ' '.join(repr(float(value)) for value in values)
+
+
+def _mixed_topology(data_set):
+    """ Return the xdmf mixed topology array and the number of cells.
+
+    """
+    if data_set.GetDataObjectType() == vtkConstants.VTK_POLY_DATA:
+        lines = data_set.GetLines()
+        count = lines.GetNumberOfCells()
+        if data_set.GetNumberOfCells() != count:
+            message = 'Only the lines of a vtkPolyData can be stored in xdmf'
+            raise ValueError(message)
+        if count == 0:
+            # points are only loaded when they belong to a cell
+            count = data_set.GetNumberOfPoints()
+            legacy = numpy.empty(2 * count, dtype=ID_TYPE)
+            legacy[0::2] = 1
+            legacy[1::2] = numpy.arange(count)
+            locations = numpy.arange(0, 2 * count, 2, dtype=ID_TYPE)
+            types = numpy.full(count, vtkConstants.VTK_VERTEX, numpy.uint8)
+        else:
+            legacy = _cell_array2numpy(lines)
+            locations = _legacy_locations(legacy, count)
+            types = numpy.where(
+                legacy[locations] == 2,
+                vtkConstants.VTK_LINE, vtkConstants.VTK_POLY_LINE)
+    else:
+        count = data_set.GetNumberOfCells()
+        if count == 0:
+            legacy = numpy.empty(0, dtype=ID_TYPE)
+            locations = numpy.empty(0, dtype=ID_TYPE)
+            types = numpy.empty(0, dtype=numpy.uint8)
+        else:
+            legacy = _cell_array2numpy(data_set.GetCells())
+            locations = vtk_to_numpy(
+                data_set.GetCellLocationsArray()).astype(ID_TYPE)
+            types = vtk_to_numpy(data_set.GetCellTypesArray())
+
+    lookup = numpy.zeros(max(VTK2XDMF) + 1, dtype=ID_TYPE)
+    for cell_type, xdmf_type in VTK2XDMF.iteritems():
+        lookup[cell_type] = xdmf_type
+    unsupported = numpy.unique(
+        types[(types >= len(lookup)) | (lookup[types % len(lookup)] == 0)])
+    if len(unsupported) > 0:
+        message = 'Cells of vtk type(s) {} cannot be stored in xdmf'
+        raise ValueError(message.format(list(unsupported)))
+    xdmf_types = lookup[types]
+
+    # replace the size prefix of each cell with the xdmf cell type, the
+    # size is kept after the type for the cells that have no fixed size
+    sizes = legacy[locations]
+    topology = legacy.copy()
+    topology[locations] = xdmf_types
+    sized = numpy.in1d(xdmf_types, _SIZED_XDMF_TYPES)
+    topology = numpy.insert(topology, locations[sized] + 1, sizes[sized])
+    return topology, count
+
+
+def _cell_array2numpy(cells):
+    return vtk_to_numpy(cells.GetData()).astype(ID_TYPE)
+
+
+def _legacy_locations(legacy, count):
+    """ The position of the size prefix of each cell in a legacy array.
+
+    """
+    size = legacy[0] if count > 0 else 0
+    locations = numpy.arange(count, dtype=ID_TYPE) * (size + 1)
+    if len(legacy) == count * (size + 1) and (legacy[locations] == size).all():
+        return locations
+    # cells of different sizes, walk the size prefixes
+    position = 0
+    for index in range(count):
+        locations[index] = position
+        position += legacy[position] + 1
+    return locations
+
+
+def _write_arrays(filename, arrays):
+    """ Save the arrays one after the other in a raw binary file.
+
+    Returns a description of the binary data item of each array.
+
+    """
+    items = []
+    basename = os.path.basename(filename)
+    with open(filename, 'wb') as handle:
+        for values in arrays:
+            values = numpy.ascontiguousarray(
+                values, dtype=values.dtype.newbyteorder('<'))
+            items.append((basename, handle.tell(), values.shape, values.dtype))
+            values.tofile(handle)
+    return items
+
+
+def _data_item(parent, item):
+    filename, seek, shape, dtype = item
+    element = ElementTree.SubElement(
+        parent, 'DataItem', Dimensions=_dimensions(shape),
+        NumberType=_number_type(dtype), Precision=str(dtype.itemsize),
+        Format='Binary', Endian='Little', Seek=str(seek))
+    element.text = filename
+
+
+def _number_type(dtype):
+    if dtype.kind == 'f':
+        return 'Float'
+    elif dtype.kind == 'i':
+        return 'Char' if dtype.itemsize == 1 else 'Int'
+    elif dtype.kind == 'u':
+        return 'UChar' if dtype.itemsize == 1 else 'UInt'
+    else:
+        message = 'Arrays of type {} cannot be stored in xdmf'
+        raise ValueError(message.format(dtype))
+
+
+def _dimensions(shape):
+    return ' '.join(str(size) for size in shape)
@@ -1,5 +1,8 @@
 from simphony_paraview._version import full_version as __version__
 from simphony_paraview.show import show
-from simphony_paraview.snapshot import snapshot
+from simphony_paraview.snapshot import (
+    snapshot, snapshot_series, snapshot_parallel)
 
-__all__ = ['__version__', 'show', 'snapshot']
+__all__ = [
+    '__version__', 'show', 'snapshot', 'snapshot_series',
+    'snapshot_parallel']
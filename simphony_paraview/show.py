@@ -1,15 +1,15 @@
-from paraview.simple import Glyph, Sphere
-from paraview.servermanager import CreateRenderView
-from simphony.cuds import ABCMesh, ABCLattice, ABCParticles
-
 from simphony_paraview.core.api import (
-    loaded_in_paraview, typical_distance, set_data)
-from simphony_paraview.core.fixes import CreateRepresentation
+    loaded_in_paraview, default_representation, container_kind,
+    selected_keys)
+from simphony_paraview.core.session import render_scene
 from simphony_paraview.core.compatibility import (
     vtkRenderWindowInteractor, vtkInteractorStyleJoystickCamera)
 
 
-def show(cuds, select=None, testing=None):
+def show(
+        cuds, select=None, testing=None, converter=None, session=None,
+        mode='auto', preview=None, surface=False, region=None,
+        keys=None):
     """ Show the cuds objects using the default visualisation.
 
     Parameters
@@ -28,35 +28,50 @@ def show(cuds, select=None, testing=None):
         time event. The callable will be executed after 1000 msec.
         This is commonly used for testing. Default value is None
 
+    converter : IncrementalConverter
+        An up to date converter of ``cuds`` whose vtk dataset is shown
+        instead of converting the container again. Default value is
+        None
+
+    session : Session
+        An open session that provides the connection and a reusable
+        render view. Default value is None
+
+    mode : str
+        The rendering mode of particles, one of {'auto', 'glyph',
+        'points', 'gaussian'} (see :func:`~.default_representation`).
+        Default value is 'auto'
+
+    preview : int
+        Show a quick preview made of a subsample of about ``preview``
+        items of the container (see :func:`~.cuds2vtk`). Default value
+        is None
+
+    surface : bool
+        Show only the exterior surface of meshes. Default value is False
+
+    region : BoxRegion or SphereRegion
+        Show only the part of the container inside the region (see
+        :func:`~.cuds2vtk`). Default value is None
+
+    keys : iterable
+        The CUBA keys of the item data to convert. Default value is
+        None, which converts only the ``select`` key
+
     """
-    with loaded_in_paraview(cuds) as source:
+    cache = None if session is None else session.cache
+    with loaded_in_paraview(
+            cuds, converter, cache, preview, region,
+            selected_keys(select, keys)) as source, \
+            render_scene(session) as scene:
 
         # XXX Special workaround to avoid segfault on exit as
         # as seen in http://www.paraview.org/Bug/view.php?id=13124
 
-        view = CreateRenderView()
-
-        representation = CreateRepresentation(source, view)
-
-        items = None if select is None else select[1]
-        message = "Container does not have: {}"
-        if isinstance(cuds, ABCLattice):
-            representation.Representation = "Points"
-            if items not in (None, 'nodes'):
-                raise ValueError(message.format(items))
-        elif isinstance(cuds, ABCParticles):
-            sphere = Sphere(Radius=typical_distance(source))
-            glyphs = Glyph(Input=source, ScaleMode='off', GlyphType=sphere)
-            representation = CreateRepresentation(glyphs, view)
-            if items not in (None, 'particles', 'bonds'):
-                raise ValueError(message.format(items))
-        elif isinstance(cuds, ABCMesh):
-            representation.Representation = "Surface"
-            if items not in (None, 'points', 'elements'):
-                raise ValueError(message.format(items))
-
-        if select is not None:
-            set_data(representation, source, select)
+        view = scene.view
+
+        default_representation(
+            scene, container_kind(cuds), source, select, mode, surface)
 
         interactor = vtkRenderWindowInteractor()
         # Note: we cannot use any interactor style supporting manipulation
@@ -1,14 +1,27 @@
-from paraview.simple import Glyph, Sphere
-from paraview.servermanager import CreateRenderView
+import logging
+import multiprocessing
+import time
+from multiprocessing.util import Finalize
+
+from paraview import vtkConstants
+from paraview.simple import OpenDataFile
 from simphony.cuds import ABCMesh, ABCLattice, ABCParticles
 
 
 from simphony_paraview.core.api import (
-    loaded_in_paraview, typical_distance, set_data)
-from simphony_paraview.core.fixes import CreateRepresentation
+    loaded_in_paraview, default_representation, cuds2vtk, container_kind,
+    is_remote, trivial_producer, selected_keys, set_producer_output,
+    full_fingerprint)
+from simphony_paraview.core.session import Session, render_scene
+
 
+logger = logging.getLogger(__name__)
 
-def snapshot(cuds, filename, select=None):
+
+def snapshot(
+        cuds, filename, select=None, converter=None, cache=None,
+        session=None, mode='auto', preview=None, surface=False,
+        region=None, keys=None):
     """ Save a snapshot of the cuds object using the default visualisation.
 
      Parameters
@@ -25,43 +38,294 @@ def snapshot(cuds, filename, select=None):
          use. ``kind`` can be one of the {'point', 'particles',
          'nodes', 'elements', 'bonds'}
 
+     converter : IncrementalConverter
+         An up to date converter of ``cuds`` whose vtk dataset is used
+         instead of converting the container again.
+
+     cache : ConversionCache
+         A cache of converted datasets and rendered images. When the
+         same unchanged container has already been rendered with the
+         same selection the cached image is saved without rendering.
+         Images are always keyed by the :func:`~.full_fingerprint` of
+         the container, whatever the key function of the cache.
+
+     session : Session
+         An open session that provides the connection and a reusable
+         render view. The session cache is used when ``cache`` is not
+         provided.
+
+     mode : str
+         The rendering mode of particles, one of {'auto', 'glyph',
+         'points', 'gaussian'} (see :func:`~.default_representation`).
+
+     preview : int
+         Render a quick preview made of a subsample of about ``preview``
+         items of the container (see :func:`~.cuds2vtk`).
+
+     surface : bool
+         Render only the exterior surface of meshes.
+
+     region : BoxRegion or SphereRegion
+         Render only the part of the container inside the region (see
+         :func:`~.cuds2vtk`).
+
+     keys : iterable
+         The CUBA keys of the item data to convert. Default is to
+         convert only the ``select`` key.
+
     """
-    with loaded_in_paraview(cuds) as source:
+    if cache is None and session is not None:
+        cache = session.cache
+    key = None
+    if cache is not None and converter is None:
+        key = cache.key(cuds)
+        identity = key if cache.key is full_fingerprint else (
+            full_fingerprint(cuds))
+        image_key = (
+            'image', identity, select, mode, preview, surface, region)
+        image = cache.get(image_key)
+        if image is not None:
+            with open(filename, 'wb') as handle:
+                handle.write(image)
+            return
+    else:
+        image_key = None
+
+    with loaded_in_paraview(
+            cuds, converter, cache, preview, region,
+            selected_keys(select, keys), key) as source, \
+            render_scene(session) as scene:
 
         # XXX Special workaround to avoid segfault on exit as
         # as seen in http://www.paraview.org/Bug/view.php?id=13124
 
-        view = CreateRenderView()
+        view = scene.view
         view.UseOffscreenRendering = 1
         view.UseOffscreenRenderingForScreenshots = 1
 
-        representation = CreateRepresentation(source, view)
-
-        items = None if select is None else select[1]
-        message = "Container does not have: {}"
-        if isinstance(cuds, ABCLattice):
-            representation.Representation = "Points"
-            if items not in (None, 'nodes'):
-                raise ValueError(message.format(items))
-        elif isinstance(cuds, ABCParticles):
-            sphere = Sphere(Radius=typical_distance(source))
-            glyphs = Glyph(Input=source, ScaleMode='off', GlyphType=sphere)
-            representation = CreateRepresentation(glyphs, view)
-            if items not in (None, 'particles', 'bonds'):
-                raise ValueError(message.format(items))
-        elif isinstance(cuds, ABCMesh):
-            representation.Representation = "Surface"
-            if items not in (None, 'points', 'elements'):
-                raise ValueError(message.format(items))
-
-        if select is not None:
-            set_data(representation, source, select)
-
-        view.ViewSize = [800, 600]
-        view.Background = (0.2, 0.2, 0.2)
-        view.ResetCamera()
-        camera = view.GetActiveCamera()
-        camera.Elevation(45)
-        camera.Yaw(45)
-        view.ResetCamera()
+        default_representation(
+            scene, container_kind(cuds), source, select, mode, surface)
+        _setup_view(view)
+        start = time.time()
         view.WriteImage(filename, "vtkPNGWriter", 1)
+        logger.info(
+            'Rendered %s in %.3f seconds', filename, time.time() - start)
+
+    if image_key is not None:
+        with open(filename, 'rb') as handle:
+            image = handle.read()
+        cache.put(image_key, image, nbytes=len(image))
+
+
+def snapshot_series(
+        cuds_iterable, filename_pattern, select=None, session=None,
+        mode='auto'):
+    """ Save a snapshot of each cuds object in a sequence of containers.
+
+    The view, the lookup table and the particle glyphs are set up once
+    for the first container. For the following containers only the
+    input data of the pipeline are replaced before rendering, so the
+    camera and the color range of the first frame are kept for the
+    whole series.
+
+    Parameters
+    ----------
+    cuds_iterable : iterable
+        The top level cuds objects (e.g. the frames of a simulation).
+        All the containers need to be of the same kind.
+
+    filename_pattern : string
+        The filename pattern of the output files. The pattern is
+        formatted with the frame index (e.g. ``'frame_{:04d}.png'``).
+
+    select : tuple(CUBA, kind)
+        The (CUBA, kind) selection of the CUBA attribute to
+        use. ``kind`` can be one of the {'point', 'particles',
+        'nodes', 'elements', 'bonds'}
+
+    session : Session
+        An open session that provides the connection and the render
+        view. Default is to create a session for the series.
+
+    mode : str
+        The rendering mode of particles, one of {'auto', 'glyph',
+        'points', 'gaussian'} (see :func:`~.default_representation`).
+
+    Returns
+    -------
+    filenames : list
+        The filenames of the saved snapshots.
+
+    Raises
+    ------
+    TypeError :
+        When the containers are not all of the same kind.
+
+    """
+    if session is None:
+        with Session() as session:
+            return snapshot_series(
+                cuds_iterable, filename_pattern, select, session, mode)
+
+    filenames = []
+    if is_remote(session.connection):
+        # the data of remote pipelines cannot be replaced in memory
+        for index, cuds in enumerate(cuds_iterable):
+            filename = filename_pattern.format(index)
+            snapshot(
+                cuds, filename, select=select, session=session, mode=mode)
+            filenames.append(filename)
+        return filenames
+
+    source = None
+    with render_scene(session) as scene:
+        view = scene.view
+        view.UseOffscreenRendering = 1
+        view.UseOffscreenRenderingForScreenshots = 1
+        for index, cuds in enumerate(cuds_iterable):
+            data_set = cuds2vtk(cuds, keys=selected_keys(select))
+            if source is None:
+                kind = container_kind(cuds)
+                source = scene.track(trivial_producer(data_set))
+                default_representation(scene, kind, source, select, mode)
+                _setup_view(view)
+            elif not isinstance(cuds, kind):
+                message = 'Expected a {} container but got {}'
+                raise TypeError(message.format(kind.__name__, type(cuds)))
+            else:
+                set_producer_output(source, data_set)
+            filename = filename_pattern.format(index)
+            view.WriteImage(filename, "vtkPNGWriter", 1)
+            filenames.append(filename)
+    return filenames
+
+
+def snapshot_parallel(
+        items, filename_pattern, select=None, workers=None, chunksize=1,
+        mode='auto'):
+    """ Save snapshots of a sequence of containers in worker processes.
+
+    Each worker process keeps its own paraview session (connection and
+    offscreen render view) alive and renders the frames it receives
+    with the default visualisation of :func:`snapshot`.
+
+    Parameters
+    ----------
+    items : iterable
+        The top level cuds objects or the filenames of vtk files
+        (e.g. written with :func:`~.write_to_file`) to render. Cuds
+        objects need to be picklable. Files are shown based on the
+        dataset type: image data and structured grids as lattices,
+        poly data as particles and unstructured grids as meshes.
+
+    filename_pattern : string
+        The filename pattern of the output files. The pattern is
+        formatted with the frame index (e.g. ``'frame_{:04d}.png'``).
+
+    select : tuple(CUBA, kind)
+        The (CUBA, kind) selection of the CUBA attribute to
+        use. ``kind`` can be one of the {'point', 'particles',
+        'nodes', 'elements', 'bonds'}
+
+    workers : int
+        The number of worker processes. Default is the number of cpus.
+
+    chunksize : int
+        The number of frames sent to a worker at once.
+
+    mode : str
+        The rendering mode of particles, one of {'auto', 'glyph',
+        'points', 'gaussian'} (see :func:`~.default_representation`).
+
+    Returns
+    -------
+    filenames : list
+        The filenames of the saved snapshots in the order of ``items``.
+
+    Raises
+    ------
+    Exception :
+        The first error raised while rendering a frame. The remaining
+        frames are not rendered.
+
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers < 1:
+        message = 'The number of workers should be positive, got {}'
+        raise ValueError(message.format(workers))
+    tasks = (
+        (item, filename_pattern.format(index), select, mode)
+        for index, item in enumerate(items))
+    pool = multiprocessing.Pool(workers, initializer=_start_worker)
+    try:
+        filenames = list(
+            pool.imap(_render_frame, tasks, chunksize=chunksize))
+    except BaseException:
+        # stop the workers that are still rendering
+        pool.terminate()
+        raise
+    else:
+        # let the workers exit and close their sessions
+        pool.close()
+        return filenames
+    finally:
+        pool.join()
+
+
+#: The paraview session of a worker process of snapshot_parallel.
+_worker_session = None
+
+
+def _start_worker():
+    global _worker_session
+    _worker_session = Session()
+    _worker_session.open()
+    # atexit handlers are not called in the worker processes of a pool
+    Finalize(None, _worker_session.close, exitpriority=10)
+
+
+def _render_frame(task):
+    item, filename, select, mode = task
+    with render_scene(_worker_session) as scene:
+        if isinstance(item, basestring):
+            source = scene.track(OpenDataFile(item))
+            source.UpdatePipeline()
+            kind = _data_set_kind(
+                source.GetDataInformation().GetDataSetType())
+        else:
+            kind = container_kind(item)
+            data_set = cuds2vtk(item, keys=selected_keys(select))
+            source = scene.track(trivial_producer(data_set))
+        view = scene.view
+        view.UseOffscreenRendering = 1
+        view.UseOffscreenRenderingForScreenshots = 1
+        default_representation(scene, kind, source, select, mode)
+        _setup_view(view)
+        view.WriteImage(filename, "vtkPNGWriter", 1)
+    return filename
+
+
+def _data_set_kind(data_set_type):
+    kinds = {
+        vtkConstants.VTK_UNSTRUCTURED_GRID: ABCMesh,
+        vtkConstants.VTK_POLY_DATA: ABCParticles,
+        vtkConstants.VTK_STRUCTURED_POINTS: ABCLattice,
+        vtkConstants.VTK_IMAGE_DATA: ABCLattice,
+        vtkConstants.VTK_UNIFORM_GRID: ABCLattice,
+        vtkConstants.VTK_STRUCTURED_GRID: ABCLattice}
+    try:
+        return kinds[data_set_type]
+    except KeyError:
+        message = 'Cannot show datasets of vtk type {}'
+        raise TypeError(message.format(data_set_type))
+
+
+def _setup_view(view):
+    view.ViewSize = [800, 600]
+    view.Background = (0.2, 0.2, 0.2)
+    view.ResetCamera()
+    camera = view.GetActiveCamera()
+    camera.Elevation(45)
+    camera.Yaw(45)
+    view.ResetCamera()
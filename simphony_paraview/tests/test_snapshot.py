@@ -2,15 +2,21 @@ import os
 import unittest
 import tempfile
 import shutil
+from functools import partial
 
 import numpy
 from PIL import Image
 from hypothesis import given
+from mock import Mock, patch
 from paraview import servermanager
 from paraview.simple import Disconnect
 from simphony.core.cuba import CUBA
 
-from simphony_paraview.snapshot import snapshot
+from simphony_paraview import snapshot as snapshot_module
+from simphony_paraview.snapshot import (
+    snapshot, snapshot_series, snapshot_parallel)
+from simphony_paraview.core.api import (
+    ConversionCache, Session, write_to_file, fingerprint)
 from simphony_paraview.core.testing import (
     cuds_containers,
     create_example_mesh, create_example_lattice, create_example_particles)
@@ -88,6 +94,219 @@ class TestSnapShot(unittest.TestCase):
         with self.assertRaises(ValueError):
             snapshot(cuds, filename, select=(CUBA.TEMPERATURE, 'elements'))
 
+    def test_snapshot_with_cache(self):
+        # given
+        cuds = create_example_mesh()
+        cache = ConversionCache()
+        cache.key = Mock(wraps=cache.key)
+        select = (CUBA.TEMPERATURE, 'elements')
+        filename = os.path.join(self.temp_dir, 'cached.png')
+
+        # when
+        snapshot(cuds, self.filename, select=select, cache=cache)
+        snapshot(cuds, filename, select=select, cache=cache)
+
+        # then
+        self.assertEqual(cache.key.call_count, 2)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+        self.assertImageSavedWithContent(filename)
+        with open(self.filename, 'rb') as expected:
+            with open(filename, 'rb') as cached:
+                self.assertEqual(cached.read(), expected.read())
+
+    def test_snapshot_with_sampled_cache_key(self):
+        # given
+        cuds = create_example_particles()
+        cache = ConversionCache(key=partial(fingerprint, samples=1))
+        snapshot(cuds, self.filename, cache=cache)
+        particle = list(cuds.iter(item_type=CUBA.PARTICLE))[-1]
+
+        # when
+        particle.coordinates = (10.0, 10.0, 10.0)
+        cuds.update([particle])
+        snapshot(cuds, self.filename, cache=cache)
+
+        # then
+        # the image of the changed container is not taken from the cache
+        self.assertEqual(
+            len([key for key in cache.keys() if key[0] == 'image']), 2)
+
+    def test_snapshot_with_session(self):
+        # given
+        filenames = [
+            os.path.join(self.temp_dir, 'frame{}.png'.format(index))
+            for index in range(3)]
+
+        # when
+        with Session() as session:
+            for filename, create in zip(filenames, (
+                    create_example_mesh, create_example_particles,
+                    create_example_lattice)):
+                snapshot(create(), filename, session=session)
+
+            # then
+            self.assertEqual(session.number_of_views, 1)
+        for filename in filenames:
+            self.assertImageSavedWithContent(filename)
+
+    def test_particles_rendering_modes(self):
+        cuds = create_example_particles()
+        for mode in ('glyph', 'points', 'gaussian', 'auto'):
+            snapshot(cuds, self.filename, mode=mode)
+            self.assertImageSavedWithContent(self.filename)
+
+        with self.assertRaises(ValueError):
+            snapshot(cuds, self.filename, mode='spheres')
+
+    def test_snapshot_preview(self):
+        for create in (
+                create_example_mesh, create_example_particles,
+                create_example_lattice):
+            snapshot(create(), self.filename, preview=2)
+            self.assertImageSavedWithContent(self.filename)
+
+    def test_mesh_surface_snapshot(self):
+        cuds = create_example_mesh()
+        snapshot(
+            cuds, self.filename, select=(CUBA.TEMPERATURE, 'points'),
+            surface=True)
+        self.assertImageSavedWithContent(self.filename)
+
+    def test_snapshot_series(self):
+        # given
+        pattern = os.path.join(self.temp_dir, 'frame_{:03d}.png')
+        for create, select in (
+                (create_example_mesh, (CUBA.TEMPERATURE, 'points')),
+                (create_example_particles, (CUBA.TEMPERATURE, 'particles')),
+                (create_example_lattice, None)):
+            frames = [create() for _ in range(3)]
+
+            # when
+            filenames = snapshot_series(frames, pattern, select=select)
+
+            # then
+            self.assertEqual(
+                filenames, [pattern.format(index) for index in range(3)])
+            for filename in filenames:
+                self.assertImageSavedWithContent(filename)
+
+    def test_snapshot_series_with_session(self):
+        # given
+        pattern = os.path.join(self.temp_dir, 'frame_{}.png')
+        frames = [create_example_particles() for _ in range(2)]
+
+        # when
+        with Session() as session:
+            snapshot_series(frames, pattern, session=session)
+            snapshot_series(frames, pattern, session=session)
+
+            # then
+            self.assertEqual(session.number_of_views, 1)
+        self.assertImageSavedWithContent(pattern.format(1))
+
+    def test_snapshot_series_with_mixed_containers(self):
+        # given
+        pattern = os.path.join(self.temp_dir, 'frame_{}.png')
+        frames = [create_example_mesh(), create_example_particles()]
+
+        # when/then
+        with self.assertRaises(TypeError):
+            snapshot_series(frames, pattern)
+        with self.assertRaises(ValueError):
+            snapshot_series(
+                frames[:1], pattern, select=(CUBA.TEMPERATURE, 'nodes'))
+
+    def test_snapshot_parallel(self):
+        # given
+        pattern = os.path.join(self.temp_dir, 'frame_{}.png')
+        frames = [
+            create_example_mesh(), create_example_particles(),
+            create_example_lattice(), create_example_mesh()]
+
+        # when
+        filenames = snapshot_parallel(frames, pattern, workers=2)
+
+        # then
+        self.assertEqual(
+            filenames, [pattern.format(index) for index in range(4)])
+        for filename in filenames:
+            self.assertImageSavedWithContent(filename)
+
+    def test_snapshot_parallel_from_files(self):
+        # given
+        pattern = os.path.join(self.temp_dir, 'frame_{}.png')
+        files = []
+        for create in (create_example_mesh, create_example_particles):
+            filename = os.path.join(
+                self.temp_dir, '{}.vtk'.format(create.__name__))
+            write_to_file(create(), filename)
+            files.append(filename)
+
+        # when
+        filenames = snapshot_parallel(files, pattern, workers=2)
+
+        # then
+        for filename in filenames:
+            self.assertImageSavedWithContent(filename)
+
+    def test_snapshot_parallel_errors(self):
+        # given
+        pattern = os.path.join(self.temp_dir, 'frame_{}.png')
+        frames = [create_example_mesh() for _ in range(3)]
+
+        # when/then
+        with self.assertRaises(ValueError):
+            snapshot_parallel(
+                frames, pattern, select=(CUBA.TEMPERATURE, 'nodes'),
+                workers=2)
+        with self.assertRaises(ValueError):
+            snapshot_parallel(frames, pattern, workers=0)
+
+    def test_snapshot_parallel_shuts_down_the_pool(self):
+        # given
+        pattern = os.path.join(self.temp_dir, 'frame_{}.png')
+        pool = Mock()
+        pool.imap.side_effect = lambda function, tasks, chunksize: [
+            filename for _, filename, _, _ in tasks]
+
+        # when
+        with patch('multiprocessing.Pool', return_value=pool):
+            snapshot_parallel([create_example_mesh()], pattern, workers=2)
+
+        # then
+        self.assertTrue(pool.close.called)
+        self.assertTrue(pool.join.called)
+        self.assertFalse(pool.terminate.called)
+
+        # given
+        pool.reset_mock()
+        pool.imap.side_effect = ValueError
+
+        # when
+        with patch('multiprocessing.Pool', return_value=pool):
+            with self.assertRaises(ValueError):
+                snapshot_parallel(
+                    [create_example_mesh()], pattern, workers=2)
+
+        # then
+        self.assertTrue(pool.terminate.called)
+        self.assertTrue(pool.join.called)
+
+    def test_worker_session_is_closed_on_exit(self):
+        # given
+        session = Mock()
+
+        # when
+        with patch.object(snapshot_module, 'Session', return_value=session):
+            with patch.object(snapshot_module, 'Finalize') as finalize:
+                snapshot_module._start_worker()
+
+        # then
+        self.assertTrue(session.open.called)
+        finalize.assert_called_once_with(None, session.close, exitpriority=10)
+        self.addCleanup(setattr, snapshot_module, '_worker_session', None)
+
     def test_unknown_container(self):
         container = object()
         with self.assertRaises(TypeError):